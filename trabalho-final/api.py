@@ -1,10 +1,19 @@
+import json
 import pickle
+import time
 from datetime import datetime, timedelta
 
+import numpy as np
 import pandas as pd
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
-from utils.tabu_search import tabu_search
+from utils.aco_ilhas import aco_ilhas
+from utils.aco_itinerario import aco_itinerario, aco_itinerario_iter
+from utils.avalia_rota import ProblemInstance
+from utils.criterios_parada import Progresso
+from utils.ils import busca_local_iterada
+from utils.portfolio import portfolio
+from utils.tabu_search import tabu_search, tabu_search_iter
 
 app = Flask(__name__)
 # Configurar CORS com mais detalhes
@@ -33,6 +42,9 @@ if "Nota" in df.columns:
 with open("data/distancias.pkl", "rb") as f:
     distancias, tempos = pickle.load(f)
 
+# Instância compilada (notas, horários e tempos em arrays), reutilizada por todas as requisições
+instancia = ProblemInstance(df, tempos)
+
 
 def converter_coordenada(valor, padrao, tipo="lat"):
     """Converte coordenada em vários formatos para decimal e valida a faixa.
@@ -176,6 +188,515 @@ def test_post():
         return jsonify({"error": str(e)}), 500
 
 
+class RequisicaoInvalida(Exception):
+    """Erro de validação de uma requisição de otimização (vira a resposta HTTP `status`)."""
+
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def normalizar_nome(nome):
+    """Normaliza nome para comparação, substituindo caracteres Unicode similares"""
+    return (
+        nome.replace("\u2019", "'")  # ' → '
+        .replace("\u2018", "'")  # ' → '
+        .replace("\u201c", '"')  # " → "
+        .replace("\u201d", '"')  # " → "
+        .replace("\u00e9", "e")  # é → e (opcional)
+        .replace("\u00e1", "a")  # á → a (opcional)
+        .strip()
+    )
+
+
+def preparar_otimizacao(data):
+    """Valida o JSON de uma requisição de otimização e monta o contexto da busca:
+    período, bares candidatos (com o bar inicial primeiro), orçamento de tempo,
+    algoritmo e parâmetros comuns às buscas. Levanta RequisicaoInvalida."""
+    if not data:
+        raise RequisicaoInvalida("Nenhum dado recebido")
+
+    # Validar dados de entrada
+    required_fields = ["startDate", "endDate", "startTime", "endTime", "startPoint"]
+    for field in required_fields:
+        if field not in data:
+            raise RequisicaoInvalida(f"Campo obrigatório ausente: {field}")
+
+    # Parsear datas e horários
+    print("📅 Parseando datas...")
+    data_inicio = datetime.strptime(data["startDate"], "%Y-%m-%d").date()
+    data_fim = datetime.strptime(data["endDate"], "%Y-%m-%d").date()
+    hora_inicio = datetime.strptime(data["startTime"], "%H:%M").time()
+    hora_fim = datetime.strptime(data["endTime"], "%H:%M").time()
+    print(f"   Período: {data_inicio} a {data_fim}, {hora_inicio} - {hora_fim}")
+
+    # Validação de datas e horários
+    hoje = datetime.now().date()
+    if data_inicio < hoje:
+        raise RequisicaoInvalida("A data de início deve ser maior ou igual ao dia atual.")
+    if data_fim < data_inicio:
+        raise RequisicaoInvalida(
+            "A data de fim deve ser igual ou posterior à data de início."
+        )
+    if data_inicio == data_fim and hora_fim <= hora_inicio:
+        raise RequisicaoInvalida(
+            "O horário de término deve ser posterior ao horário de início para o mesmo dia."
+        )
+
+    # Orçamento de tempo da busca (opcional), em milissegundos
+    tempo_limite_ms = data.get("timeBudgetMs")
+    if tempo_limite_ms is not None and (
+        isinstance(tempo_limite_ms, bool)
+        or not isinstance(tempo_limite_ms, (int, float))
+        or tempo_limite_ms <= 0
+    ):
+        raise RequisicaoInvalida(
+            "timeBudgetMs deve ser um número positivo de milissegundos."
+        )
+
+    algoritmo = data.get("algorithm", "tabu")
+    if algoritmo not in ("tabu", "ils", "portfolio", "aco", "aco_ilhas"):
+        raise RequisicaoInvalida(
+            'algorithm deve ser "tabu", "ils", "portfolio", "aco" ou "aco_ilhas".'
+        )
+
+    # Encontrar o bar inicial
+    print("🔍 Buscando bar inicial...")
+    nome_bar_inicial = data["startPoint"].strip()
+    nome_bar_inicial_normalizado = normalizar_nome(nome_bar_inicial)
+    print(f"   Nome original: '{nome_bar_inicial}'")
+    print(f"   Nome normalizado: '{nome_bar_inicial_normalizado}'")
+
+    # Criar coluna temporária com nomes normalizados
+    df_temp = df.copy()
+    df_temp["Nome_Normalizado"] = df_temp["Nome do Buteco"].apply(normalizar_nome)
+
+    # Buscar usando nome normalizado
+    mask = df_temp["Nome_Normalizado"].str.contains(
+        nome_bar_inicial_normalizado, case=False, na=False, regex=False
+    )
+    bares_encontrados = df[mask]
+    print(f"   Bares encontrados (busca normalizada): {len(bares_encontrados)}")
+
+    if len(bares_encontrados) == 0:
+        # Busca exata com nome normalizado
+        mask_exato = df_temp["Nome_Normalizado"] == nome_bar_inicial_normalizado
+        bares_encontrados = df[mask_exato]
+        print(
+            f"   Bares encontrados (busca exata normalizada): {len(bares_encontrados)}"
+        )
+
+    if len(bares_encontrados) == 0:
+        print(f"❌ Bar não encontrado: '{nome_bar_inicial}'")
+        print("   Primeiros 10 bares disponíveis:")
+        for i, nome in enumerate(df["Nome do Buteco"].head(10)):
+            print(f"      {i}: '{nome}'")
+        raise RequisicaoInvalida(
+            f'Bar inicial "{nome_bar_inicial}" não encontrado', status=404
+        )
+
+    bar_inicial_idx = bares_encontrados.index[0]
+    print(
+        f"✅ Bar inicial encontrado: {df.iloc[bar_inicial_idx]['Nome do Buteco']} (índice: {bar_inicial_idx})"
+    )
+
+    # Aplicar filtros (se fornecidos)
+    print("🔧 Aplicando filtros...")
+    df_filtrado = df.copy()
+
+    # Filtro de nota mínima
+    if "minRating" in data and data["minRating"]:
+        min_rating = float(data["minRating"])
+        print(f"   Nota mínima: {min_rating}")
+        if "Nota" in df_filtrado.columns:
+            antes = len(df_filtrado)
+            df_filtrado = df_filtrado[df_filtrado["Nota"] >= min_rating]
+            print(f"   Bares filtrados: {antes} → {len(df_filtrado)}")
+
+    # Criar rota inicial com bar inicial primeiro
+    print("📍 Criando rota inicial...")
+    indices_filtrados = df_filtrado.index.tolist()
+    if bar_inicial_idx not in indices_filtrados:
+        indices_filtrados.insert(0, bar_inicial_idx)
+    else:
+        indices_filtrados.remove(bar_inicial_idx)
+        indices_filtrados.insert(0, bar_inicial_idx)
+
+    rota_inicial = indices_filtrados
+    print(f"   Total de bares na rota inicial: {len(rota_inicial)}")
+
+    # Configurar período: uma janela por dia, de startTime a endTime. Cada
+    # dia é resolvido com o próprio relógio e o próprio orçamento
+    # (otimizar_dias_iter), e o formatador refaz exatamente esse relógio
+    print("⚙️ Configurando otimização...")
+    num_dias = (data_fim - data_inicio).days + 1
+    periodos = []
+    for k in range(num_dias):
+        dia = data_inicio + timedelta(days=k)
+        periodos.append((datetime.combine(dia, hora_inicio), datetime.combine(dia, hora_fim)))
+
+    # Executar otimização com parâmetros da configuração rápida otimizada
+    alpha, beta = 1.0, 25.0
+    parametros_busca = dict(
+        alpha=alpha,
+        beta=beta,
+        # duração tabu inicial; a memória reativa ajusta ao tamanho da instância
+        tabu_tam=10,
+        tabu_reativo=True,
+        # ótimos locais vão para um conjunto de elite e são religados no fim
+        religamento=True,
+        max_iter_sem_melhoria=30,
+        verbose=True,
+        instancia=instancia,
+        # só os bares filtrados entram na busca, com o bar inicial fixo
+        # (a cada dia, só os que ainda não foram visitados; contexto_do_dia)
+        indices_bares=rota_inicial,
+        fixar_inicio=True,
+        orientacao=True,
+    )
+    return {
+        "data_inicio": data_inicio,
+        "data_fim": data_fim,
+        "hora_inicio": hora_inicio,
+        "hora_fim": hora_fim,
+        "periodos": periodos,
+        "tempo_visita": timedelta(hours=1),
+        "rota_inicial": rota_inicial,
+        "tempo_limite_ms": tempo_limite_ms,
+        "algoritmo": algoritmo,
+        "parametros_busca": parametros_busca,
+    }
+
+
+def contexto_do_dia(contexto, dia, ancora, restantes):
+    """Contexto de busca do dia `dia`: período do dia, bares `restantes`
+    (ainda não visitados) e a parte do orçamento de tempo que cabe ao dia.
+
+    No primeiro dia a rota começa no bar inicial (restantes[0]), visitado às
+    startTime. Nos demais, ela parte de `ancora`, o último bar do dia
+    anterior, que não é visitado de novo: o relógio começa uma visita antes
+    de startTime, para que a chegada ao primeiro bar novo seja startTime mais
+    o deslocamento desde a âncora.
+    """
+    inicio, fim = contexto["periodos"][dia]
+    rota = list(restantes)
+    if ancora is not None:
+        rota = [ancora] + rota
+        inicio -= contexto["tempo_visita"]
+    tempo_limite_ms = contexto["tempo_limite_ms"]
+    if tempo_limite_ms:
+        tempo_limite_ms = tempo_limite_ms / len(contexto["periodos"])
+    return dict(
+        contexto,
+        rota_inicial=rota,
+        hora_inicio_geral=inicio,
+        hora_limite=fim,
+        tempo_limite_ms=tempo_limite_ms,
+        parametros_busca=dict(contexto["parametros_busca"], indices_bares=rota),
+    )
+
+
+def argumentos_tabu(contexto):
+    """Argumentos de tabu_search / tabu_search_iter para o contexto de um dia."""
+    tempo_limite_ms = contexto["tempo_limite_ms"]
+    return dict(
+        rota_inicial=contexto["rota_inicial"],
+        tempos=tempos,
+        bares=df,
+        hora_inicial=contexto["hora_inicio_geral"],
+        hora_final=contexto["hora_limite"],
+        tempo_visita=contexto["tempo_visita"],
+        # com orçamento de tempo, o relógio substitui o limite de iterações
+        max_iter=None if tempo_limite_ms else 100,
+        tempo_limite_ms=tempo_limite_ms,
+        usar_solucao_inicial_inteligente=True,
+        **contexto["parametros_busca"],
+    )
+
+
+def argumentos_aco(contexto):
+    """Argumentos de aco_itinerario / aco_itinerario_iter para o contexto de um dia."""
+    tempo_limite_ms = contexto["tempo_limite_ms"]
+    parametros_busca = contexto["parametros_busca"]
+    return dict(
+        rota_inicial=contexto["rota_inicial"],
+        tempos=tempos,
+        bares=df,
+        hora_inicial=contexto["hora_inicio_geral"],
+        hora_final=contexto["hora_limite"],
+        tempo_visita=contexto["tempo_visita"],
+        max_iter=None if tempo_limite_ms else 200,
+        tempo_limite_ms=tempo_limite_ms,
+        # os parâmetros da memória tabu não se aplicam à colônia
+        **{
+            chave: parametros_busca[chave]
+            for chave in (
+                "alpha",
+                "beta",
+                "verbose",
+                "instancia",
+                "indices_bares",
+                "fixar_inicio",
+                "orientacao",
+            )
+        },
+    )
+
+
+def executar_otimizacao(contexto):
+    """Roda o algoritmo pedido no contexto de um dia (contexto_do_dia) e
+    devolve (melhor_rota, custo, iteracoes)."""
+    algoritmo = contexto["algoritmo"]
+    tempo_limite_ms = contexto["tempo_limite_ms"]
+    parametros_busca = contexto["parametros_busca"]
+    periodo = (
+        contexto["rota_inicial"],
+        tempos,
+        df,
+        contexto["hora_inicio_geral"],
+        contexto["hora_limite"],
+        contexto["tempo_visita"],
+    )
+    if algoritmo == "portfolio":
+        print("🚀 Executando portfólio (Tabu, ACO e Tabu clássica)...")
+        melhor_rota, custo, estatisticas = portfolio(
+            *periodo,
+            tempo_limite_ms=tempo_limite_ms or 2000,
+            max_iter=100,
+            **parametros_busca,
+        )
+        iteracoes = sum(e["iteracoes"] for e in estatisticas)
+    elif algoritmo == "ils":
+        print("🚀 Executando busca local iterada...")
+        melhor_rota, custo, historico = busca_local_iterada(
+            *periodo,
+            max_perturbacoes=None if tempo_limite_ms else 50,
+            tempo_limite_ms=tempo_limite_ms,
+            # buscas locais curtas: quem sai dos ótimos locais é a perturbação
+            **dict(parametros_busca, max_iter_sem_melhoria=10),
+        )
+        iteracoes = len(historico["perturbacao"])
+    elif algoritmo == "aco":
+        print("🚀 Executando colônia de formigas...")
+        melhor_rota, custo, historico = aco_itinerario(**argumentos_aco(contexto))
+        iteracoes = len(historico["iteracao"])
+    elif algoritmo == "aco_ilhas":
+        print("🚀 Executando colônias em ilhas...")
+        argumentos = argumentos_aco(contexto)
+        del argumentos["max_iter"]
+        argumentos["tempo_limite_ms"] = tempo_limite_ms or 2000
+        melhor_rota, custo, estatisticas = aco_ilhas(**argumentos)
+        iteracoes = sum(e["iteracoes"] for e in estatisticas)
+    else:
+        print("🚀 Executando Tabu Search...")
+        melhor_rota, custo, historico = tabu_search(**argumentos_tabu(contexto))
+        iteracoes = len(historico.get("iteracao", []))
+    return melhor_rota, custo, iteracoes
+
+
+def otimizar_dias_iter(contexto):
+    """Resolve o período dia a dia, cada dia com o próprio relógio e prazo.
+
+    O dia seguinte só considera os bares ainda não visitados e parte do
+    último bar visitado (contexto_do_dia). O custo do itinerário é a soma dos
+    custos dos dias.
+
+    Gerador: com "tabu" e "aco", a cada nova melhor rota do dia em andamento
+    produz um Progresso cuja `rota` é a lista das rotas dos dias (as dos dias
+    já resolvidos mais a parcial), com o custo somado, as iterações
+    acumuladas e o tempo desde o início. O retorno (StopIteration.value) é
+    (rotas_dias, custo, iteracoes).
+    """
+    algoritmo = contexto["algoritmo"]
+    rotas_dias = []
+    custo_total = 0.0
+    iteracoes = 0
+    restantes = list(contexto["rota_inicial"])
+    ancora = None
+    inicio = time.perf_counter()
+
+    for dia in range(len(contexto["periodos"])):
+        if not restantes:
+            break
+        contexto_dia = contexto_do_dia(contexto, dia, ancora, restantes)
+        if algoritmo in ("tabu", "aco"):
+            if algoritmo == "aco":
+                print("🚀 Executando colônia de formigas...")
+                busca = aco_itinerario_iter(**argumentos_aco(contexto_dia))
+            else:
+                print("🚀 Executando Tabu Search...")
+                busca = tabu_search_iter(**argumentos_tabu(contexto_dia))
+            while True:
+                try:
+                    progresso = next(busca)
+                except StopIteration as fim:
+                    rota, custo, historico = fim.value
+                    iteracoes += len(historico["iteracao"])
+                    break
+                yield Progresso(
+                    rotas_dias + [[int(bar) for bar in progresso.rota]],
+                    custo_total + progresso.custo,
+                    iteracoes + progresso.iteracao,
+                    (time.perf_counter() - inicio) * 1000.0,
+                )
+        else:
+            rota, custo, iteracoes_dia = executar_otimizacao(contexto_dia)
+            iteracoes += iteracoes_dia
+
+        rota = [int(bar) for bar in rota]
+        rotas_dias.append(rota)
+        custo_total += custo
+        visitados = rota if ancora is None else rota[1:]
+        if visitados:
+            ancora = visitados[-1]
+            visitados = set(visitados)
+            restantes = [bar for bar in restantes if bar not in visitados]
+
+    return rotas_dias, custo_total, iteracoes
+
+
+def otimizar_dias(contexto):
+    """Roda otimizar_dias_iter até o fim e devolve (rotas_dias, custo, iteracoes)."""
+    busca = otimizar_dias_iter(contexto)
+    while True:
+        try:
+            next(busca)
+        except StopIteration as fim:
+            return fim.value
+
+
+def formatar_rota(rotas_dias, custo, contexto, verbose=True):
+    """Itinerário para o frontend: bares com chegada e saída, dias e estatísticas.
+
+    `rotas_dias` tem uma rota por dia, como em otimizar_dias_iter. Os
+    horários seguem o mesmo relógio do objetivo: cada dia começa em startTime
+    (no primeiro bar do período ou, nos demais dias, uma visita antes, na
+    âncora), e cada chegada soma a visita anterior e o deslocamento.
+    """
+    tempo_visita = contexto["tempo_visita"]
+    minutos_visita = tempo_visita.total_seconds() / 60.0
+
+    # bares visitados em ordem, com o horário de chegada de cada um
+    visitas = []
+    for dia, rota in enumerate(rotas_dias):
+        hora_atual = contexto["periodos"][dia][0]
+        primeiro = 0
+        if dia > 0:
+            hora_atual -= tempo_visita
+            primeiro = 1
+        for pos, bar_idx in enumerate(rota):
+            if pos:
+                hora_atual += tempo_visita + timedelta(minutes=tempos[rota[pos - 1]][bar_idx])
+            if pos >= primeiro:
+                visitas.append((bar_idx, hora_atual))
+
+    # tempos e distâncias de cada trecho (o último bar de um dia liga ao
+    # primeiro do dia seguinte, saindo da âncora), lidos das matrizes de uma vez
+    sequencia = np.array([bar_idx for bar_idx, _ in visitas], dtype=np.intp)
+    origens, destinos = sequencia[:-1], sequencia[1:]
+    tempos_trechos = instancia.tempos[origens, destinos].tolist()
+    try:
+        distancias_trechos = (
+            np.asarray(distancias, dtype=float)[origens, destinos].tolist()
+        )
+    except Exception:
+        # Em caso de problema com a matriz, ignorar as distâncias
+        distancias_trechos = None
+
+    bars_result = []
+    total_duration = 0
+    total_distance_km = 0.0
+    for i, (bar_idx, hora_atual) in enumerate(visitas):
+        bar = df.iloc[bar_idx]
+        tempo_viagem_minutos = tempos_trechos[i] if i < len(tempos_trechos) else 0
+        hora_saida = hora_atual + tempo_visita
+
+        # Obter coordenadas (usar função de nível de módulo)
+        lat = converter_coordenada(bar.get("Latitude"), -19.9167, tipo="lat")
+        lng = converter_coordenada(bar.get("Longitude"), -43.9345, tipo="lng")
+
+        bars_result.append(
+            {
+                "id": i + 1,
+                "name": bar["Nome do Buteco"],
+                "address": bar.get(
+                    "Endereço", f"{bar['Nome do Buteco']}, Belo Horizonte - MG"
+                ),
+                "rating": float(bar["Nota"])
+                if "Nota" in bar and pd.notnull(bar["Nota"])
+                else 4.5,
+                "lat": lat,
+                "lng": lng,
+                "arrivalTime": hora_atual.strftime("%H:%M"),
+                "departureTime": hora_saida.strftime("%H:%M"),
+                "day": hora_atual.strftime("%Y-%m-%d"),
+                "travelTimeToNext": tempo_viagem_minutos,
+            }
+        )
+
+        if i < len(tempos_trechos):
+            # visita + tempo de viagem até o próximo bar
+            total_duration += minutos_visita + tempo_viagem_minutos
+            # Somar distância entre pontos a partir da matriz de distâncias carregada
+            if distancias_trechos is not None:
+                total_distance_km += distancias_trechos[i]
+
+    # Organizar bares por dia
+    dias_dict = {}
+    for bar in bars_result:
+        dia = bar["day"]
+        if dia not in dias_dict:
+            dias_dict[dia] = []
+        dias_dict[dia].append(bar)
+
+    # Converter para lista de dias com cores
+    cores_dias = [
+        "#FF6B6B",  # Vermelho
+        "#4ECDC4",  # Turquesa
+        "#45B7D1",  # Azul
+        "#FFA07A",  # Salmão
+        "#98D8C8",  # Verde menta
+        "#F7DC6F",  # Amarelo
+        "#BB8FCE",  # Roxo
+        "#85C1E2",  # Azul claro
+    ]
+
+    dias_visitacao = []
+    for idx, (dia, bares) in enumerate(sorted(dias_dict.items())):
+        dia_obj = datetime.strptime(dia, "%Y-%m-%d").date()
+        dias_visitacao.append(
+            {
+                "date": dia,
+                "displayDate": dia_obj.strftime("%d/%m/%Y"),
+                "dayNumber": idx + 1,
+                "color": cores_dias[idx % len(cores_dias)],
+                "bars": bares,
+            }
+        )
+
+    # Preparar estatísticas
+    stats = {
+        "totalDistance": f"{total_distance_km:.2f} km",
+        "totalDuration": f"{total_duration} min",
+        "numberOfStops": len(bars_result),
+        "numberOfDays": len(dias_visitacao),
+        "cost": round(custo, 2),
+    }
+
+    if verbose:
+        print(
+            f"✅ Rota otimizada: {len(bars_result)} bares em {len(dias_visitacao)} dias"
+        )
+        print(f"⏱️  Duração total calculada: {total_duration} min")
+        print(f"📏 Distância total calculada: {total_distance_km:.2f} km")
+    return {
+        "bars": bars_result,  # Lista flat para compatibilidade
+        "days": dias_visitacao,  # Lista organizada por dias
+        "stats": stats,
+        "success": True,
+    }
+
+
 @app.route("/api/optimize-route", methods=["POST", "OPTIONS"])
 def optimize_route():
     """
@@ -189,9 +710,21 @@ def optimize_route():
         "endTime": "23:00",
         "startPoint": "Nome do Bar Inicial",
         "minRating": 4.0,  // opcional
-        "menuOptions": []  // opcional
+        "menuOptions": [],  // opcional
+        "timeBudgetMs": 500,  // opcional: tempo máximo da busca, em ms,
+                              // dividido igualmente entre os dias
+        "algorithm": "tabu"  // opcional: "tabu", "ils" (busca local iterada
+                             // sobre a Tabu), "aco" (colônia de formigas
+                             // sobre o mesmo objetivo), "aco_ilhas" (uma
+                             // colônia por núcleo, com migrações) ou
+                             // "portfolio" (Tabu, ACO e Tabu clássica em
+                             // paralelo); os dois últimos usam 2000 ms por
+                             // dia se não houver timeBudgetMs
     }
 
+    Cada dia é otimizado com a própria janela startTime–endTime, só com os
+    bares ainda não visitados, partindo do último bar do dia anterior.
+
     Retorna:
     {
         "bars": [
@@ -223,322 +756,110 @@ def optimize_route():
     try:
         data = request.json
         print("📥 Recebida requisição de otimização")
+        contexto = preparar_otimizacao(data)
 
-        if not data:
-            return jsonify({"error": "Nenhum dado recebido", "success": False}), 400
-
-        # Validar dados de entrada
-        required_fields = ["startDate", "endDate", "startTime", "endTime", "startPoint"]
-        for field in required_fields:
-            if field not in data:
-                return jsonify(
-                    {"error": f"Campo obrigatório ausente: {field}", "success": False}
-                ), 400
-
-        # Parsear datas e horários
-        print("📅 Parseando datas...")
-        data_inicio = datetime.strptime(data["startDate"], "%Y-%m-%d").date()
-        data_fim = datetime.strptime(data["endDate"], "%Y-%m-%d").date()
-        hora_inicio = datetime.strptime(data["startTime"], "%H:%M").time()
-        hora_fim = datetime.strptime(data["endTime"], "%H:%M").time()
-        print(f"   Período: {data_inicio} a {data_fim}, {hora_inicio} - {hora_fim}")
-
-        # Validação de datas e horários
-        hoje = datetime.now().date()
-        if data_inicio < hoje:
-            return jsonify(
-                {
-                    "error": "A data de início deve ser maior ou igual ao dia atual.",
-                    "success": False,
-                }
-            ), 400
-        if data_fim < data_inicio:
-            return jsonify(
-                {
-                    "error": "A data de fim deve ser igual ou posterior à data de início.",
-                    "success": False,
-                }
-            ), 400
-        if data_inicio == data_fim and hora_fim <= hora_inicio:
-            return jsonify(
-                {
-                    "error": "O horário de término deve ser posterior ao horário de início para o mesmo dia.",
-                    "success": False,
-                }
-            ), 400
-
-        if not data:
-            return jsonify({"error": "Nenhum dado recebido", "success": False}), 400
-
-        # Validar dados de entrada
-        required_fields = ["startDate", "endDate", "startTime", "endTime", "startPoint"]
-        for field in required_fields:
-            if field not in data:
-                return jsonify(
-                    {"error": f"Campo obrigatório ausente: {field}", "success": False}
-                ), 400
-
-        # Parsear datas e horários
-        print("📅 Parseando datas...")
-        data_inicio = datetime.strptime(data["startDate"], "%Y-%m-%d").date()
-        data_fim = datetime.strptime(data["endDate"], "%Y-%m-%d").date()
-        hora_inicio = datetime.strptime(data["startTime"], "%H:%M").time()
-        hora_fim = datetime.strptime(data["endTime"], "%H:%M").time()
-        print(f"   Período: {data_inicio} a {data_fim}, {hora_inicio} - {hora_fim}")
-
-        # Encontrar o bar inicial
-        print("🔍 Buscando bar inicial...")
-        nome_bar_inicial = data["startPoint"].strip()
-
-        # Normalizar apóstrofos e outros caracteres Unicode
-        # Substituir apóstrofo Unicode (U+2019) por ASCII
-        def normalizar_nome(nome):
-            """Normaliza nome para comparação, substituindo caracteres Unicode similares"""
-            return (
-                nome.replace("\u2019", "'")  # ' → '
-                .replace("\u2018", "'")  # ' → '
-                .replace("\u201c", '"')  # " → "
-                .replace("\u201d", '"')  # " → "
-                .replace("\u00e9", "e")  # é → e (opcional)
-                .replace("\u00e1", "a")  # á → a (opcional)
-                .strip()
-            )
+        rotas_dias, custo, iteracoes = otimizar_dias(contexto)
+        print(f"✅ Otimização concluída! Custo: {custo:.2f}")
+        print(f"   Rotas otimizadas por dia: {[len(rota) for rota in rotas_dias]} bares")
+        print(f"   Iterações realizadas: {iteracoes}")
 
-        nome_bar_inicial_normalizado = normalizar_nome(nome_bar_inicial)
-        print(f"   Nome original: '{nome_bar_inicial}'")
-        print(f"   Nome normalizado: '{nome_bar_inicial_normalizado}'")
+        # Formatar resultado para o frontend
+        print("📦 Formatando resultado...")
+        return jsonify(formatar_rota(rotas_dias, custo, contexto))
 
-        # Criar coluna temporária com nomes normalizados
-        df_temp = df.copy()
-        df_temp["Nome_Normalizado"] = df_temp["Nome do Buteco"].apply(normalizar_nome)
+    except RequisicaoInvalida as e:
+        return jsonify({"error": str(e), "success": False}), e.status
 
-        # Buscar usando nome normalizado
-        mask = df_temp["Nome_Normalizado"].str.contains(
-            nome_bar_inicial_normalizado, case=False, na=False, regex=False
-        )
-        bares_encontrados = df[mask]
-        print(f"   Bares encontrados (busca normalizada): {len(bares_encontrados)}")
-
-        if len(bares_encontrados) == 0:
-            # Busca exata com nome normalizado
-            mask_exato = df_temp["Nome_Normalizado"] == nome_bar_inicial_normalizado
-            bares_encontrados = df[mask_exato]
-            print(
-                f"   Bares encontrados (busca exata normalizada): {len(bares_encontrados)}"
-            )
+    except Exception as e:
+        print(f"❌ Erro ao otimizar rota: {str(e)}")
+        import traceback
 
-        if len(bares_encontrados) == 0:
-            print(f"❌ Bar não encontrado: '{nome_bar_inicial}'")
-            print("   Primeiros 10 bares disponíveis:")
-            for i, nome in enumerate(df["Nome do Buteco"].head(10)):
-                print(f"      {i}: '{nome}'")
-            return jsonify(
-                {
-                    "error": f'Bar inicial "{nome_bar_inicial}" não encontrado',
-                    "success": False,
-                }
-            ), 404
-
-        bar_inicial_idx = bares_encontrados.index[0]
-        print(
-            f"✅ Bar inicial encontrado: {df.iloc[bar_inicial_idx]['Nome do Buteco']} (índice: {bar_inicial_idx})"
-        )
+        traceback.print_exc()
+        return jsonify({"error": str(e), "success": False}), 500
 
-        # Aplicar filtros (se fornecidos)
-        print("🔧 Aplicando filtros...")
-        df_filtrado = df.copy()
-
-        # Filtro de nota mínima
-        if "minRating" in data and data["minRating"]:
-            min_rating = float(data["minRating"])
-            print(f"   Nota mínima: {min_rating}")
-            if "Nota" in df_filtrado.columns:
-                antes = len(df_filtrado)
-                df_filtrado = df_filtrado[df_filtrado["Nota"] >= min_rating]
-                print(f"   Bares filtrados: {antes} → {len(df_filtrado)}")
-
-        # Criar rota inicial com bar inicial primeiro
-        print("📍 Criando rota inicial...")
-        indices_filtrados = df_filtrado.index.tolist()
-        if bar_inicial_idx not in indices_filtrados:
-            indices_filtrados.insert(0, bar_inicial_idx)
-        else:
-            indices_filtrados.remove(bar_inicial_idx)
-            indices_filtrados.insert(0, bar_inicial_idx)
 
-        rota_inicial = indices_filtrados
-        print(f"   Total de bares na rota inicial: {len(rota_inicial)}")
+def evento_sse(evento, dados):
+    """Mensagem Server-Sent Events com `dados` em JSON."""
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
 
-        # Configurar período
-        print("⚙️ Configurando otimização...")
-        hora_inicio_geral = datetime.combine(data_inicio, hora_inicio)
-        hora_fim_geral = datetime.combine(data_fim, hora_fim)
-        tempo_visita = timedelta(hours=1)
 
-        # Executar otimização com parâmetros da configuração rápida otimizada
-        print("🚀 Executando Tabu Search...")
-        alpha, beta = 1.0, 25.0
-        melhor_rota, custo, historico = tabu_search(
-            rota_inicial,
-            tempos,
-            df,
-            hora_inicio_geral,
-            hora_fim_geral,
-            tempo_visita,
-            alpha=alpha,
-            beta=beta,
-            tabu_tam=10,
-            max_iter=100,
-            max_iter_sem_melhoria=30,
-            usar_solucao_inicial_inteligente=True,
-            verbose=True,
-        )
-        print(f"✅ Otimização concluída! Custo: {custo:.2f}")
-        print(f"   Rota otimizada tem {len(melhor_rota)} bares")
-        print(f"   Iterações realizadas: {len(historico.get('iteracao', []))}")
+@app.route("/api/optimize-route/stream", methods=["POST", "OPTIONS"])
+def optimize_route_stream():
+    """
+    Otimização de rota com progresso em Server-Sent Events
 
-        # Formatar resultado para o frontend
-        print("📦 Formatando resultado...")
-        bars_result = []
-        hora_atual = hora_inicio_geral
-        dia_atual = data_inicio
-        total_duration = 0
-        total_distance_km = 0.0
-
-        for i in range(len(melhor_rota)):
-            bar_idx = melhor_rota[i]
-            bar = df.iloc[bar_idx]
-
-            # Verificar mudança de dia
-            if hora_atual.date() > dia_atual:
-                dia_atual = hora_atual.date()
-
-            # Verificar horário de funcionamento
-            horario_dia_inicio = datetime.combine(hora_atual.date(), hora_inicio)
-            horario_dia_fim = datetime.combine(hora_atual.date(), hora_fim)
-
-            if hora_atual < horario_dia_inicio:
-                hora_atual = horario_dia_inicio
-
-            if hora_atual > horario_dia_fim:
-                proxima_data = hora_atual.date() + timedelta(days=1)
-                if proxima_data <= data_fim:
-                    hora_atual = datetime.combine(proxima_data, hora_inicio)
-                    dia_atual = proxima_data
-                else:
-                    break
+    Recebe o mesmo JSON de /api/optimize-route. A resposta é um fluxo
+    text/event-stream (leia com fetch + ReadableStream, já que EventSource só
+    faz GET):
 
-            # Calcular tempo até próximo bar
-            tempo_viagem_minutos = 0
-            if i < len(melhor_rota) - 1:
-                prox = melhor_rota[i + 1]
-                tempo_viagem_minutos = tempos[bar_idx][prox]
-
-            hora_saida = hora_atual + tempo_visita
-
-            # Obter coordenadas (usar função de nível de módulo)
-            lat = converter_coordenada(bar.get("Latitude"), -19.9167, tipo="lat")
-            lng = converter_coordenada(bar.get("Longitude"), -43.9345, tipo="lng")
-
-            bars_result.append(
-                {
-                    "id": i + 1,
-                    "name": bar["Nome do Buteco"],
-                    "address": bar.get(
-                        "Endereço", f"{bar['Nome do Buteco']}, Belo Horizonte - MG"
-                    ),
-                    "rating": float(bar["Nota"])
-                    if "Nota" in bar and pd.notnull(bar["Nota"])
-                    else 4.5,
-                    "lat": lat,
-                    "lng": lng,
-                    "arrivalTime": hora_atual.strftime("%H:%M"),
-                    "departureTime": hora_saida.strftime("%H:%M"),
-                    "day": hora_atual.strftime("%Y-%m-%d"),
-                    "travelTimeToNext": tempo_viagem_minutos,
-                }
-            )
+        event: progress
+        data: {"bars": [...], "days": [...], "stats": {...},
+               "iteration": 12, "elapsedMs": 35.2, "done": false}
 
-            if i < len(melhor_rota) - 1:
-                tempo_viagem = timedelta(minutes=tempo_viagem_minutos)
-                hora_atual += tempo_visita + tempo_viagem
-                total_duration += (
-                    60 + tempo_viagem_minutos
-                )  # 60 min de visita + tempo de viagem
-                # Somar distância entre pontos a partir da matriz de distâncias carregada
-                try:
-                    distancia_km = float(distancias[bar_idx][prox])
-                    total_distance_km += distancia_km
-                except Exception:
-                    # Em caso de problema com índice/matriz, ignorar e continuar
-                    pass
-
-            if hora_atual.time() > hora_fim and hora_atual.date() >= data_fim:
-                break
-
-        # Organizar bares por dia
-        dias_dict = {}
-        for bar in bars_result:
-            dia = bar["day"]
-            if dia not in dias_dict:
-                dias_dict[dia] = []
-            dias_dict[dia].append(bar)
-
-        # Converter para lista de dias com cores
-        cores_dias = [
-            "#FF6B6B",  # Vermelho
-            "#4ECDC4",  # Turquesa
-            "#45B7D1",  # Azul
-            "#FFA07A",  # Salmão
-            "#98D8C8",  # Verde menta
-            "#F7DC6F",  # Amarelo
-            "#BB8FCE",  # Roxo
-            "#85C1E2",  # Azul claro
-        ]
-
-        dias_visitacao = []
-        for idx, (dia, bares) in enumerate(sorted(dias_dict.items())):
-            dia_obj = datetime.strptime(dia, "%Y-%m-%d").date()
-            dias_visitacao.append(
-                {
-                    "date": dia,
-                    "displayDate": dia_obj.strftime("%d/%m/%Y"),
-                    "dayNumber": idx + 1,
-                    "color": cores_dias[idx % len(cores_dias)],
-                    "bars": bares,
-                }
-            )
+    um evento "progress" por rota melhor que a anterior, no mesmo formato da
+    resposta de /api/optimize-route, e por fim
 
-        # Preparar estatísticas
-        stats = {
-            "totalDistance": f"{total_distance_km:.2f} km",
-            "totalDuration": f"{total_duration} min",
-            "numberOfStops": len(bars_result),
-            "numberOfDays": len(dias_visitacao),
-            "cost": round(custo, 2),
-        }
+        event: done
+        data: {... a melhor rota ..., "iterations": 140, "done": true}
 
-        print(
-            f"✅ Rota otimizada: {len(bars_result)} bares em {len(dias_visitacao)} dias"
-        )
-        print(f"⏱️  Duração total calculada: {total_duration} min")
-        print(f"📏 Distância total calculada: {total_distance_km:.2f} km")
-        return jsonify(
-            {
-                "bars": bars_result,  # Lista flat para compatibilidade
-                "days": dias_visitacao,  # Lista organizada por dias
-                "stats": stats,
-                "success": True,
-            }
-        )
+    Com "algorithm": "tabu" (padrão), a primeira rota chega assim que a
+    solução inicial fica pronta; com "aco", ao fim da primeira iteração da
+    colônia. Com vários dias, os eventos trazem os dias já resolvidos mais a
+    melhor rota do dia em andamento. "ils", "aco_ilhas" e "portfolio" não têm
+    progresso intermediário e mandam só o evento "done". Erros de validação são
+    respondidos como em /api/optimize-route, antes do fluxo começar; um erro
+    durante a busca vira um evento "error".
+    """
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
 
+    try:
+        data = request.json
+        print("📥 Recebida requisição de otimização (stream)")
+        contexto = preparar_otimizacao(data)
+    except RequisicaoInvalida as e:
+        return jsonify({"error": str(e), "success": False}), e.status
     except Exception as e:
         print(f"❌ Erro ao otimizar rota: {str(e)}")
-        import traceback
-
-        traceback.print_exc()
         return jsonify({"error": str(e), "success": False}), 500
 
+    def gerar():
+        try:
+            busca = otimizar_dias_iter(contexto)
+            while True:
+                try:
+                    progresso = next(busca)
+                except StopIteration as fim:
+                    rotas_dias, custo, iteracoes = fim.value
+                    break
+                resultado = formatar_rota(
+                    progresso.rota, progresso.custo, contexto, verbose=False
+                )
+                resultado.update(
+                    iteration=progresso.iteracao,
+                    elapsedMs=round(progresso.decorrido_ms, 1),
+                    done=False,
+                )
+                yield evento_sse("progress", resultado)
+
+            print(f"✅ Otimização concluída! Custo: {custo:.2f}")
+            resultado = formatar_rota(rotas_dias, custo, contexto)
+            resultado.update(iterations=iteracoes, done=True)
+            yield evento_sse("done", resultado)
+        except Exception as e:
+            print(f"❌ Erro ao otimizar rota: {str(e)}")
+            import traceback
+
+            traceback.print_exc()
+            yield evento_sse("error", {"error": str(e), "success": False, "done": True})
+
+    return Response(
+        stream_with_context(gerar()),
+        mimetype="text/event-stream",
+        # sem cache nem buffer de proxy: cada evento sai assim que é gerado
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @app.route("/api/bar-coordinates/<bar_name>", methods=["GET"])
 def get_bar_coordinates(bar_name):
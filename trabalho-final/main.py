@@ -2,6 +2,7 @@ import pandas as pd
 import os
 import pickle
 from datetime import datetime, timedelta
+from utils.ils import busca_local_iterada
 from utils.tabu_search import tabu_search
 from utils.avalia_rota import avaliar_rota
 
@@ -11,6 +12,7 @@ data_fim_str = input("Data final (YYYY-MM-DD): ")
 hora_inicio_str = input("Horário de início (HH:MM): ")
 hora_fim_str = input("Horário de término (HH:MM): ")
 nome_bar_inicial = input("Nome do bar inicial (ou deixe em branco para escolha automática): ").strip()
+algoritmo = input("Algoritmo (tabu ou ils, padrão tabu): ").strip().lower() or "tabu"
 
 data_inicio = datetime.strptime(data_inicio_str, "%Y-%m-%d").date()
 data_fim = datetime.strptime(data_fim_str, "%Y-%m-%d").date()
@@ -61,10 +63,18 @@ print(f"De: {hora_inicio_geral.strftime('%d/%m/%Y %H:%M')}")
 print(f"Até: {hora_fim_geral.strftime('%d/%m/%Y %H:%M')}")
 
 
-melhor_rota, custo = tabu_search(
-    rota_inicial, tempos, df, hora_inicio_geral, hora_fim_geral, tempo_visita,
-    alpha=alpha, beta=beta, tabu_tam=15, max_iter=20
-)
+if algoritmo == "ils":
+    melhor_rota, custo, _ = busca_local_iterada(
+        rota_inicial, tempos, df, hora_inicio_geral, hora_fim_geral, tempo_visita,
+        alpha=alpha, beta=beta, tabu_tam=15, max_iter=20, max_perturbacoes=30,
+        fixar_inicio=bar_inicial_idx is not None
+    )
+else:
+    melhor_rota, custo, _ = tabu_search(
+        rota_inicial, tempos, df, hora_inicio_geral, hora_fim_geral, tempo_visita,
+        alpha=alpha, beta=beta, tabu_tam=15, max_iter=20,
+        fixar_inicio=bar_inicial_idx is not None
+    )
 
 print(f"\n=== ROTEIRO OTIMIZADO ===")
 print(f"Custo total: {custo:.2f}")
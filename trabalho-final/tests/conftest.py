@@ -0,0 +1,68 @@
+"""
+Instâncias sintéticas pequenas para os testes de regressão (pytest).
+
+Os bares têm horários variados (abrindo antes e depois do início do período,
+fechando antes do fim, depois da meia-noite ou sem horário informado), então
+todas as regras de penalidade de avaliar_rota aparecem nas rotas testadas.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from utils.avalia_rota import CacheHorarios, ProblemInstance  # noqa: E402
+
+HORA_INICIAL = datetime(2025, 11, 14, 16, 0)  # sexta-feira
+HORA_FINAL = datetime(2025, 11, 14, 23, 0)
+TEMPO_VISITA = timedelta(minutes=30)
+ALPHA, BETA = 1.0, 25.0
+
+_HORARIOS = [
+    ("16:00", "23:00"),
+    ("18:00", "23:59"),
+    ("11:00", "00:00"),
+    ("19:30", "02:00"),
+    ("12:00", "20:00"),
+    ("", ""),
+    ("17:00", "22:00"),
+]
+
+
+def bares_sinteticos(n, semente=0):
+    """DataFrame no formato de data/bares.csv com `n` bares sorteados."""
+    rng = np.random.default_rng(semente)
+    linhas = []
+    for k in range(n):
+        linha = {"Nome do Buteco": f"Bar {k}", "Nota": round(float(rng.uniform(3.5, 5.0)), 1)}
+        for dia in CacheHorarios.DIAS:
+            abertura, fechamento = _HORARIOS[int(rng.integers(len(_HORARIOS)))]
+            linha[f"{dia} (Abertura)"] = abertura
+            linha[f"{dia} (Fechamento)"] = fechamento
+        linhas.append(linha)
+    return pd.DataFrame(linhas)
+
+
+def tempos_sinteticos(n, semente=0):
+    """Matriz simétrica de tempos em minutos (3 a 40), diagonal zero."""
+    rng = np.random.default_rng(semente)
+    tempos = rng.uniform(3.0, 40.0, size=(n, n))
+    tempos = (tempos + tempos.T) / 2.0
+    np.fill_diagonal(tempos, 0.0)
+    return tempos
+
+
+@pytest.fixture
+def instancia():
+    n = 14
+    return ProblemInstance(bares_sinteticos(n), tempos_sinteticos(n))
+
+
+@pytest.fixture
+def bares_df():
+    return bares_sinteticos(14)
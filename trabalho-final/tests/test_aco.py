@@ -0,0 +1,154 @@
+"""
+Variantes do ACO contra força bruta em instâncias pequenas, limites de
+feromônio do MAX–MIN Ant System em instâncias mínimas e o ACO sobre o
+objetivo completo do itinerário, sozinho e em ilhas.
+"""
+
+import contextlib
+import io
+import itertools
+import types
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+from conftest import ALPHA, BETA, HORA_FINAL, HORA_INICIAL, TEMPO_VISITA, tempos_sinteticos
+
+import utils.aco_ilhas as modulo_ilhas
+from utils.aco_classico import ACO, MaxMinAS, calcular_custo_rota
+from utils.aco_ilhas import aco_ilhas
+from utils.aco_itinerario import aco_itinerario
+from utils.avalia_rota import avaliar_rota_instancia
+
+
+def circuito_otimo(matriz):
+    n = len(matriz)
+    return min(
+        calcular_custo_rota((0,) + resto, matriz)
+        for resto in itertools.permutations(range(1, n))
+    )
+
+
+def executar(colonia):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return colonia.executar(cidade_inicial=0)
+
+
+@pytest.mark.parametrize(
+    "criar",
+    [
+        lambda m: ACO(m, 10, 60, semente=1),
+        lambda m: ACO(m, 10, 60, semente=1, candidatos_construcao=4),
+        lambda m: ACO(m, 10, 30, semente=1, busca_local=True),
+        lambda m: MaxMinAS(m, 10, 60, semente=1),
+        lambda m: MaxMinAS(m, 10, 60, semente=1, deposito="global"),
+    ],
+    ids=["elitista", "candidatos", "lin_kernighan", "mmas", "mmas_global"],
+)
+def test_variantes_acham_o_circuito_otimo(criar):
+    matriz = tempos_sinteticos(7, semente=2)
+    rota, custo, _ = executar(criar(matriz))
+    assert sorted(rota.tolist()) == list(range(7))
+    assert custo == pytest.approx(calcular_custo_rota(rota, matriz))
+    assert custo == pytest.approx(circuito_otimo(matriz))
+
+
+@pytest.mark.parametrize("n", [2, 3])
+def test_mmas_em_instancias_minimas(n):
+    matriz = tempos_sinteticos(n, semente=0)
+    colonia = MaxMinAS(matriz, 4, 5, semente=0)
+    rota, custo, _ = executar(colonia)
+    assert sorted(rota.tolist()) == list(range(n))
+    assert 0 < colonia.tau_min <= colonia.tau_max
+    assert np.isfinite(colonia.feromonios).all()
+    assert custo == pytest.approx(circuito_otimo(matriz))
+
+
+
+def test_aco_itinerario_devolve_rota_com_custo_exato(instancia):
+    melhorias = []
+    rota, custo, _ = aco_itinerario(
+        [0],
+        None,
+        None,
+        HORA_INICIAL,
+        HORA_FINAL,
+        TEMPO_VISITA,
+        alpha=ALPHA,
+        beta=BETA,
+        max_iter=20,
+        rng=np.random.default_rng(0),
+        verbose=False,
+        instancia=instancia,
+        fixar_inicio=True,
+        orientacao=True,
+        ao_melhorar=lambda rota, custo: melhorias.append(custo),
+    )
+    rota = rota.tolist()
+    assert rota[0] == 0
+    assert len(rota) == len(set(rota))
+    assert custo == pytest.approx(
+        avaliar_rota_instancia(
+            rota, instancia, HORA_INICIAL, HORA_FINAL, TEMPO_VISITA, ALPHA, BETA, True
+        )
+    )
+    # cada melhoria é publicada assim que aparece, e a última é o resultado
+    assert melhorias == sorted(melhorias, reverse=True)
+    assert melhorias[-1] == custo
+
+
+@pytest.mark.parametrize("migracao", ["rotas", "feromonio"])
+def test_aco_ilhas_migra_e_devolve_rota_global_com_custo_exato(
+    instancia, migracao, monkeypatch
+):
+    # guarda o nome de cada bloco de memória criado, para conferir o unlink
+    criadas = []
+    original = shared_memory.SharedMemory
+
+    def espiao(*args, **kwargs):
+        memoria = original(*args, **kwargs)
+        if kwargs.get("create"):
+            criadas.append(memoria.name)
+        return memoria
+
+    monkeypatch.setattr(modulo_ilhas, "shared_memory", types.SimpleNamespace(SharedMemory=espiao))
+    indices = list(range(2, instancia.n))
+    rota, custo, estatisticas = aco_ilhas(
+        [indices[0]],
+        None,
+        None,
+        HORA_INICIAL,
+        HORA_FINAL,
+        TEMPO_VISITA,
+        alpha=ALPHA,
+        beta=BETA,
+        ilhas=2,
+        migracao=migracao,
+        intervalo_migracao=5,
+        formigas=8,
+        max_iter=20,
+        tempo_limite_ms=60_000,
+        semente=0,
+        instancia=instancia,
+        indices_bares=indices,
+        fixar_inicio=True,
+        verbose=False,
+    )
+    # a rota volta com os ids da instância completa
+    rota = rota.tolist()
+    assert rota[0] == indices[0]
+    assert sorted(rota) == indices
+    assert custo == pytest.approx(
+        avaliar_rota_instancia(
+            rota, instancia, HORA_INICIAL, HORA_FINAL, TEMPO_VISITA, ALPHA, BETA
+        )
+    )
+    assert len(estatisticas) == 2
+    for estatistica in estatisticas:
+        assert sorted(estatistica["rota"]) == indices
+        assert estatistica["migracoes"] > 0
+    assert custo == min(e["custo"] for e in estatisticas)
+
+    assert len(criadas) == 1
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=criadas[0])
@@ -0,0 +1,152 @@
+"""
+Requisições de vários dias em /api/optimize-route: cada dia tem o próprio
+relógio, e os horários devolvidos são os mesmos que o objetivo pontuou. A
+versão em Server-Sent Events manda o progresso e fecha com o resultado.
+"""
+
+import contextlib
+import io
+import json
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from utils.avalia_rota import avaliar_rota_instancia
+
+RAIZ = os.path.join(os.path.dirname(__file__), "..")
+
+
+@pytest.fixture(scope="module")
+def api():
+    pytest.importorskip("flask")
+    pytest.importorskip("flask_cors")
+    diretorio = os.getcwd()
+    os.chdir(RAIZ)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            import api as modulo
+    finally:
+        os.chdir(diretorio)
+    return modulo
+
+
+def requisicao(dias=3, **extra):
+    inicio = date.today() + timedelta(days=30)
+    corpo = {
+        "startDate": inicio.isoformat(),
+        "endDate": (inicio + timedelta(days=dias - 1)).isoformat(),
+        "startTime": "16:00",
+        "endTime": "23:00",
+        "startPoint": "Baiuca",
+        "algorithm": "tabu",
+        "timeBudgetMs": 300,
+    }
+    corpo.update(extra)
+    return corpo
+
+
+def test_custo_e_a_soma_dos_dias_com_relogio_proprio(api):
+    with contextlib.redirect_stdout(io.StringIO()):
+        contexto = api.preparar_otimizacao(requisicao())
+        rotas_dias, custo, _ = api.otimizar_dias(contexto)
+
+    assert len(rotas_dias) == 3
+    visitados = [bar for dia, rota in enumerate(rotas_dias) for bar in rota[dia > 0 :]]
+    assert len(visitados) == len(set(visitados))
+
+    total = 0.0
+    ancora = None
+    restantes = list(contexto["rota_inicial"])
+    for dia, rota in enumerate(rotas_dias):
+        contexto_dia = api.contexto_do_dia(contexto, dia, ancora, restantes)
+        if ancora is not None:
+            assert rota[0] == ancora
+        total += avaliar_rota_instancia(
+            rota,
+            api.instancia,
+            contexto_dia["hora_inicio_geral"],
+            contexto_dia["hora_limite"],
+            contexto["tempo_visita"],
+            1.0,
+            25.0,
+            orientacao=True,
+        )
+        ancora = rota[-1]
+        restantes = [bar for bar in restantes if bar not in rota]
+    assert total == pytest.approx(custo)
+
+
+def test_horarios_devolvidos_ficam_na_janela_de_cada_dia(api):
+    cliente = api.app.test_client()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resposta = cliente.post("/api/optimize-route", json=requisicao())
+    dados = resposta.get_json()
+    assert resposta.status_code == 200, dados
+
+    assert dados["stats"]["numberOfDays"] == 3
+    assert [d["dayNumber"] for d in dados["days"]] == [1, 2, 3]
+    nomes = [bar["name"] for bar in dados["bars"]]
+    assert len(nomes) == len(set(nomes))
+    assert nomes[0] == "Baiuca"
+    for dia in dados["days"]:
+        assert dia["bars"]
+        chegadas = [
+            datetime.strptime(bar["arrivalTime"], "%H:%M").time() for bar in dia["bars"]
+        ]
+        assert chegadas == sorted(chegadas)
+        # a chegada ao último bar do dia cabe no período (modo orientação)
+        assert chegadas[0] >= datetime.strptime("16:00", "%H:%M").time()
+        assert chegadas[-1] <= datetime.strptime("23:00", "%H:%M").time()
+        assert all(bar["day"] == dia["date"] for bar in dia["bars"])
+
+
+@pytest.mark.parametrize("orcamento", [0, -5, "rapido", True])
+def test_orcamento_invalido_devolve_400(api, orcamento):
+    cliente = api.app.test_client()
+    resposta = cliente.post("/api/optimize-route", json=requisicao(timeBudgetMs=orcamento))
+    assert resposta.status_code == 400
+    assert resposta.get_json()["success"] is False
+
+
+def eventos_sse(texto):
+    """Lista de (evento, dados) de um corpo text/event-stream."""
+    eventos = []
+    for bloco in texto.strip().split("\n\n"):
+        campos = dict(linha.split(": ", 1) for linha in bloco.splitlines())
+        eventos.append((campos["event"], json.loads(campos["data"])))
+    return eventos
+
+
+@pytest.mark.parametrize("algoritmo", ["tabu", "aco"])
+def test_stream_manda_progresso_e_fecha_com_done(api, algoritmo):
+    cliente = api.app.test_client()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resposta = cliente.post(
+            "/api/optimize-route/stream", json=requisicao(algorithm=algoritmo)
+        )
+        texto = resposta.get_data(as_text=True)
+    assert resposta.status_code == 200
+    assert resposta.mimetype == "text/event-stream"
+
+    eventos = eventos_sse(texto)
+    nomes = [evento for evento, _ in eventos]
+    assert "progress" in nomes
+    assert nomes[-1] == "done"
+    assert set(nomes[:-1]) == {"progress"}
+    for _, dados in eventos[:-1]:
+        assert dados["done"] is False
+        assert dados["bars"]
+    final = eventos[-1][1]
+    assert final["done"] is True
+    assert final["stats"]["numberOfDays"] == 3
+
+
+def test_stream_com_corpo_invalido_responde_400_antes_do_fluxo(api):
+    cliente = api.app.test_client()
+    corpo = requisicao()
+    del corpo["startPoint"]
+    resposta = cliente.post("/api/optimize-route/stream", json=corpo)
+    assert resposta.status_code == 400
+    assert resposta.mimetype == "application/json"
+    assert resposta.get_json()["success"] is False
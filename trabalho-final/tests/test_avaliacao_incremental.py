@@ -0,0 +1,154 @@
+"""
+Deltas do AvaliadorIncremental contra a avaliação completa (força bruta).
+
+Cada movimento de cada operador é aplicado numa cópia da rota e avaliado do
+zero com avaliar_rota_instancia; o delta incremental tem de bater com a
+diferença de custos, e o relógio final (com_fim) com o da rota movida.
+"""
+
+import numpy as np
+import pytest
+from conftest import ALPHA, BETA, HORA_FINAL, HORA_INICIAL, TEMPO_VISITA
+
+from utils.avalia_rota import (
+    _limite_us,
+    _minutos_visita,
+    _para_us,
+    _relogio_inicial,
+    avaliar_rota,
+    avaliar_rota_instancia,
+    avaliar_rotas_lote,
+)
+from utils.avaliacao_incremental import AvaliadorIncremental
+from utils.operadores import (
+    OPERADORES,
+    OPERADORES_ORIENTACAO,
+    aplicar_movimento,
+    deltas_operador,
+    nova_rota,
+    trecho_movimento,
+)
+
+
+def avaliar(rota, instancia, orientacao=False):
+    return avaliar_rota_instancia(
+        rota, instancia, HORA_INICIAL, HORA_FINAL, TEMPO_VISITA, ALPHA, BETA, orientacao
+    )
+
+
+def avaliador_para(instancia, rota, orientacao=False):
+    return AvaliadorIncremental(
+        instancia, rota, HORA_INICIAL, HORA_FINAL, TEMPO_VISITA, ALPHA, BETA, orientacao
+    )
+
+
+def relogio_final(rota, instancia):
+    relogio, _ = _relogio_inicial(HORA_INICIAL)
+    visita_us = _para_us(_minutos_visita(TEMPO_VISITA))
+    for a, b in zip(rota, rota[1:]):
+        relogio += int(instancia.tempos_us[a, b]) + visita_us
+    return relogio
+
+
+def inverter(rota, i, j):
+    return rota[: i + 1] + rota[i + 1 : j + 1][::-1] + rota[j + 1 :]
+
+
+def rota_movida(rota, operador, movimento):
+    if operador in OPERADORES_ORIENTACAO:
+        return nova_rota(rota, operador, movimento)
+    a, trecho = trecho_movimento(rota, operador, movimento)
+    movida = list(rota)
+    movida[a : a + len(trecho)] = [int(bar) for bar in trecho]
+    return movida
+
+
+@pytest.mark.parametrize("semente", range(3))
+def test_avaliacoes_compiladas_batem_com_avaliar_rota(instancia, bares_df, semente):
+    rotas = np.stack(
+        [np.random.default_rng(semente * 10 + k).permutation(instancia.n) for k in range(4)]
+    )
+    lote = avaliar_rotas_lote(
+        rotas, instancia, HORA_INICIAL, HORA_FINAL, TEMPO_VISITA, ALPHA, BETA
+    )
+    for rota, custo_lote in zip(rotas.tolist(), lote.tolist()):
+        referencia = avaliar_rota(
+            rota, instancia.tempos, bares_df, HORA_INICIAL, HORA_FINAL, TEMPO_VISITA, ALPHA, BETA
+        )
+        assert avaliar(rota, instancia) == pytest.approx(referencia, abs=1e-9)
+        assert custo_lote == pytest.approx(referencia, abs=1e-9)
+
+
+@pytest.mark.parametrize("semente", range(3))
+def test_deltas_2opt(instancia, semente):
+    rota = np.random.default_rng(semente).permutation(instancia.n).tolist()
+    avaliador = avaliador_para(instancia, rota)
+    custo = avaliar(rota, instancia)
+    assert avaliador.custo == pytest.approx(custo, abs=1e-9)
+
+    movimentos = 0
+    for i, j, delta in avaliador.deltas_2opt():
+        movida = inverter(rota, i, j)
+        assert delta == pytest.approx(avaliar(movida, instancia) - custo, abs=1e-6)
+        assert avaliador.delta_2opt(i, j) == pytest.approx(delta, abs=1e-6)
+        movimentos += 1
+    assert movimentos == (instancia.n - 1) * (instancia.n - 2) // 2
+
+
+@pytest.mark.parametrize("operador", OPERADORES)
+@pytest.mark.parametrize("semente", range(3))
+def test_deltas_dos_operadores(instancia, operador, semente):
+    rota = np.random.default_rng(semente).permutation(instancia.n).tolist()
+    avaliador = avaliador_para(instancia, rota)
+    custo = avaliar(rota, instancia)
+
+    movimentos, deltas, fins = deltas_operador(avaliador, operador, com_fim=True)
+    assert len(movimentos)
+    for movimento, delta, fim in zip(movimentos, deltas.tolist(), fins.tolist()):
+        movida = rota_movida(rota, operador, movimento)
+        assert sorted(movida) == sorted(rota)
+        assert movida[0] == rota[0]
+        assert delta == pytest.approx(avaliar(movida, instancia) - custo, abs=1e-6)
+        assert fim == relogio_final(movida, instancia)
+
+
+@pytest.mark.parametrize("operador", OPERADORES_ORIENTACAO)
+def test_deltas_de_adicao_e_remocao(instancia, operador):
+    rota = np.random.default_rng(7).permutation(instancia.n)[:6].tolist()
+    avaliador = avaliador_para(instancia, rota, orientacao=True)
+    custo = avaliar(rota, instancia)
+    limite = _limite_us(HORA_INICIAL, HORA_FINAL)
+
+    movimentos, deltas, fins = deltas_operador(avaliador, operador, com_fim=True)
+    assert len(movimentos)
+    for movimento, delta, fim in zip(movimentos, deltas.tolist(), fins.tolist()):
+        movida = rota_movida(rota, operador, movimento)
+        assert delta == pytest.approx(avaliar(movida, instancia) - custo, abs=1e-6)
+        assert fim == relogio_final(movida, instancia)
+        # no modo orientação, a rota movida só é viável se couber no período
+        viavel = np.isfinite(avaliar(movida, instancia, orientacao=True))
+        assert viavel == (fim <= limite)
+
+
+def test_custo_exato_depois_de_aplicar_movimentos(instancia):
+    rng = np.random.default_rng(3)
+    rota = rng.permutation(instancia.n).tolist()
+    avaliador = avaliador_para(instancia, rota)
+    for passo in range(30):
+        operador = OPERADORES[passo % len(OPERADORES)]
+        movimentos, deltas = deltas_operador(avaliador, operador)
+        k = int(rng.integers(len(movimentos)))
+        esperado = avaliador.custo + deltas[k]
+        aplicar_movimento(avaliador, operador, movimentos[k])
+        assert avaliador.custo == pytest.approx(esperado, abs=1e-6)
+        assert avaliador.custo == avaliar(avaliador.rota.tolist(), instancia)
+
+
+def test_matriz_2opt_igual_aos_deltas_escalares(instancia):
+    rota = np.random.default_rng(5).permutation(instancia.n).tolist()
+    avaliador = avaliador_para(instancia, rota)
+    matriz = avaliador.matriz_deltas_2opt()
+    for i, j, delta in avaliador.deltas_2opt():
+        assert matriz[i, j] == pytest.approx(delta, abs=1e-6)
+    # blocos menores dão a mesma matriz
+    assert np.allclose(avaliador.matriz_deltas_2opt(max_elementos=50), matriz)
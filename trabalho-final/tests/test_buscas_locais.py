@@ -0,0 +1,199 @@
+"""
+Memórias tabu por arestas (fixa, reativa e de frequência), conjunto de elite,
+religamento de caminhos e Lin–Kernighan: custos mantidos pelos avaliadores
+contra reavaliação completa e ótimos por força bruta em instâncias pequenas.
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+from conftest import ALPHA, BETA, HORA_FINAL, HORA_INICIAL, TEMPO_VISITA, tempos_sinteticos
+
+from utils.aco_classico import calcular_custo_rota
+from utils.avalia_rota import avaliar_rota_instancia
+from utils.avaliacao_incremental import AvaliadorIncremental
+from utils.elite import ConjuntoElite
+from utils.lin_kernighan import AvaliadorCircuito, lin_kernighan
+from utils.memoria_tabu import MemoriaFrequencia, MemoriaTabu, MemoriaTabuReativa
+from utils.religamento import religar_caminho
+from utils.tabu_search import tabu_search, tabu_search_iter
+from utils.vizinhanca import vizinhos_mais_proximos
+
+
+def avaliar(rota, instancia, orientacao=False):
+    return avaliar_rota_instancia(
+        rota, instancia, HORA_INICIAL, HORA_FINAL, TEMPO_VISITA, ALPHA, BETA, orientacao
+    )
+
+
+def avaliador_para(instancia, rota, orientacao=False):
+    return AvaliadorIncremental(
+        instancia, rota, HORA_INICIAL, HORA_FINAL, TEMPO_VISITA, ALPHA, BETA, orientacao
+    )
+
+
+def test_memoria_tabu_proibe_arestas_nos_dois_sentidos_pela_duracao():
+    memoria = MemoriaTabu(5, duracao=3)
+    memoria.proibir([(1, 2), (3, 5)], iteracao=10)
+    assert memoria.eh_tabu([(2, 1)], 13)
+    assert not memoria.eh_tabu([(1, 2)], 14)
+    # o índice n é o fim da rota aberta e nunca é proibido
+    assert not memoria.eh_tabu([(3, 5)], 11)
+    mascara = memoria.mascara([(np.array([1, 0]), np.array([2, 4]))], 12)
+    assert mascara.tolist() == [True, False]
+
+
+def test_memoria_reativa_aumenta_com_ciclos_e_fica_nos_limites():
+    memoria = MemoriaTabuReativa(20, duracao=4)
+    duracoes = []
+    for iteracao in range(40):
+        memoria.registrar_rota(b"a" if iteracao % 2 else b"b", iteracao)
+        duracoes.append(memoria.duracao)
+    assert max(duracoes) > 4
+    assert all(memoria.duracao_min <= d <= memoria.duracao_max for d in duracoes)
+
+
+def test_memoria_frequencia_conta_arestas_relativas():
+    memoria = MemoriaFrequencia(4)
+    memoria.registrar([(0, 1), (1, 4)])
+    memoria.registrar([(1, 0)])
+    assert memoria.penalidade([(0, 1)]) == pytest.approx(1.0)
+    assert memoria.penalidades([(np.array([1, 2]), np.array([0, 3]))]).tolist() == [1.0, 0.0]
+
+
+@pytest.mark.parametrize("orientacao", [False, True])
+def test_tabu_reativa_com_religamento_devolve_custo_exato(instancia, orientacao):
+    rota, custo, _ = tabu_search(
+        list(range(instancia.n)),
+        None,
+        None,
+        HORA_INICIAL,
+        HORA_FINAL,
+        TEMPO_VISITA,
+        alpha=ALPHA,
+        beta=BETA,
+        max_iter=60,
+        verbose=False,
+        instancia=instancia,
+        operadores=("2opt", "oropt"),
+        fixar_inicio=True,
+        orientacao=orientacao,
+        tabu_reativo=True,
+        peso_frequencia=0.5,
+        elite=4,
+        religamento=True,
+        rng=np.random.default_rng(0),
+    )
+    assert rota[0] == 0
+    assert custo == pytest.approx(avaliar(rota.tolist(), instancia, orientacao))
+
+
+def test_religamento_caminha_por_rotas_intermediarias_exatas(instancia):
+    rng = np.random.default_rng(4)
+    origem = rng.permutation(instancia.n).tolist()
+    # os operadores nunca tiram o primeiro bar do lugar
+    guia = origem[:1] + rng.permutation(origem[1:]).tolist()
+    avaliador = avaliador_para(instancia, origem)
+    melhor, custo = religar_caminho(avaliador, guia)
+    # o caminho chega ao guia, e o avaliador acompanha o custo exato
+    assert avaliador.rota.tolist() == guia
+    assert avaliador.custo == pytest.approx(avaliar(guia, instancia))
+    assert melhor is not None
+    assert melhor.tolist() not in (origem, guia)
+    assert custo == pytest.approx(avaliar(melhor.tolist(), instancia))
+
+
+def test_conjunto_elite_ordenado_e_sem_repetidas():
+    conjunto = ConjuntoElite(capacidade=3, distancia_min=1)
+    rotas = [[0, 1, 2, 3], [0, 2, 1, 3], [0, 3, 2, 1], [0, 1, 3, 2]]
+    for custo, rota in zip([5.0, 3.0, 4.0, 1.0], rotas):
+        conjunto.oferecer(rota, custo)
+    assert not conjunto.oferecer(rotas[3], 1.0)
+    assert conjunto.custos == [1.0, 3.0, 4.0]
+    assert conjunto.melhor()[0].tolist() == rotas[3]
+
+
+@pytest.mark.parametrize("busca_lk", [False, True])
+def test_tabu_com_todos_os_operadores_devolve_custo_exato(instancia, busca_lk):
+    rota, custo, _ = tabu_search(
+        list(range(instancia.n)),
+        None,
+        None,
+        HORA_INICIAL,
+        HORA_FINAL,
+        TEMPO_VISITA,
+        alpha=ALPHA,
+        beta=BETA,
+        max_iter=40,
+        usar_solucao_inicial_inteligente=False,
+        verbose=False,
+        instancia=instancia,
+        operadores=("2opt", "oropt", "swap", "insert"),
+        busca_lk=busca_lk,
+    )
+    assert sorted(list(rota)) == list(range(instancia.n))
+    assert custo == pytest.approx(avaliar(list(rota), instancia))
+
+
+def test_progresso_da_tabu_so_melhora_e_termina_no_resultado(instancia):
+    busca = tabu_search_iter(
+        list(range(instancia.n)),
+        None,
+        None,
+        HORA_INICIAL,
+        HORA_FINAL,
+        TEMPO_VISITA,
+        alpha=ALPHA,
+        beta=BETA,
+        max_iter=40,
+        verbose=False,
+        instancia=instancia,
+        indices_bares=list(range(2, instancia.n)),
+    )
+    progressos = []
+    while True:
+        try:
+            progressos.append(next(busca))
+        except StopIteration as fim:
+            rota, custo, _ = fim.value
+            break
+    custos = [p.custo for p in progressos]
+    assert custos == sorted(custos, reverse=True)
+    assert len(set(custos)) == len(custos)
+    # as rotas do progresso já vêm com os ids da instância completa
+    assert progressos[-1].rota.tolist() == rota.tolist()
+    assert custos[-1] == custo == pytest.approx(avaliar(rota.tolist(), instancia))
+
+
+def test_lin_kernighan_no_circuito_acompanha_o_custo():
+    matriz = tempos_sinteticos(8, semente=3)
+    rota = np.random.default_rng(1).permutation(8).tolist()
+    avaliador = AvaliadorCircuito(matriz, rota)
+    reducao = lin_kernighan(avaliador, vizinhos_mais_proximos(matriz, 8), matriz)
+    assert reducao >= 0
+    assert sorted(avaliador.rota.tolist()) == list(range(8))
+    assert avaliador.rota[0] == rota[0]
+    assert avaliador.custo == pytest.approx(calcular_custo_rota(avaliador.rota, matriz))
+
+    otimo = min(
+        calcular_custo_rota((rota[0],) + resto, matriz)
+        for resto in itertools.permutations([b for b in range(8) if b != rota[0]])
+    )
+    assert avaliador.custo >= otimo - 1e-9
+    # ótimo local do LK: nenhum 2-opt com listas completas melhora a rota
+    n = len(rota)
+    movimentos = [(i, j) for i in range(n - 1) for j in range(i + 1, n)]
+    assert min(delta for _, _, delta in avaliador.deltas_2opt(movimentos)) > -1e-9
+
+
+def test_lin_kernighan_no_objetivo_completo_acompanha_o_custo(instancia):
+    rota = np.random.default_rng(2).permutation(instancia.n).tolist()
+    avaliador = avaliador_para(instancia, rota)
+    custo_inicial = avaliador.custo
+    reducao = lin_kernighan(
+        avaliador, vizinhos_mais_proximos(instancia.tempos, 6), instancia.tempos, escala=ALPHA
+    )
+    assert reducao == pytest.approx(custo_inicial - avaliador.custo)
+    assert avaliador.rota[0] == rota[0]
+    assert avaliador.custo == pytest.approx(avaliar(avaliador.rota.tolist(), instancia))
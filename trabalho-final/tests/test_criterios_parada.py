@@ -0,0 +1,151 @@
+"""
+Critérios de parada combinados: cada limite para a busca sozinho e deixa
+o motivo registrado.
+"""
+
+import pytest
+from conftest import ALPHA, BETA, HORA_FINAL, HORA_INICIAL, TEMPO_VISITA
+
+from utils.avalia_rota import avaliar_rota_instancia
+from utils.criterios_parada import CriterioParada
+from utils.tabu_search import tabu_search
+
+
+def test_max_iter():
+    parada = CriterioParada(max_iter=3)
+    parada.iniciar(10.0)
+    for custo in (9.0, 8.0):
+        parada.registrar_iteracao(custo)
+        assert not parada.parar()
+    parada.registrar_iteracao(7.0)
+    assert parada.parar()
+    assert parada.motivo == "max_iter"
+    assert parada.descricao() == "Limite de 3 iterações atingido."
+
+
+def test_estagnacao_conta_iteracoes_seguidas_sem_melhoria():
+    parada = CriterioParada(max_iter_sem_melhoria=2)
+    parada.iniciar(10.0)
+    parada.registrar_iteracao(10.0)
+    assert not parada.parar()
+    # uma melhoria zera a contagem
+    parada.registrar_iteracao(9.0)
+    assert parada.iteracoes_sem_melhoria == 0
+    parada.registrar_iteracao(9.0)
+    assert not parada.parar()
+    parada.registrar_iteracao(9.5)
+    assert parada.parar()
+    assert parada.motivo == "estagnacao"
+    assert parada.descricao() == "Sem melhoria por 2 iterações."
+
+
+def test_max_avaliacoes():
+    parada = CriterioParada(max_avaliacoes=10)
+    parada.registrar_avaliacoes(9)
+    assert not parada.parar()
+    parada.registrar_avaliacoes()
+    assert parada.parar()
+    assert parada.motivo == "avaliacoes"
+    assert parada.descricao() == "Limite de 10 avaliações atingido."
+
+
+def test_custo_alvo_vale_para_qualquer_solucao_registrada():
+    parada = CriterioParada(custo_alvo=5.0)
+    parada.iniciar(8.0)
+    assert not parada.parar()
+    parada.registrar_custo(5.0)
+    assert parada.parar()
+    assert parada.motivo == "custo_alvo"
+    assert parada.descricao() == "Custo alvo 5.00 atingido."
+
+
+def test_interromper_tem_prioridade():
+    sinal = []
+    parada = CriterioParada(max_iter=100, interromper=lambda: bool(sinal))
+    assert not parada.parar()
+    sinal.append(True)
+    assert parada.parar()
+    assert parada.motivo == "interrompida"
+    assert parada.descricao() == "Busca interrompida."
+
+
+def test_tempo_limite():
+    assert not CriterioParada(tempo_limite_ms=60_000).parar()
+    parada = CriterioParada(tempo_limite_ms=0)
+    assert parada.parar()
+    assert parada.motivo == "tempo"
+    assert parada.descricao() == "Tempo limite de 0 ms esgotado."
+
+
+def test_sem_limites_nunca_para():
+    parada = CriterioParada()
+    for _ in range(50):
+        parada.registrar_iteracao(1.0)
+    assert not parada.parar()
+    assert parada.motivo is None
+    assert parada.descricao() == "Busca em andamento."
+
+
+def test_derivar_herda_o_prazo_e_as_avaliacoes_que_restam():
+    interromper = lambda: False  # noqa: E731
+    pai = CriterioParada(
+        max_iter=100,
+        tempo_limite_ms=60_000,
+        max_avaliacoes=50,
+        custo_alvo=3.0,
+        interromper=interromper,
+    )
+    pai.registrar_avaliacoes(20)
+    filho = pai.derivar(max_iter_sem_melhoria=5)
+    # o prazo é o mesmo do pai: o filho só tem o que resta dele
+    assert filho.tempo_limite_ms < pai.tempo_limite_ms
+    prazo_pai = pai.inicio + pai.tempo_limite_ms / 1000.0
+    prazo_filho = filho.inicio + filho.tempo_limite_ms / 1000.0
+    assert prazo_filho == pytest.approx(prazo_pai, abs=1e-3)
+    assert filho.max_avaliacoes == 30
+    assert filho.custo_alvo == 3.0
+    assert filho.interromper is interromper
+    assert filho.max_iter is None
+    assert filho.max_iter_sem_melhoria == 5
+
+    esgotado = CriterioParada(tempo_limite_ms=0).derivar()
+    assert esgotado.tempo_limite_ms == 0.0
+    assert esgotado.parar()
+    assert esgotado.motivo == "tempo"
+
+
+def test_recursos_esgotados_ignora_os_limites_de_iteracao():
+    parada = CriterioParada(max_iter=1, max_avaliacoes=5)
+    parada.registrar_iteracao(1.0)
+    assert parada.parar()
+    assert not parada.recursos_esgotados()
+    parada.registrar_avaliacoes(5)
+    assert parada.recursos_esgotados()
+    assert parada.motivo == "avaliacoes"
+
+
+def test_tabu_para_no_limite_de_avaliacoes_com_custo_exato(instancia):
+    parada = CriterioParada(max_avaliacoes=500)
+    rota, custo, historico = tabu_search(
+        list(range(instancia.n)),
+        None,
+        None,
+        HORA_INICIAL,
+        HORA_FINAL,
+        TEMPO_VISITA,
+        alpha=ALPHA,
+        beta=BETA,
+        max_iter=None,
+        max_iter_sem_melhoria=None,
+        usar_solucao_inicial_inteligente=False,
+        verbose=False,
+        instancia=instancia,
+        parada=parada,
+    )
+    assert parada.motivo == "avaliacoes"
+    assert len(historico["iteracao"]) > 0
+    assert custo == pytest.approx(
+        avaliar_rota_instancia(
+            list(rota), instancia, HORA_INICIAL, HORA_FINAL, TEMPO_VISITA, ALPHA, BETA
+        )
+    )
@@ -0,0 +1,97 @@
+"""
+Busca local iterada: perturbações, orçamento de tempo, religamento no nível
+do ILS e custo devolvido exato.
+"""
+
+import time
+
+import numpy as np
+import pytest
+from conftest import ALPHA, BETA, HORA_FINAL, HORA_INICIAL, TEMPO_VISITA
+
+from utils import ils
+from utils.avalia_rota import avaliar_rota_instancia
+
+
+def rodar_ils(instancia, **argumentos):
+    return ils.busca_local_iterada(
+        list(range(instancia.n)),
+        None,
+        None,
+        HORA_INICIAL,
+        HORA_FINAL,
+        TEMPO_VISITA,
+        alpha=ALPHA,
+        beta=BETA,
+        instancia=instancia,
+        semente=0,
+        verbose=False,
+        **argumentos,
+    )
+
+
+@pytest.mark.parametrize("perturbacao", [ils.double_bridge, ils.embaralhar_trechos])
+@pytest.mark.parametrize("primeiro", [0, 1])
+def test_perturbacoes_mantem_o_inicio_e_os_bares(perturbacao, primeiro):
+    rng = np.random.default_rng(0)
+    rota = list(range(10))
+    for _ in range(20):
+        perturbada = perturbacao(rota, rng, primeiro=primeiro)
+        assert perturbada[: primeiro + 1] == rota[: primeiro + 1]
+        assert sorted(perturbada) == rota
+
+
+@pytest.mark.parametrize("aceitacao", ils.ACEITACOES)
+def test_custo_devolvido_e_exato(instancia, aceitacao):
+    rota, custo, historico = rodar_ils(
+        instancia, max_perturbacoes=5, aceitacao=aceitacao, fixar_inicio=True
+    )
+    assert len(historico["perturbacao"]) == 5
+    assert rota[0] == 0
+    assert sorted(rota.tolist()) == list(range(instancia.n))
+    assert custo == pytest.approx(
+        avaliar_rota_instancia(
+            rota.tolist(), instancia, HORA_INICIAL, HORA_FINAL, TEMPO_VISITA, ALPHA, BETA
+        )
+    )
+
+
+def test_buscas_locais_rodam_sem_elite_nem_religamento(instancia, monkeypatch):
+    chamadas = []
+    tabu_search = ils.tabu_search
+
+    def espiao(*args, **kwargs):
+        chamadas.append((kwargs["elite"], kwargs["religamento"]))
+        return tabu_search(*args, **kwargs)
+
+    monkeypatch.setattr(ils, "tabu_search", espiao)
+    rota, custo, historico = rodar_ils(
+        instancia, max_perturbacoes=5, religamento=True, elite=5, tabu_reativo=True
+    )
+    assert len(historico["perturbacao"]) == 5
+    # a descida inicial, uma por rodada e uma por religamento bem-sucedido
+    assert len(chamadas) >= 6
+    assert set(chamadas) == {(None, False)}
+    assert custo == pytest.approx(
+        avaliar_rota_instancia(
+            rota.tolist(), instancia, HORA_INICIAL, HORA_FINAL, TEMPO_VISITA, ALPHA, BETA
+        )
+    )
+
+
+@pytest.mark.parametrize("religamento", [False, True])
+def test_respeita_orcamento_de_tempo(instancia, religamento):
+    inicio = time.perf_counter()
+    _, custo, historico = rodar_ils(
+        instancia,
+        max_perturbacoes=None,
+        tempo_limite_ms=200,
+        religamento=religamento,
+        orientacao=True,
+        fixar_inicio=True,
+    )
+    decorrido_ms = (time.perf_counter() - inicio) * 1000.0
+    assert decorrido_ms < 200 + 150
+    assert len(historico["perturbacao"]) > 0
+    assert np.isfinite(custo)
+    assert historico["custo_melhor"] == sorted(historico["custo_melhor"], reverse=True)
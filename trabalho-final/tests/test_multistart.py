@@ -0,0 +1,51 @@
+"""
+Multistart: partidas reproduzíveis pela semente, com o primeiro bar fixo
+quando pedido e custos exatos.
+"""
+
+import pytest
+from conftest import ALPHA, BETA, HORA_FINAL, HORA_INICIAL, TEMPO_VISITA
+
+from utils.avalia_rota import avaliar_rota_instancia
+from utils.multistart import tabu_search_multistart
+
+
+def rodar_multistart(instancia, workers, **argumentos):
+    return tabu_search_multistart(
+        [3] + [bar for bar in range(instancia.n) if bar != 3],
+        None,
+        None,
+        HORA_INICIAL,
+        HORA_FINAL,
+        TEMPO_VISITA,
+        n_starts=4,
+        workers=workers,
+        semente=11,
+        instancia=instancia,
+        alpha=ALPHA,
+        beta=BETA,
+        max_iter=15,
+        verbose=False,
+        **argumentos,
+    )
+
+
+def test_mesma_semente_mesmo_resultado_com_qualquer_numero_de_processos(instancia):
+    _, custo_1, estatisticas_1 = rodar_multistart(instancia, workers=1)
+    _, custo_2, estatisticas_2 = rodar_multistart(instancia, workers=2)
+    assert custo_1 == custo_2
+    assert [e["rota"] for e in estatisticas_1] == [e["rota"] for e in estatisticas_2]
+
+
+def test_reinicios_aleatorios_mantem_o_primeiro_bar(instancia):
+    rota, custo, estatisticas = rodar_multistart(instancia, workers=1, fixar_inicio=True)
+    assert [e["tipo"] for e in estatisticas] == ["nn", "aleatoria", "aleatoria", "aleatoria"]
+    assert all(e["rota"][0] == 3 for e in estatisticas)
+    # cada reinício aleatório embaralha a rota com o próprio gerador
+    aleatorias = [tuple(e["rota"]) for e in estatisticas if e["tipo"] == "aleatoria"]
+    assert len(set(aleatorias)) > 1
+    assert custo == pytest.approx(
+        avaliar_rota_instancia(
+            rota.tolist(), instancia, HORA_INICIAL, HORA_FINAL, TEMPO_VISITA, ALPHA, BETA
+        )
+    )
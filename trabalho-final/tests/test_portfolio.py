@@ -0,0 +1,81 @@
+"""
+Portfólio: publicação das melhorias durante a busca, custo alvo e o caso
+sem nenhuma rota viável.
+"""
+
+import time
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from conftest import ALPHA, BETA, HORA_FINAL, HORA_INICIAL, TEMPO_VISITA
+
+from utils.avalia_rota import avaliar_rota_instancia
+from utils.portfolio import MOTORES, portfolio
+
+
+def rodar_portfolio(instancia, hora_final=HORA_FINAL, **argumentos):
+    return portfolio(
+        list(range(instancia.n)),
+        None,
+        None,
+        HORA_INICIAL,
+        hora_final,
+        TEMPO_VISITA,
+        alpha=ALPHA,
+        beta=BETA,
+        instancia=instancia,
+        semente=0,
+        verbose=False,
+        **argumentos,
+    )
+
+
+def test_devolve_a_melhor_rota_com_custo_exato(instancia):
+    rota, custo, estatisticas = rodar_portfolio(
+        instancia, tempo_limite_ms=500, orientacao=True, fixar_inicio=True
+    )
+    assert [e["motor"] for e in estatisticas] == list(MOTORES)
+    assert custo == min(e["custo"] for e in estatisticas)
+    assert rota[0] == 0
+    assert custo == pytest.approx(
+        avaliar_rota_instancia(
+            rota.tolist(), instancia, HORA_INICIAL, HORA_FINAL, TEMPO_VISITA,
+            ALPHA, BETA, True,
+        )
+    )
+
+
+def test_custo_alvo_publicado_durante_a_busca_cancela_os_motores(instancia):
+    # a Tabu clássica não conhece o custo alvo e, sozinha, rodaria até o
+    # prazo; publicando a solução inicial já cancela a busca
+    inicio = time.perf_counter()
+    _, custo, estatisticas = rodar_portfolio(
+        instancia,
+        motores=("tabu_classico",),
+        tempo_limite_ms=20000,
+        custo_alvo=1e9,
+        tabu_classico_iteracoes=10**9,
+    )
+    assert time.perf_counter() - inicio < 10.0
+    assert custo <= 1e9
+    assert estatisticas[0]["motivo_parada"] == "interrompida"
+
+
+def test_sem_rota_viavel_devolve_a_do_primeiro_motor(instancia):
+    # nem o bar inicial cabe num período que acaba antes de começar
+    rota, custo, estatisticas = rodar_portfolio(
+        instancia,
+        hora_final=HORA_INICIAL - timedelta(hours=1),
+        tempo_limite_ms=300,
+        orientacao=True,
+        fixar_inicio=True,
+    )
+    assert all(not np.isfinite(e["custo"]) for e in estatisticas)
+    assert not np.isfinite(custo)
+    assert rota.tolist() == estatisticas[0]["rota"]
+
+
+def test_exige_pelo_menos_um_motor(instancia):
+    with pytest.raises(ValueError):
+        rodar_portfolio(instancia, motores=())
@@ -4,6 +4,17 @@ import pandas as pd
 import numpy as np
 from math import exp
 
+try:
+    from .criterios_parada import CriterioParada
+    from .lin_kernighan import AvaliadorCircuito, lin_kernighan
+    from .rota import Route
+    from .vizinhanca import vizinhos_mais_proximos
+except Exception:
+    from criterios_parada import CriterioParada
+    from lin_kernighan import AvaliadorCircuito, lin_kernighan
+    from rota import Route
+    from vizinhanca import vizinhos_mais_proximos
+
 def carregar_dados():
     try:
         bares_df = pd.read_csv("data/bares.csv")
@@ -17,19 +28,19 @@ def carregar_dados():
     return bares_df, distancias, tempos
 
 def calcular_custo_rota(rota, matriz_distancias):
-    custo_total = 0
-    for i in range(len(rota) - 1):
-        origem = rota[i]
-        destino = rota[i + 1]
-        custo_total += matriz_distancias[origem][destino]
-    
-    custo_total += matriz_distancias[rota[-1]][rota[0]]
-    
-    return custo_total
+    bares = np.asarray(rota)
+    matriz = np.asarray(matriz_distancias)
+    # circuito fechado: a última aresta volta ao início
+    return float(matriz[bares, np.roll(bares, -1)].sum())
+
+# formiga que deposita feromônio no MaxMinAS
+DEPOSITOS_MMAS = ("iteracao", "global")
+
 
 class ACO:
     def __init__(self, matriz_distancias, num_formigas, num_iteracoes, alpha=1.0, beta=2.0, 
-                 evaporacao=0.5, Q=100, elite_weight=2.0):
+                 evaporacao=0.5, Q=100, elite_weight=2.0, busca_local=False,
+                 vizinhos_candidatos=8, semente=None, candidatos_construcao=None):
         self.matriz_distancias = np.array(matriz_distancias)
         self.num_cidades = len(matriz_distancias)
         self.num_formigas = num_formigas
@@ -39,113 +50,213 @@ class ACO:
         self.evaporacao = evaporacao
         self.Q = Q
         self.elite_weight = elite_weight
+        # sem semente, o gerador é semeado pelo módulo random: random.seed()
+        # continua reproduzindo as execuções
+        self.rng = np.random.default_rng(random.getrandbits(64) if semente is None else semente)
+
+        # busca local: cada formiga é melhorada por cadeias Lin–Kernighan
+        # (listas candidatas de `vizinhos_candidatos` bares) antes de depositar
+        self.busca_local = busca_local
+        if busca_local:
+            self._matriz_lista = self.matriz_distancias.tolist()
+            self._candidatos = vizinhos_mais_proximos(self.matriz_distancias, vizinhos_candidatos)
 
         self.feromonios = np.ones((self.num_cidades, self.num_cidades)) * 0.1
         
+        # visibilidade 1/d; zero na diagonal e entre bares à distância zero
+        positivas = self.matriz_distancias > 0
+        np.fill_diagonal(positivas, False)
         self.visibilidade = np.zeros((self.num_cidades, self.num_cidades))
-        for i in range(self.num_cidades):
-            for j in range(self.num_cidades):
-                if i != j and self.matriz_distancias[i][j] > 0:
-                    self.visibilidade[i][j] = 1.0 / self.matriz_distancias[i][j]
+        self.visibilidade[positivas] = 1.0 / self.matriz_distancias[positivas]
+
+        # construção por listas candidatas: cada passo só sorteia entre os
+        # `candidatos_construcao` bares mais próximos do atual (O(n·k) por formiga)
+        self.candidatos_construcao = None
+        if candidatos_construcao:
+            self.candidatos_construcao = np.array(
+                vizinhos_mais_proximos(self.matriz_distancias, candidatos_construcao),
+                dtype=np.intp,
+            )
         
         self.melhor_rota_global = None
         self.melhor_custo_global = float('inf')
         self.historico_custos = []
     
-    def calcular_probabilidades(self, cidade_atual, cidades_nao_visitadas):
-        probabilidades = []
-        denominador = 0
-    
-        for cidade in cidades_nao_visitadas:
-            feromonio = self.feromonios[cidade_atual][cidade] ** self.alpha
-            visibilidade = self.visibilidade[cidade_atual][cidade] ** self.beta
-            denominador += feromonio * visibilidade
-        
-        if denominador == 0:
-            return [1.0 / len(cidades_nao_visitadas)] * len(cidades_nao_visitadas)
-        
-        for cidade in cidades_nao_visitadas:
-            feromonio = self.feromonios[cidade_atual][cidade] ** self.alpha
-            visibilidade = self.visibilidade[cidade_atual][cidade] ** self.beta
-            prob = (feromonio * visibilidade) / denominador
-            probabilidades.append(prob)
-        
-        return probabilidades
-    
-    def escolher_proxima_cidade(self, cidade_atual, cidades_nao_visitadas):
-        if not cidades_nao_visitadas:
-            return None
-        
-        probabilidades = self.calcular_probabilidades(cidade_atual, cidades_nao_visitadas)
-        
-        rand = random.random()
-        probabilidade_acumulada = 0
-        
-        for i, prob in enumerate(probabilidades):
-            probabilidade_acumulada += prob
-            if rand <= probabilidade_acumulada:
-                return cidades_nao_visitadas[i]
-        
-        return cidades_nao_visitadas[-1]
-    
+    def matriz_escolha(self):
+        """Informação de escolha tau^alpha * eta^beta de cada aresta. Só muda
+        quando o feromônio muda, então é calculada uma vez por iteração."""
+        return self.feromonios ** self.alpha * self.visibilidade ** self.beta
+
+    def escolha_candidatos(self):
+        """tau^alpha * eta^beta só nas arestas das listas candidatas: matriz
+        (n, k) alinhada com `candidatos_construcao`."""
+        linhas = np.arange(self.num_cidades)[:, None]
+        candidatos = self.candidatos_construcao
+        return (self.feromonios[linhas, candidatos] ** self.alpha
+                * self.visibilidade[linhas, candidatos] ** self.beta)
+
+    def construir_rotas(self, cidade_inicial, quantidade, escolha=None):
+        """Constrói `quantidade` rotas em paralelo (matriz (quantidade, n)).
+
+        A cada passo todas as formigas escolhem a próxima cidade juntas: a
+        linha da cidade atual em `escolha`, zerada nas cidades já visitadas
+        (uma máscara booleana por formiga), vira uma soma acumulada, e um
+        único searchsorted sobre as somas de todas as formigas (normalizadas
+        e deslocadas pelo número da formiga) faz os sorteios. Se nenhuma
+        cidade restante tem peso, o sorteio é uniforme entre elas.
+
+        Com `candidatos_construcao`, o sorteio fica restrito aos vizinhos
+        candidatos ainda não visitados da cidade atual (somas de k elementos
+        em vez de n); a formiga cujos candidatos acabaram vai para a cidade
+        restante de maior tau^alpha * eta^beta.
+        """
+        if self.candidatos_construcao is not None:
+            return self._construir_rotas_candidatos(cidade_inicial, quantidade)
+        if escolha is None:
+            escolha = self.matriz_escolha()
+        n = self.num_cidades
+        formigas = np.arange(quantidade)
+        rotas = np.empty((quantidade, n), dtype=np.int32)
+        rotas[:, 0] = cidade_inicial
+        nao_visitadas = np.ones((quantidade, n), dtype=bool)
+        nao_visitadas[:, cidade_inicial] = False
+        atuais = rotas[:, 0]
+
+        for posicao in range(1, n):
+            acumulado = np.cumsum(escolha[atuais] * nao_visitadas, axis=1)
+            totais = acumulado[:, -1]
+            sem_peso = totais <= 0
+            if sem_peso.any():
+                acumulado[sem_peso] = np.cumsum(nao_visitadas[sem_peso], axis=1)
+                totais = acumulado[:, -1]
+            # a linha da formiga f ocupa o intervalo (f, f + 1]
+            acumulado /= totais[:, None]
+            acumulado += formigas[:, None]
+            sorteios = self.rng.random(quantidade) + formigas
+            proximas = np.searchsorted(acumulado.ravel(), sorteios, side="right") - formigas * n
+            proximas = np.minimum(proximas, n - 1)
+            rotas[:, posicao] = proximas
+            nao_visitadas[formigas, proximas] = False
+            atuais = proximas
+
+        return rotas
+
+    def _construir_rotas_candidatos(self, cidade_inicial, quantidade):
+        n = self.num_cidades
+        candidatos = self.candidatos_construcao
+        k = candidatos.shape[1]
+        escolha = self.escolha_candidatos()
+        formigas = np.arange(quantidade)
+        rotas = np.empty((quantidade, n), dtype=np.int32)
+        rotas[:, 0] = cidade_inicial
+        nao_visitadas = np.ones((quantidade, n), dtype=bool)
+        nao_visitadas[:, cidade_inicial] = False
+        atuais = rotas[:, 0].astype(np.intp)
+
+        for posicao in range(1, n):
+            opcoes = candidatos[atuais]
+            acumulado = np.cumsum(escolha[atuais] * nao_visitadas[formigas[:, None], opcoes], axis=1)
+            totais = acumulado[:, -1]
+            com_opcao = totais > 0
+            totais = np.where(com_opcao, totais, 1.0)
+            acumulado /= totais[:, None]
+            acumulado += formigas[:, None]
+            sorteios = self.rng.random(quantidade) + formigas
+            colunas = np.searchsorted(acumulado.ravel(), sorteios, side="right") - formigas * k
+            proximas = opcoes[formigas, np.minimum(colunas, k - 1)]
+
+            # lista esgotada: a melhor cidade restante, fora da lista
+            for formiga in np.flatnonzero(~com_opcao).tolist():
+                atual = atuais[formiga]
+                pontuacao = self.feromonios[atual] ** self.alpha * self.visibilidade[atual] ** self.beta
+                proximas[formiga] = int(np.argmax(np.where(nao_visitadas[formiga], pontuacao, -1.0)))
+
+            rotas[:, posicao] = proximas
+            nao_visitadas[formigas, proximas] = False
+            atuais = proximas
+
+        return rotas
+
     def construir_rota(self, cidade_inicial):
-        rota = [cidade_inicial]
-        cidades_nao_visitadas = list(range(self.num_cidades))
-        cidades_nao_visitadas.remove(cidade_inicial)
-        
-        cidade_atual = cidade_inicial
-        
-        while cidades_nao_visitadas:
-            proxima_cidade = self.escolher_proxima_cidade(cidade_atual, cidades_nao_visitadas)
-            rota.append(proxima_cidade)
-            cidades_nao_visitadas.remove(proxima_cidade)
-            cidade_atual = proxima_cidade
-        
-        return rota
+        return Route(self.construir_rotas(cidade_inicial, 1)[0], self.num_cidades)
     
+    def depositar(self, rotas, quantidades):
+        """Soma quantidades[k] nas arestas do circuito da rota k, nos dois
+        sentidos (a matriz é simétrica). Um np.add.at sobre os índices de
+        todas as arestas de todas as rotas, que acumula arestas repetidas
+        entre rotas."""
+        rotas = np.stack([np.asarray(rota) for rota in rotas])
+        origens = rotas.ravel()
+        destinos = np.roll(rotas, -1, axis=1).ravel()  # Volta ao início
+        valores = np.repeat(np.asarray(quantidades, dtype=np.float64), rotas.shape[1])
+        np.add.at(self.feromonios, (origens, destinos), valores)
+        np.add.at(self.feromonios, (destinos, origens), valores)
+
     def atualizar_feromonios(self, rotas_formigas, custos_formigas):
         self.feromonios *= (1 - self.evaporacao)
+        self.depositar(rotas_formigas, self.Q / np.asarray(custos_formigas, dtype=np.float64))
 
-        for i, rota in enumerate(rotas_formigas):
-            custo = custos_formigas[i]
-            deposicao = self.Q / custo
-
-            for j in range(len(rota)):
-                cidade_origem = rota[j]
-                cidade_destino = rota[(j + 1) % len(rota)]  # Volta ao início
-                self.feromonios[cidade_origem][cidade_destino] += deposicao
-                self.feromonios[cidade_destino][cidade_origem] += deposicao  # Matriz simétrica
-        
         if self.melhor_rota_global is not None:
             deposicao_elite = self.elite_weight * self.Q / self.melhor_custo_global
-            rota = self.melhor_rota_global
-            
-            for j in range(len(rota)):
-                cidade_origem = rota[j]
-                cidade_destino = rota[(j + 1) % len(rota)]
-                self.feromonios[cidade_origem][cidade_destino] += deposicao_elite
-                self.feromonios[cidade_destino][cidade_origem] += deposicao_elite
+            self.depositar([self.melhor_rota_global], [deposicao_elite])
     
-    def executar(self, cidade_inicial=0):
+    def executar_iter(self, cidade_inicial=0, tempo_limite_ms=None, max_avaliacoes=None,
+                      custo_alvo=None, max_iter_sem_melhoria=None, parada=None):
+        """Roda a colônia até o primeiro critério de parada (CriterioParada):
+        `num_iteracoes`, tempo limite em ms, número de rotas avaliadas, custo
+        alvo ou iterações sem melhoria. Os limites de tempo, avaliações e custo
+        são verificados a cada formiga; uma iteração interrompida no meio não
+        deposita feromônio. Devolve sempre a melhor rota encontrada até ali
+        (pelo menos uma formiga é construída).
+
+        Com `busca_local=True`, a rota de cada formiga passa por lin_kernighan
+        antes de ser avaliada, e é a rota melhorada que deposita feromônio.
+
+        Gerador: a cada nova melhor rota produz um Progresso
+        (criterios_parada.py) com a rota, o custo, as iterações concluídas e o
+        tempo decorrido; o retorno (StopIteration.value) é o de executar."""
+        if parada is None:
+            parada = CriterioParada(
+                max_iter=self.num_iteracoes,
+                max_iter_sem_melhoria=max_iter_sem_melhoria,
+                tempo_limite_ms=tempo_limite_ms,
+                max_avaliacoes=max_avaliacoes,
+                custo_alvo=custo_alvo,
+            )
+
         print(f"Iniciando ACO com {self.num_formigas} formigas, {self.num_iteracoes} iterações")
         print(f"Parâmetros: α={self.alpha}, β={self.beta}, ρ={self.evaporacao}")
         
-        for iteracao in range(self.num_iteracoes):
+        iteracao = 0
+        while self.melhor_rota_global is None or not parada.parar():
             rotas_formigas = []
             custos_formigas = []
+            construidas = self.construir_rotas(cidade_inicial, self.num_formigas)
             
             for formiga in range(self.num_formigas):
-                rota = self.construir_rota(cidade_inicial)
+                if self.melhor_rota_global is not None and parada.parar():
+                    break
+                rota = Route(construidas[formiga], self.num_cidades)
+                if self.busca_local:
+                    avaliador = AvaliadorCircuito(self._matriz_lista, rota)
+                    lin_kernighan(avaliador, self._candidatos, self._matriz_lista, parada=parada)
+                    rota = avaliador.rota
                 custo = calcular_custo_rota(rota, self.matriz_distancias)
+                parada.registrar_avaliacoes()
+                parada.registrar_custo(custo)
                 
                 rotas_formigas.append(rota)
                 custos_formigas.append(custo)
                 
                 if custo < self.melhor_custo_global:
                     self.melhor_custo_global = custo
-                    self.melhor_rota_global = rota[:]
+                    self.melhor_rota_global = rota.copia()
                     print(f"Iteração {iteracao}, Formiga {formiga}: Nova melhor solução! Custo = {custo:.2f}")
+                    yield parada.progresso(self.melhor_rota_global, custo)
             
+            if len(rotas_formigas) < self.num_formigas:
+                break
+
             self.atualizar_feromonios(rotas_formigas, custos_formigas)
             
             melhor_custo_iteracao = min(custos_formigas)
@@ -160,9 +271,93 @@ class ACO:
             if iteracao % 50 == 0:
                 print(f"Iteração {iteracao}: Melhor da iteração = {melhor_custo_iteracao:.2f}, "
                       f"Melhor global = {self.melhor_custo_global:.2f}")
+
+            parada.registrar_iteracao(self.melhor_custo_global)
+            iteracao += 1
         
+        print(f"{parada.descricao()} Parando após {iteracao} iterações.")
         return self.melhor_rota_global, self.melhor_custo_global, self.historico_custos
 
+    def executar(self, *args, ao_melhorar=None, **kwargs):
+        """Roda executar_iter até o fim e devolve (melhor_rota, melhor_custo,
+        historico_custos). Os argumentos são os de executar_iter; `ao_melhorar`,
+        se dado, é chamada com (rota, custo) de cada Progresso, assim que ele
+        aparece."""
+        execucao = self.executar_iter(*args, **kwargs)
+        while True:
+            try:
+                progresso = next(execucao)
+            except StopIteration as fim:
+                return fim.value
+            if ao_melhorar is not None:
+                ao_melhorar(progresso.rota.copia(), progresso.custo)
+
+
+class MaxMinAS(ACO):
+    """MAX–MIN Ant System (Stützle e Hoos) sobre o mesmo motor do ACO.
+
+    Diferenças para o ACO elitista:
+     - só uma formiga deposita por iteração: a melhor da iteração
+       (`deposito="iteracao"`) ou a melhor global (`deposito="global"`);
+     - o feromônio fica preso em [tau_min, tau_max], com
+       tau_max = Q / (evaporacao * melhor custo global) e tau_min derivado de
+       `p_melhor` (probabilidade de a colônia convergida reconstruir a melhor
+       rota); os limites acompanham a melhor rota;
+     - o feromônio começa em tau_max (a partir da primeira iteração) e volta a
+       tau_max depois de `reinicio_sem_melhoria` iterações sem melhorar a
+       melhor rota global (estagnação).
+
+    Os demais argumentos são os do ACO; `elite_weight` não é usado.
+    """
+
+    def __init__(self, matriz_distancias, num_formigas, num_iteracoes, alpha=1.0, beta=3.0,
+                 evaporacao=0.2, Q=1.0, deposito="iteracao", p_melhor=0.05,
+                 reinicio_sem_melhoria=100, **kwargs):
+        if deposito not in DEPOSITOS_MMAS:
+            raise ValueError(f"Depósito desconhecido: {deposito}")
+        super().__init__(matriz_distancias, num_formigas, num_iteracoes, alpha=alpha,
+                         beta=beta, evaporacao=evaporacao, Q=Q, **kwargs)
+        self.deposito = deposito
+        self.p_melhor = p_melhor
+        self.reinicio_sem_melhoria = reinicio_sem_melhoria
+        self.tau_min = self.tau_max = None
+        self.reinicios = 0
+        self._iteracoes_sem_melhoria = 0
+        self._custo_referencia = float('inf')
+
+    def _atualizar_limites(self):
+        self.tau_max = self.Q / (self.evaporacao * self.melhor_custo_global)
+        n = self.num_cidades
+        raiz = self.p_melhor ** (1.0 / n)
+        # n / 2 - 1 é zero com n = 2 e fica abaixo de 1 com n = 3
+        self.tau_min = min(self.tau_max * (1 - raiz) / (max(n / 2 - 1, 1) * raiz), self.tau_max)
+
+    def atualizar_feromonios(self, rotas_formigas, custos_formigas):
+        primeira = self.tau_max is None
+        self._atualizar_limites()
+
+        if self.melhor_custo_global < self._custo_referencia:
+            self._custo_referencia = self.melhor_custo_global
+            self._iteracoes_sem_melhoria = 0
+        else:
+            self._iteracoes_sem_melhoria += 1
+
+        if primeira or self._iteracoes_sem_melhoria >= self.reinicio_sem_melhoria:
+            if not primeira:
+                self.reinicios += 1
+                self._iteracoes_sem_melhoria = 0
+            self.feromonios[:] = self.tau_max
+
+        self.feromonios *= (1 - self.evaporacao)
+        if self.deposito == "global":
+            rota, custo = self.melhor_rota_global, self.melhor_custo_global
+        else:
+            melhor = int(np.argmin(custos_formigas))
+            rota, custo = rotas_formigas[melhor], custos_formigas[melhor]
+        self.depositar([rota], [self.Q / custo])
+        np.clip(self.feromonios, self.tau_min, self.tau_max, out=self.feromonios)
+
+
 def imprimir_resultado(melhor_rota, melhor_custo, bares_df, historico_custos):
     print("RESULTADO DO ALGORITMO DE COLÔNIA DE FORMIGAS (ACO)")
     print("="*50)
@@ -0,0 +1,320 @@
+"""
+Modelo de ilhas para o ACO do itinerário (aco_itinerario.py).
+
+Várias colônias correm em paralelo, uma por processo, cada uma com seus
+próprios alpha_feromonio, beta_heuristica e evaporacao (CONFIGURACOES_ILHAS),
+sobre a mesma instância e com o mesmo prazo. As ilhas formam um anel: a cada
+`intervalo_migracao` iterações, a ilha i publica sua melhor rota e recebe algo
+da ilha i - 1:
+
+- `migracao="rotas"`: a melhor rota da vizinha deposita feromônio na ilha e
+  vira a melhor rota dela, se for melhor;
+- `migracao="feromonio"`: a matriz de feromônio da ilha é misturada com a da
+  vizinha, tau <- (1 - peso_mistura) * tau + peso_mistura * tau_vizinha, e
+  volta aos limites [tau_min, tau_max] da ilha.
+
+As matrizes de feromônio de todas as ilhas ficam num único bloco de
+multiprocessing.shared_memory (ilhas, n, n), e cada colônia trabalha direto na
+sua fatia: a mistura lê a matriz da vizinha sem serializar nada. A leitura
+não usa lock; ela pode pegar a vizinha no meio de uma atualização, o que só
+mistura dois estados válidos do feromônio. As melhores rotas publicadas ficam
+num mural em memória compartilhada, protegido por um lock, como no portfólio.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+try:
+    from .aco_itinerario import aco_itinerario
+    from .avalia_rota import ProblemInstance
+    from .criterios_parada import CriterioParada
+    from .rota import Route
+except Exception:
+    from aco_itinerario import aco_itinerario
+    from avalia_rota import ProblemInstance
+    from criterios_parada import CriterioParada
+    from rota import Route
+
+
+MIGRACOES = ("rotas", "feromonio")
+
+# uma configuração por ilha (em ciclo, se houver mais ilhas): a primeira é a
+# padrão de aco_itinerario; as outras exploram mais (beta e rho menores) ou
+# seguem mais de perto a heurística e o feromônio recente
+CONFIGURACOES_ILHAS = (
+    {"alpha_feromonio": 1.0, "beta_heuristica": 4.0, "evaporacao": 0.1},
+    {"alpha_feromonio": 1.0, "beta_heuristica": 2.0, "evaporacao": 0.05},
+    {"alpha_feromonio": 1.0, "beta_heuristica": 5.0, "evaporacao": 0.2},
+    {"alpha_feromonio": 2.0, "beta_heuristica": 3.0, "evaporacao": 0.1},
+)
+
+# estado do processo trabalhador, preenchido uma vez por _iniciar_trabalhador
+_estado = None
+
+
+class MuralIlhas:
+    """Melhor rota publicada por cada ilha, em memória compartilhada.
+
+    `publicar` só troca a rota da ilha se o custo for menor que o atual.
+    """
+
+    def __init__(self, ilhas, n, contexto):
+        self._n = max(n, 1)
+        self._lock = contexto.Lock()
+        self._custos = contexto.Array("d", [float("inf")] * ilhas, lock=False)
+        self._tamanhos = contexto.Array("i", ilhas, lock=False)
+        self._rotas = contexto.Array("i", ilhas * self._n, lock=False)
+        self.cancelar = contexto.Event()
+
+    def publicar(self, ilha, custo, rota):
+        with self._lock:
+            if custo < self._custos[ilha]:
+                inicio = ilha * self._n
+                self._custos[ilha] = custo
+                self._tamanhos[ilha] = len(rota)
+                self._rotas[inicio : inicio + len(rota)] = list(rota)
+                return True
+        return False
+
+    def ler(self, ilha):
+        """(custo, rota) publicados pela ilha, ou (inf, None)."""
+        with self._lock:
+            tamanho = self._tamanhos[ilha]
+            if not tamanho:
+                return float("inf"), None
+            inicio = ilha * self._n
+            return self._custos[ilha], self._rotas[inicio : inicio + tamanho]
+
+
+def _iniciar_trabalhador(estado, mural):
+    global _estado
+    memoria = shared_memory.SharedMemory(name=estado["memoria"])
+    n = estado["instancia"].n
+    _estado = dict(
+        estado,
+        mural=mural,
+        # a referência à memória mantém o mapeamento vivo no processo
+        _memoria=memoria,
+        feromonios=np.ndarray((estado["ilhas"], n, n), dtype=np.float64, buffer=memoria.buf),
+    )
+
+
+def _contexto_processos():
+    # fork compartilha a instância com os filhos sem serializá-la
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def _executar_ilha(ilha, configuracao, semente, prazo):
+    """Roda a colônia da ilha no processo trabalhador, com migrações em anel."""
+    estado = _estado
+    instancia = estado["instancia"]
+    mural = estado["mural"]
+    matrizes = estado["feromonios"]
+    vizinha = (ilha - 1) % estado["ilhas"]
+    rng = np.random.default_rng(semente)
+    migracoes = 0
+
+    def migrar(iteracao, colonia, melhor, melhor_custo):
+        nonlocal migracoes
+        if (iteracao + 1) % estado["intervalo_migracao"]:
+            return None
+        mural.publicar(ilha, melhor_custo, melhor.tolist())
+        migracoes += 1
+        if estado["migracao"] == "feromonio":
+            peso = estado["peso_mistura"]
+            colonia.feromonios *= 1 - peso
+            colonia.feromonios += peso * matrizes[vizinha]
+            colonia.limitar()
+            return None
+        custo, rota = mural.ler(vizinha)
+        if rota is None:
+            return None
+        colonia.depositar(rota)
+        colonia.limitar()
+        return rota, custo
+
+    parada = CriterioParada(
+        max_iter=estado["max_iter"],
+        tempo_limite_ms=max(0.0, (prazo - time.time()) * 1000.0),
+        custo_alvo=estado["custo_alvo"],
+        interromper=mural.cancelar.is_set,
+    )
+    inicio = time.perf_counter()
+    rota, custo, historico = aco_itinerario(
+        estado["rota_inicial"],
+        instancia.tempos,
+        None,
+        estado["hora_inicial"],
+        estado["hora_final"],
+        estado["tempo_visita"],
+        alpha=estado["alpha"],
+        beta=estado["beta"],
+        formigas=estado["formigas"],
+        parada=parada,
+        rng=rng,
+        verbose=False,
+        instancia=instancia,
+        fixar_inicio=estado["fixar_inicio"],
+        orientacao=estado["orientacao"],
+        feromonios=matrizes[ilha],
+        migracao=migrar,
+        **configuracao,
+    )
+    mural.publicar(ilha, custo, rota.tolist())
+    return {
+        "ilha": ilha,
+        "configuracao": configuracao,
+        "rota": rota.tolist(),
+        "custo": custo,
+        "iteracoes": len(historico["iteracao"]),
+        "migracoes": migracoes,
+        "tempo_s": time.perf_counter() - inicio,
+        "motivo_parada": parada.motivo,
+    }
+
+
+def aco_ilhas(
+    rota_inicial,
+    tempos,
+    bares,
+    hora_inicial,
+    hora_final,
+    tempo_visita,
+    alpha=1.0,
+    beta=20.0,
+    ilhas=None,
+    configuracoes=CONFIGURACOES_ILHAS,
+    migracao="rotas",
+    intervalo_migracao=10,
+    peso_mistura=0.1,
+    formigas=20,
+    max_iter=None,
+    tempo_limite_ms=2000,
+    custo_alvo=None,
+    semente=None,
+    instancia=None,
+    indices_bares=None,
+    fixar_inicio=False,
+    orientacao=False,
+    verbose=True,
+):
+    """Corre `ilhas` colônias (padrão: uma por núcleo, até o número de
+    `configuracoes`) em paralelo até o prazo `tempo_limite_ms` (contado desde
+    a chamada), `max_iter` iterações por ilha ou até alguma chegar a
+    `custo_alvo`, e devolve a melhor rota entre todas.
+
+    A ilha k usa configuracoes[k % len(configuracoes)] (argumentos de
+    ColoniaItinerario: alpha_feromonio, beta_heuristica, evaporacao...).
+    `migracao` ("rotas" ou "feromonio"), `intervalo_migracao` e
+    `peso_mistura` controlam as trocas entre ilhas vizinhas no anel. alpha,
+    beta, formigas, indices_bares, fixar_inicio e orientacao são os de
+    aco_itinerario, iguais em todas as ilhas. `semente` alimenta uma
+    SeedSequence com um filho por ilha.
+
+    Devolve (melhor_rota, melhor_custo, estatisticas), com um dicionário por
+    ilha: ilha, configuracao, rota, custo, iteracoes, migracoes, tempo_s e
+    motivo_parada.
+    """
+    prazo = time.time() + tempo_limite_ms / 1000.0
+    if migracao not in MIGRACOES:
+        raise ValueError(f"Migração desconhecida: {migracao}")
+    if ilhas is None:
+        ilhas = max(1, min(os.cpu_count() or 1, len(configuracoes)))
+
+    if instancia is None:
+        instancia = ProblemInstance(bares, tempos)
+
+    if indices_bares is not None:
+        indices_bares = np.asarray(indices_bares, dtype=np.intp)
+        locais = {bar: k for k, bar in enumerate(indices_bares.tolist())}
+        rota_inicial = [locais[bar] for bar in rota_inicial if bar in locais]
+        instancia_busca = instancia.subinstancia(indices_bares)
+    else:
+        instancia_busca = instancia
+
+    n = instancia_busca.n
+    configuracoes_ilhas = [dict(configuracoes[k % len(configuracoes)]) for k in range(ilhas)]
+    memoria = shared_memory.SharedMemory(create=True, size=max(ilhas * n * n, 1) * 8)
+    try:
+        # cada ilha começa com o feromônio em tau_max = 1 / evaporacao
+        matrizes = np.ndarray((ilhas, n, n), dtype=np.float64, buffer=memoria.buf)
+        for matriz, configuracao in zip(matrizes, configuracoes_ilhas):
+            matriz[:] = 1.0 / configuracao.get("evaporacao", 0.1)
+        del matrizes
+
+        estado = {
+            "instancia": instancia_busca,
+            "memoria": memoria.name,
+            "ilhas": ilhas,
+            "rota_inicial": list(rota_inicial),
+            "hora_inicial": hora_inicial,
+            "hora_final": hora_final,
+            "tempo_visita": tempo_visita,
+            "alpha": alpha,
+            "beta": beta,
+            "formigas": formigas,
+            "max_iter": max_iter,
+            "custo_alvo": custo_alvo,
+            "fixar_inicio": fixar_inicio,
+            "orientacao": orientacao,
+            "migracao": migracao,
+            "intervalo_migracao": intervalo_migracao,
+            "peso_mistura": peso_mistura,
+        }
+        contexto = _contexto_processos()
+        mural = MuralIlhas(ilhas, n, contexto)
+        sementes = np.random.SeedSequence(semente).spawn(ilhas)
+
+        if verbose:
+            print(
+                f"ACO em {ilhas} ilhas (migração por {migracao} a cada "
+                f"{intervalo_migracao} iterações) por até {tempo_limite_ms:.0f} ms"
+            )
+
+        with ProcessPoolExecutor(
+            max_workers=ilhas,
+            mp_context=contexto,
+            initializer=_iniciar_trabalhador,
+            initargs=(estado, mural),
+        ) as pool:
+            futuros = [
+                pool.submit(_executar_ilha, ilha, configuracao, semente_ilha, prazo)
+                for ilha, (configuracao, semente_ilha) in enumerate(
+                    zip(configuracoes_ilhas, sementes)
+                )
+            ]
+            pendentes = set(futuros)
+            while pendentes:
+                prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                # uma ilha no custo alvo encerra as demais
+                if any(futuro.result()["motivo_parada"] == "custo_alvo" for futuro in prontos):
+                    mural.cancelar.set()
+            estatisticas = [futuro.result() for futuro in futuros]
+    finally:
+        memoria.close()
+        memoria.unlink()
+
+    vencedora = min(estatisticas, key=lambda e: e["custo"])
+    melhor_rota, melhor_custo = Route(vencedora["rota"], n), vencedora["custo"]
+    if indices_bares is not None:
+        melhor_rota = Route(indices_bares[melhor_rota.bares], instancia.n)
+        for estatistica in estatisticas:
+            estatistica["rota"] = indices_bares[estatistica["rota"]].tolist()
+
+    if verbose:
+        for e in estatisticas:
+            print(
+                f"   ilha {e['ilha']} {e['configuracao']}: custo {e['custo']:.2f}, "
+                f"{e['iteracoes']} iterações, {e['migracoes']} migrações, "
+                f"{e['tempo_s']:.2f}s ({e['motivo_parada']})"
+            )
+        print(f"✅ Ilhas concluídas! Vencedora: ilha {vencedora['ilha']}, custo {melhor_custo:.2f}")
+
+    return melhor_rota, melhor_custo, estatisticas
@@ -0,0 +1,454 @@
+"""
+Colônia de formigas sobre o objetivo completo do itinerário.
+
+O ACO clássico (aco_classico.py) otimiza a distância de um circuito fechado e
+só depois as rotas dele são reavaliadas com o objetivo da Busca Tabu. Aqui as
+formigas constroem direto rotas abertas e são julgadas pelo mesmo objetivo de
+avaliar_rota_instancia: tempo, penalidades de horário e notas.
+
+Cada formiga carrega um relógio simulado (µs inteiros, como o da avaliação).
+A informação heurística de um bar j é calculada no momento da escolha, a
+partir do custo marginal de ir até ele agora:
+
+    alpha * (tempo até j + visita) + penalidade de horário na chegada - beta * nota
+
+A penalidade usa o relógio da formiga, então um bar fechado (ou ainda longe de
+abrir) naquela hora fica com heurística quase nula, mesmo que esteja perto.
+Todas as formigas andam juntas, um passo por vez, e as rotas prontas são
+avaliadas em lote (avaliar_rotas_lote). O custo pode ser negativo (as notas
+descontam), então o feromônio segue o MAX–MIN Ant System com depósito
+constante: só a melhor formiga deposita, e os limites [tau_min, tau_max] não
+dependem da escala do custo.
+"""
+
+import numpy as np
+
+try:
+    from .aco_classico import DEPOSITOS_MMAS
+    from .avalia_rota import (
+        ProblemInstance,
+        _limite_us,
+        _minutos_visita,
+        _para_us,
+        _penalidades_vetor,
+        _relogio_inicial,
+        avaliar_rotas_lote,
+    )
+    from .avaliacao_incremental import AvaliadorIncremental
+    from .criterios_parada import CriterioParada
+    from .lin_kernighan import lin_kernighan
+    from .rota import Route
+    from .tabu_search import _na_instancia
+    from .vizinhanca import vizinhos_mais_proximos
+except Exception:
+    from aco_classico import DEPOSITOS_MMAS
+    from avalia_rota import (
+        ProblemInstance,
+        _limite_us,
+        _minutos_visita,
+        _para_us,
+        _penalidades_vetor,
+        _relogio_inicial,
+        avaliar_rotas_lote,
+    )
+    from avaliacao_incremental import AvaliadorIncremental
+    from criterios_parada import CriterioParada
+    from lin_kernighan import lin_kernighan
+    from rota import Route
+    from tabu_search import _na_instancia
+    from vizinhanca import vizinhos_mais_proximos
+
+
+class ColoniaItinerario:
+    """Feromônio e construção das formigas para uma ProblemInstance.
+
+    `alpha` e `beta` são os pesos do objetivo (os mesmos de tabu_search);
+    `alpha_feromonio` e `beta_heuristica` são os expoentes de tau e eta na
+    regra de escolha. O feromônio fica em `feromonios` (n, n), por aresta
+    dirigida: a mesma aresta tem horários de chegada diferentes em cada
+    sentido. Quem quiser compartilhar a matriz passa um array pronto em
+    `feromonios`, que é usado no lugar (sem cópia).
+
+    A heurística de um bar é escala / (escala + c - c_min), onde c é o custo
+    marginal de ir até ele no relógio atual da formiga, c_min o menor entre os
+    bares que ela ainda pode visitar e `escala` o tempo médio entre bares
+    vezes alpha: o melhor bar do momento tem eta = 1, e um bar fechado na
+    chegada (penalidade de 1000) fica perto de zero.
+    """
+
+    def __init__(
+        self,
+        instancia,
+        hora_inicial,
+        hora_final,
+        tempo_visita,
+        alpha=1.0,
+        beta=20.0,
+        orientacao=False,
+        formigas=20,
+        alpha_feromonio=1.0,
+        beta_heuristica=4.0,
+        evaporacao=0.1,
+        deposito="iteracao",
+        p_melhor=0.05,
+        rng=None,
+        feromonios=None,
+    ):
+        if deposito not in DEPOSITOS_MMAS:
+            raise ValueError(f"Depósito desconhecido: {deposito}")
+        self.instancia = instancia
+        self.hora_inicial = hora_inicial
+        self.hora_final = hora_final
+        self.tempo_visita = tempo_visita
+        self.alpha = alpha
+        self.beta = beta
+        self.orientacao = orientacao
+        self.formigas = formigas
+        self.alpha_feromonio = alpha_feromonio
+        self.beta_heuristica = beta_heuristica
+        self.evaporacao = evaporacao
+        self.deposito = deposito
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        n = instancia.n
+        self._visita_min = _minutos_visita(tempo_visita)
+        self._visita_us = _para_us(self._visita_min)
+        self._relogio0, self._dia_inicial = _relogio_inicial(hora_inicial)
+        self._limite = _limite_us(hora_inicial, hora_final)
+        fora_diagonal = instancia.tempos[~np.eye(n, dtype=bool)]
+        self._escala = alpha * float(fora_diagonal.mean()) if n > 1 else 1.0
+        if not self._escala > 0:
+            self._escala = 1.0
+
+        # depósito constante de 1 por iteração: tau converge para 1 / rho
+        self.tau_max = 1.0 / evaporacao
+        raiz = p_melhor ** (1.0 / max(n, 1))
+        self.tau_min = min(self.tau_max * (1 - raiz) / (max(n / 2 - 1, 1) * raiz), self.tau_max)
+        if feromonios is None:
+            feromonios = np.full((n, n), self.tau_max)
+        self.feromonios = feromonios
+
+    def construir_rotas(self, inicios):
+        """Constrói uma rota por formiga, todas em paralelo.
+
+        `inicios` é o bar inicial de cada formiga (array de tamanho
+        `formigas`). A cada passo, cada formiga ainda em rota calcula o custo
+        marginal de todos os bares com o próprio relógio, sorteia o próximo
+        (um searchsorted sobre as somas acumuladas de todas, como em
+        ACO.construir_rotas) e avança o relógio. No modo orientação só entram
+        os bares cuja visita termina até hora_final; sem nenhum, a formiga
+        para, e a rota é cortada no prefixo de menor custo.
+
+        Devolve a lista das rotas (arrays de tamanhos possivelmente diferentes).
+        """
+        instancia = self.instancia
+        n = instancia.n
+        quantidade = len(inicios)
+        formigas = np.arange(quantidade)
+        todos = np.arange(n)
+        rotas = np.empty((quantidade, n), dtype=np.intp)
+        rotas[:, 0] = inicios
+        # custo marginal de cada passo, para achar o melhor prefixo
+        incrementos = np.full((quantidade, n), np.inf)
+        incrementos[:, 0] = 0.0
+        tamanhos = np.ones(quantidade, dtype=np.intp)
+        nao_visitadas = np.ones((quantidade, n), dtype=bool)
+        nao_visitadas[formigas, inicios] = False
+        relogios = np.full(quantidade, self._relogio0, dtype=np.int64)
+        atuais = rotas[:, 0].copy()
+        em_rota = formigas
+        tau = self.feromonios ** self.alpha_feromonio
+
+        for posicao in range(1, n):
+            chegada = relogios[em_rota, None] + instancia.tempos_us[atuais] + self._visita_us
+            custo = (
+                self.alpha * (instancia.tempos[atuais] + self._visita_min)
+                + _penalidades_vetor(instancia, todos, chegada, self._dia_inicial)
+                - self.beta * instancia.notas
+            )
+            livres = nao_visitadas[em_rota]
+            if self.orientacao:
+                livres &= chegada <= self._limite
+                com_opcao = livres.any(axis=1)
+                if not com_opcao.all():
+                    em_rota, atuais = em_rota[com_opcao], atuais[com_opcao]
+                    chegada, custo, livres = chegada[com_opcao], custo[com_opcao], livres[com_opcao]
+                    if not len(em_rota):
+                        break
+            quantos = len(em_rota)
+            linhas = np.arange(quantos)
+
+            custo = np.where(livres, custo, np.inf)
+            excesso = custo - custo.min(axis=1, keepdims=True)
+            eta = self._escala / (self._escala + np.where(livres, excesso, 0.0))
+            acumulado = np.cumsum(tau[atuais] * eta ** self.beta_heuristica * livres, axis=1)
+            totais = acumulado[:, -1]
+            sem_peso = totais <= 0
+            if sem_peso.any():
+                acumulado[sem_peso] = np.cumsum(livres[sem_peso], axis=1)
+                totais = acumulado[:, -1]
+            # a linha da formiga f ocupa o intervalo (f, f + 1]
+            acumulado /= totais[:, None]
+            acumulado += linhas[:, None]
+            sorteios = self.rng.random(quantos) + linhas
+            proximas = np.searchsorted(acumulado.ravel(), sorteios, side="right") - linhas * n
+            proximas = np.minimum(proximas, n - 1)
+
+            rotas[em_rota, posicao] = proximas
+            incrementos[em_rota, posicao] = custo[linhas, proximas]
+            tamanhos[em_rota] = posicao + 1
+            nao_visitadas[em_rota, proximas] = False
+            relogios[em_rota] = chegada[linhas, proximas]
+            atuais = proximas
+
+        if self.orientacao:
+            # no modo orientação a rota pode terminar antes: fica o prefixo de
+            # menor custo (um bar só custa 0)
+            tamanhos = np.argmin(np.cumsum(incrementos, axis=1), axis=1) + 1
+        return [rotas[f, : tamanhos[f]] for f in range(quantidade)]
+
+    def avaliar(self, rotas):
+        """Custos das rotas com o objetivo completo, em lote: um
+        avaliar_rotas_lote por tamanho de rota."""
+        tamanhos = np.array([len(rota) for rota in rotas])
+        custos = np.empty(len(rotas))
+        for tamanho in np.unique(tamanhos).tolist():
+            grupo = np.flatnonzero(tamanhos == tamanho)
+            custos[grupo] = avaliar_rotas_lote(
+                np.stack([rotas[k] for k in grupo.tolist()]),
+                self.instancia,
+                self.hora_inicial,
+                self.hora_final,
+                self.tempo_visita,
+                self.alpha,
+                self.beta,
+                self.orientacao,
+            )
+        return custos
+
+    def evaporar(self):
+        self.feromonios *= 1 - self.evaporacao
+
+    def depositar(self, rota, quantidade=1.0):
+        """Soma `quantidade` nas arestas dirigidas da rota aberta."""
+        rota = np.asarray(rota, dtype=np.intp)
+        np.add.at(self.feromonios, (rota[:-1], rota[1:]), quantidade)
+
+    def limitar(self):
+        np.clip(self.feromonios, self.tau_min, self.tau_max, out=self.feromonios)
+
+    def reiniciar(self):
+        self.feromonios[:] = self.tau_max
+
+
+def aco_itinerario_iter(
+    rota_inicial,
+    tempos,
+    bares,
+    hora_inicial,
+    hora_final,
+    tempo_visita,
+    alpha=1.0,
+    beta=20.0,
+    formigas=20,
+    max_iter=200,
+    alpha_feromonio=1.0,
+    beta_heuristica=4.0,
+    evaporacao=0.1,
+    deposito="iteracao",
+    p_melhor=0.05,
+    reinicio_sem_melhoria=50,
+    busca_lk=False,
+    max_iter_sem_melhoria=None,
+    tempo_limite_ms=None,
+    max_avaliacoes=None,
+    custo_alvo=None,
+    parada=None,
+    rng=None,
+    verbose=True,
+    instancia=None,
+    indices_bares=None,
+    fixar_inicio=False,
+    orientacao=False,
+    feromonios=None,
+    migracao=None,
+):
+    """ACO sobre o objetivo completo (ColoniaItinerario), com a mesma
+    interface da Busca Tabu.
+
+    A cada iteração as `formigas` constroem suas rotas juntas e são avaliadas
+    em lote; a melhor da iteração (`deposito="iteracao"`) ou a melhor global
+    (`deposito="global"`) deposita 1 nas suas arestas depois da evaporação, e
+    o feromônio fica preso em [tau_min, tau_max] (MAX–MIN Ant System, com
+    tau_min derivado de `p_melhor`). Depois de `reinicio_sem_melhoria`
+    iterações sem melhorar a melhor rota, o feromônio volta a tau_max.
+
+    Com `busca_lk=True`, a melhor formiga de cada iteração passa por
+    lin_kernighan com os deltas exatos do AvaliadorIncremental antes de
+    depositar.
+
+    Sem `fixar_inicio`, cada formiga parte de um bar sorteado; com ele, todas
+    partem de rota_inicial[0]. Fora do modo orientação as rotas visitam todos
+    os bares da instância (ou de `indices_bares`, como em tabu_search); no modo
+    orientação a colônia também escolhe quais bares cabem no período.
+
+    `feromonios` é uma matriz (n, n) já preenchida para a colônia usar no
+    lugar (por exemplo, uma fatia de memória compartilhada; aco_ilhas.py).
+    `migracao`, se dada, é chamada ao fim de cada iteração, depois da
+    atualização do feromônio, como migracao(iteracao, colonia, melhor_rota,
+    melhor_custo); ela pode mexer no feromônio da colônia e devolve None ou
+    (rota, custo) de uma rota imigrante, que vira a melhor se for melhor.
+
+    Critérios de parada (CriterioParada) como em tabu_search: `max_iter`,
+    `max_iter_sem_melhoria`, `tempo_limite_ms`, `max_avaliacoes` (cada
+    formiga conta uma, cada delta do LK também) e `custo_alvo`, ou um
+    `parada` pronto. Os limites são verificados a cada iteração, e pelo menos
+    uma é concluída. `rng` (numpy.random.Generator) torna a execução
+    reproduzível.
+
+    Gerador: a cada nova melhor rota produz um Progresso
+    (criterios_parada.py); o retorno (StopIteration.value) é o de
+    aco_itinerario: (melhor_rota, melhor_custo, historico), com a melhor rota
+    como Route e historico["iteracao"], ["distancia_atual"] (melhor formiga da
+    iteração) e ["distancia_melhor"].
+    """
+    if parada is None:
+        parada = CriterioParada(
+            max_iter=max_iter,
+            max_iter_sem_melhoria=max_iter_sem_melhoria,
+            tempo_limite_ms=tempo_limite_ms,
+            max_avaliacoes=max_avaliacoes,
+            custo_alvo=custo_alvo,
+        )
+
+    if instancia is None:
+        instancia = ProblemInstance(bares, tempos)
+
+    if indices_bares is not None:
+        indices_bares = np.asarray(indices_bares, dtype=np.intp)
+        locais = {bar: k for k, bar in enumerate(indices_bares.tolist())}
+        busca = aco_itinerario_iter(
+            [locais[bar] for bar in rota_inicial if bar in locais],
+            None,
+            None,
+            hora_inicial,
+            hora_final,
+            tempo_visita,
+            alpha=alpha,
+            beta=beta,
+            formigas=formigas,
+            alpha_feromonio=alpha_feromonio,
+            beta_heuristica=beta_heuristica,
+            evaporacao=evaporacao,
+            deposito=deposito,
+            p_melhor=p_melhor,
+            reinicio_sem_melhoria=reinicio_sem_melhoria,
+            busca_lk=busca_lk,
+            parada=parada,
+            rng=rng,
+            verbose=verbose,
+            instancia=instancia.subinstancia(indices_bares),
+            fixar_inicio=fixar_inicio,
+            orientacao=orientacao,
+            feromonios=feromonios,
+            migracao=migracao,
+        )
+        return (yield from _na_instancia(busca, indices_bares, instancia.n))
+
+    if rng is None:
+        rng = np.random.default_rng()
+    colonia = ColoniaItinerario(
+        instancia,
+        hora_inicial,
+        hora_final,
+        tempo_visita,
+        alpha=alpha,
+        beta=beta,
+        orientacao=orientacao,
+        formigas=formigas,
+        alpha_feromonio=alpha_feromonio,
+        beta_heuristica=beta_heuristica,
+        evaporacao=evaporacao,
+        deposito=deposito,
+        p_melhor=p_melhor,
+        rng=rng,
+        feromonios=feromonios,
+    )
+    candidatos_lk = vizinhos_mais_proximos(instancia.tempos, 8) if busca_lk else None
+
+    if verbose:
+        print(f"ACO (itinerário) com {formigas} formigas: α={alpha_feromonio}, "
+              f"β={beta_heuristica}, ρ={evaporacao}")
+
+    melhor, melhor_custo = None, float("inf")
+    historico = {"iteracao": [], "distancia_atual": [], "distancia_melhor": []}
+    sem_melhoria = 0
+    iteracao = 0
+    while melhor is None or not parada.parar():
+        if fixar_inicio and len(rota_inicial):
+            inicios = np.full(formigas, rota_inicial[0], dtype=np.intp)
+        else:
+            inicios = rng.integers(instancia.n, size=formigas)
+        rotas = colonia.construir_rotas(inicios)
+        custos = colonia.avaliar(rotas)
+        parada.registrar_avaliacoes(len(rotas))
+
+        k = int(np.argmin(custos))
+        rota_iteracao, custo_iteracao = Route(rotas[k], instancia.n), float(custos[k])
+        if busca_lk and len(rota_iteracao) > 3 and np.isfinite(custo_iteracao):
+            avaliador = AvaliadorIncremental(
+                instancia, rota_iteracao, hora_inicial, hora_final, tempo_visita,
+                alpha, beta, orientacao,
+            )
+            lin_kernighan(avaliador, candidatos_lk, instancia._tempos, alpha, parada=parada)
+            rota_iteracao, custo_iteracao = avaliador.rota, avaliador.custo
+
+        if melhor is None or custo_iteracao < melhor_custo:
+            melhor, melhor_custo = rota_iteracao.copia(), custo_iteracao
+            sem_melhoria = 0
+            parada.registrar_custo(melhor_custo)
+            if verbose:
+                print(f"Iteração {iteracao}: nova melhor rota, custo {melhor_custo:.2f}")
+            yield parada.progresso(melhor, melhor_custo)
+        else:
+            sem_melhoria += 1
+
+        if reinicio_sem_melhoria and sem_melhoria >= reinicio_sem_melhoria:
+            colonia.reiniciar()
+            sem_melhoria = 0
+        colonia.evaporar()
+        colonia.depositar(melhor if deposito == "global" else rota_iteracao)
+        colonia.limitar()
+
+        if migracao is not None:
+            imigrante = migracao(iteracao, colonia, melhor, melhor_custo)
+            if imigrante is not None and imigrante[1] < melhor_custo:
+                melhor, melhor_custo = Route(imigrante[0], instancia.n), float(imigrante[1])
+                sem_melhoria = 0
+                parada.registrar_custo(melhor_custo)
+                yield parada.progresso(melhor, melhor_custo)
+
+        historico["iteracao"].append(iteracao)
+        historico["distancia_atual"].append(custo_iteracao)
+        historico["distancia_melhor"].append(melhor_custo)
+        parada.registrar_iteracao(melhor_custo)
+        iteracao += 1
+
+    if verbose:
+        print(f"{parada.descricao()} Melhor custo: {melhor_custo:.2f} após {iteracao} iterações.")
+    return melhor, melhor_custo, historico
+
+
+def aco_itinerario(*args, ao_melhorar=None, **kwargs):
+    """Roda aco_itinerario_iter até o fim e devolve (melhor_rota,
+    melhor_custo, historico). Os argumentos são os de aco_itinerario_iter;
+    `ao_melhorar`, se dado, é chamada com (rota, custo) de cada Progresso,
+    assim que ele aparece."""
+    busca = aco_itinerario_iter(*args, **kwargs)
+    while True:
+        try:
+            progresso = next(busca)
+        except StopIteration as fim:
+            return fim.value
+        if ao_melhorar is not None:
+            ao_melhorar(progresso.rota.copia(), progresso.custo)
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 
+import numpy as np
 import pandas as pd
 
 
@@ -51,7 +52,15 @@ class CacheHorarios:
 
 
 def avaliar_rota(
-    rota, tempos, bares, hora_inicial, hora_final, tempo_visita, alpha=1.0, beta=20.0
+    rota,
+    tempos,
+    bares,
+    hora_inicial,
+    hora_final,
+    tempo_visita,
+    alpha=1.0,
+    beta=20.0,
+    orientacao=False,
 ):
     """
     Avalia uma rota retornando um custo numérico menor = melhor.
@@ -61,6 +70,10 @@ def avaliar_rota(
      - penalidades por chegar fora do horário de funcionamento
      - recompensa por nota (beta * soma_notas)
 
+    Com `orientacao=True` a rota é só um subconjunto dos bares (modo
+    orientação) e precisa caber no orçamento: se a última visita termina
+    depois de hora_final, a rota é inviável e o custo é infinito.
+
     Otimizações implementadas:
      - CacheHorarios para evitar parsing repetido de strings das colunas
      - iteração linear sobre a rota
@@ -118,11 +131,288 @@ def avaliar_rota(
             elif desde_meia_noite > hor_fc:
                 penalidade += 1000.0
 
+    if orientacao and hora_atual > hora_final:
+        return float("inf")
+
     # custo final: tempo ponderado + penalidades - recompensa por notas
     custo = alpha * total_tempo + penalidade - beta * total_nota
     return float(custo)
 
 
+# Resolução do relógio das avaliações compiladas: microssegundos inteiros, a
+# mesma de datetime/timedelta, para reproduzir exatamente os custos de avaliar_rota.
+_US_POR_MINUTO = 60_000_000
+_MINUTOS_POR_DIA = 1440
+
+
+def _minutos_visita(tempo_visita):
+    if isinstance(tempo_visita, timedelta):
+        return tempo_visita.total_seconds() / 60.0
+    return float(tempo_visita)
+
+
+def _para_us(minutos):
+    return timedelta(minutes=minutos) // timedelta(microseconds=1)
+
+
+def _relogio_inicial(hora_inicial):
+    """(microssegundos desde a meia-noite, dia da semana) de hora_inicial."""
+    meia_noite = datetime.combine(hora_inicial.date(), datetime.min.time())
+    return (hora_inicial - meia_noite) // timedelta(microseconds=1), hora_inicial.weekday()
+
+
+def _limite_us(hora_inicial, hora_final):
+    """hora_final em µs desde a meia-noite do dia de hora_inicial."""
+    meia_noite = datetime.combine(hora_inicial.date(), datetime.min.time())
+    return (hora_final - meia_noite) // timedelta(microseconds=1)
+
+
+class ProblemInstance:
+    """Instância compilada do problema, montada uma única vez.
+
+    Guarda em arrays tudo o que avaliar_rota consulta a cada chamada:
+     - notas: float64 (n,), com a mesma conversão de avaliar_rota (0 sem coluna "Nota"
+       e para bares sem nota)
+     - abertura / fechamento: int32 (n, 7) em minutos desde meia-noite, -1 quando
+       o horário do dia não foi informado (ou não pôde ser lido)
+     - tempos: matriz float64 (n, n) contígua, em minutos
+     - tempos_us: os mesmos tempos em microssegundos inteiros, arredondados como
+       timedelta, usados no relógio da simulação
+     - indices: id de cada bar no catálogo completo (0..n-1 aqui; numa
+       subinstância, os bares escolhidos)
+    """
+
+    def __init__(self, bares: pd.DataFrame, tempos):
+        n = len(bares)
+        self.n = n
+        self.tempos = np.ascontiguousarray(np.asarray(tempos, dtype=np.float64))
+        if self.tempos.shape != (n, n):
+            raise ValueError(
+                f"Matriz de tempos {self.tempos.shape} incompatível com {n} bares"
+            )
+
+        self.notas = np.zeros(n, dtype=np.float64)
+        if "Nota" in bares.columns:
+            for idx, valor in enumerate(bares["Nota"].tolist()):
+                try:
+                    self.notas[idx] = float(valor or 0)
+                except Exception:
+                    self.notas[idx] = 0.0
+            # bar sem nota (NaN) não soma nada; em avaliar_rota o NaN tornaria
+            # o custo inteiro NaN e a busca não conseguiria comparar rotas
+            self.notas[np.isnan(self.notas)] = 0.0
+
+        cache = CacheHorarios(bares)
+        self.abertura = np.full((n, 7), -1, dtype=np.int32)
+        self.fechamento = np.full((n, 7), -1, dtype=np.int32)
+        for idx in range(n):
+            for dia in range(7):
+                ab, fc = cache.obter(idx, dia)
+                if ab is not None and fc is not None:
+                    self.abertura[idx, dia] = ab // timedelta(minutes=1)
+                    self.fechamento[idx, dia] = fc // timedelta(minutes=1)
+
+        self.tempos_us = np.array(
+            [[_para_us(t) for t in linha] for linha in self.tempos.tolist()],
+            dtype=np.int64,
+        )
+        self.indices = np.arange(n)
+        self._compilar()
+
+    def _compilar(self):
+        # listas Python para os laços escalares: indexar list é bem mais barato
+        # que indexar ndarray elemento a elemento
+        self._tempos = self.tempos.tolist()
+        self._tempos_us = self.tempos_us.tolist()
+        self._notas = self.notas.tolist()
+        self._abertura = self.abertura.tolist()
+        self._fechamento = self.fechamento.tolist()
+
+        # versões achatadas (índice bar * 7 + dia) para os kernels vetorizados; sem
+        # horário informado o fechamento vira "nunca", e a regra dispensa máscara
+        self._abertura_plana = self.abertura.ravel()
+        self._fechamento_plano = np.where(
+            self.abertura < 0, np.iinfo(np.int32).max, self.fechamento
+        ).ravel()
+
+    def subinstancia(self, indices):
+        """Instância só com os bares `indices` (ids desta instância), na ordem dada.
+
+        O bar k da subinstância é o bar indices[k] daqui; a submatriz de tempos e
+        os atributos por bar são recortados dos arrays já compilados, sem reler o
+        DataFrame. `sub.indices` traduz as rotas de volta para o catálogo.
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        sub = ProblemInstance.__new__(ProblemInstance)
+        sub.n = len(indices)
+        sub.tempos = np.ascontiguousarray(self.tempos[np.ix_(indices, indices)])
+        sub.tempos_us = np.ascontiguousarray(self.tempos_us[np.ix_(indices, indices)])
+        sub.notas = self.notas[indices]
+        sub.abertura = self.abertura[indices]
+        sub.fechamento = self.fechamento[indices]
+        sub.indices = self.indices[indices]
+        sub._compilar()
+        return sub
+
+    @classmethod
+    def de_csv(cls, caminho_csv, tempos):
+        return cls(pd.read_csv(caminho_csv), tempos)
+
+    def __len__(self):
+        return self.n
+
+
+def avaliar_rota_instancia(
+    rota,
+    instancia,
+    hora_inicial,
+    hora_final,
+    tempo_visita,
+    alpha=1.0,
+    beta=20.0,
+    orientacao=False,
+):
+    """
+    Variante de avaliar_rota sobre uma ProblemInstance, com o mesmo custo.
+
+    Não toca em pandas nem em datetime dentro do laço: o relógio é um inteiro em
+    microssegundos desde a meia-noite de hora_inicial e as janelas de
+    funcionamento são comparadas em minutos inteiros.
+    """
+    n = len(rota)
+    if n == 0:
+        return float("inf")
+
+    tempos = instancia._tempos
+    tempos_us = instancia._tempos_us
+    notas = instancia._notas
+    abertura = instancia._abertura
+    fechamento = instancia._fechamento
+
+    visita_min = _minutos_visita(tempo_visita)
+    visita_us = _para_us(visita_min)
+    relogio, dia_inicial = _relogio_inicial(hora_inicial)
+
+    total_tempo = 0.0
+    total_nota = 0.0
+    penalidade = 0.0
+
+    origem = rota[0]
+    for pos in range(1, n):
+        destino = rota[pos]
+        total_tempo += tempos[origem][destino]
+        total_tempo += visita_min
+        relogio += tempos_us[origem][destino] + visita_us
+        total_nota += notas[destino]
+
+        minuto = relogio // _US_POR_MINUTO
+        dia = (dia_inicial + minuto // _MINUTOS_POR_DIA) % 7
+        hor_ab = abertura[destino][dia]
+        if hor_ab >= 0:
+            desde_meia_noite = minuto % _MINUTOS_POR_DIA
+            if desde_meia_noite < hor_ab:
+                penalidade += (hor_ab - desde_meia_noite) * 2.0
+            elif desde_meia_noite > fechamento[destino][dia]:
+                penalidade += 1000.0
+        origem = destino
+
+    if orientacao and relogio > _limite_us(hora_inicial, hora_final):
+        return float("inf")
+
+    custo = alpha * total_tempo + penalidade - beta * total_nota
+    return float(custo)
+
+
+def prefixo_no_orcamento(rota, instancia, hora_inicial, hora_final, tempo_visita):
+    """Maior prefixo de `rota` cuja última visita termina até hora_final.
+
+    É a poda usada no modo orientação para transformar uma rota completa (por
+    exemplo, a do vizinho mais próximo) numa solução inicial viável.
+    """
+    rota = list(rota)
+    if len(rota) < 2:
+        return rota
+    relogio0, _ = _relogio_inicial(hora_inicial)
+    visita_us = _para_us(_minutos_visita(tempo_visita))
+    bares = np.asarray(rota, dtype=np.intp)
+    fins = relogio0 + np.cumsum(instancia.tempos_us[bares[:-1], bares[1:]] + visita_us)
+    viaveis = int(np.searchsorted(fins, _limite_us(hora_inicial, hora_final), side="right"))
+    return rota[: 1 + viaveis]
+
+
+def _penalidades_vetor(instancia, bares, chegada, dia_inicial):
+    """Penalidade de horário de cada chegada, elemento a elemento.
+
+    `bares` e `chegada` (µs desde a meia-noite do primeiro dia) são arrays de
+    mesmo formato; a regra é a mesma do laço de avaliar_rota_instancia.
+    """
+    minuto = chegada // _US_POR_MINUTO
+    dias = minuto // _MINUTOS_POR_DIA
+    desde_meia_noite = minuto - dias * _MINUTOS_POR_DIA
+    chave = bares * 7 + (dia_inicial + dias) % 7
+
+    hor_ab = instancia._abertura_plana.take(chave)
+    hor_fc = instancia._fechamento_plano.take(chave)
+    return np.where(
+        desde_meia_noite < hor_ab,
+        (hor_ab - desde_meia_noite) * 2.0,
+        np.where(desde_meia_noite > hor_fc, 1000.0, 0.0),
+    )
+
+
+def avaliar_rotas_lote(
+    rotas,
+    instancia,
+    hora_inicial,
+    hora_final,
+    tempo_visita,
+    alpha=1.0,
+    beta=20.0,
+    orientacao=False,
+):
+    """
+    Avalia k rotas de mesmo tamanho de uma vez, devolvendo um vetor de custos.
+
+    `rotas` é um array (k, n) de índices de bares. Cada termo de avaliar_rota vira
+    uma operação vetorizada sobre a matriz inteira: gathers na matriz de tempos,
+    soma acumulada dos horários de chegada, gathers nas janelas de abertura do dia
+    da semana e nas notas. Os custos batem com avaliar_rota_instancia, rota a rota.
+    """
+    rotas = np.asarray(rotas, dtype=np.intp)
+    if rotas.ndim == 1:
+        rotas = rotas[np.newaxis, :]
+    k, n = rotas.shape
+    if n == 0:
+        return np.full(k, np.inf)
+
+    visita_min = _minutos_visita(tempo_visita)
+    visita_us = _para_us(visita_min)
+    relogio0, dia_inicial = _relogio_inicial(hora_inicial)
+    if n == 1:
+        if orientacao and relogio0 > _limite_us(hora_inicial, hora_final):
+            return np.full(k, np.inf)
+        return np.zeros(k)
+
+    origem = rotas[:, :-1]
+    destino = rotas[:, 1:]
+
+    # somas acumuladas sequenciais (na mesma ordem do laço escalar) para que o
+    # arredondamento de ponto flutuante seja idêntico
+    parcelas = np.empty((k, n - 1, 2))
+    parcelas[:, :, 0] = instancia.tempos[origem, destino]
+    parcelas[:, :, 1] = visita_min
+    total_tempo = np.cumsum(parcelas.reshape(k, -1), axis=1)[:, -1]
+    total_nota = np.cumsum(instancia.notas[destino], axis=1)[:, -1]
+
+    chegada = relogio0 + np.cumsum(instancia.tempos_us[origem, destino] + visita_us, axis=1)
+    penalidade = _penalidades_vetor(instancia, destino, chegada, dia_inicial).sum(axis=1)
+
+    custos = alpha * total_tempo + penalidade - beta * total_nota
+    if orientacao:
+        custos[chegada[:, -1] > _limite_us(hora_inicial, hora_final)] = np.inf
+    return custos
+
+
 if __name__ == "__main__":
     import pickle
     from datetime import datetime, timedelta
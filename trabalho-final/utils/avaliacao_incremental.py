@@ -0,0 +1,673 @@
+from bisect import bisect_left, insort
+
+import numpy as np
+
+try:
+    from .avalia_rota import (
+        _MINUTOS_POR_DIA,
+        _US_POR_MINUTO,
+        _limite_us,
+        _minutos_visita,
+        _para_us,
+        _penalidades_vetor,
+        _relogio_inicial,
+    )
+    from .rota import Route
+except Exception:
+    from avalia_rota import (
+        _MINUTOS_POR_DIA,
+        _US_POR_MINUTO,
+        _limite_us,
+        _minutos_visita,
+        _para_us,
+        _penalidades_vetor,
+        _relogio_inicial,
+    )
+    from rota import Route
+
+_INF = float("inf")
+
+
+class _SufixoDeslocado:
+    """Chegadas de um sufixo da rota que se deslocam juntas no tempo.
+
+    Cada chegada é classificada pela faixa do dia em que está (antes da
+    abertura, aberto, após o fechamento, sem horário). Para um deslocamento D
+    (µs) que a mantém na faixa, sua penalidade é constante ou, antes da
+    abertura, 2 * (abertura - minuto), e o minuto deslocado só depende de
+    D // 1min e de o resto de D somado ao resto da chegada passar de um minuto.
+    Assim a soma é obtida com uma contagem por bisect sobre os restos; só as
+    chegadas que saem da própria faixa (encontradas pelas listas ordenadas de
+    limites) são reavaliadas uma a uma.
+    """
+
+    def __init__(self, avaliador):
+        self._avaliador = avaliador
+        self._itens = []
+        self._constante = 0.0
+        self._n_cedo = 0
+        self._soma_cedo = 0
+        self._restos_cedo = []
+        self._por_lo = []
+        self._por_hi = []
+
+    def adicionar(self, bar, chegada):
+        pen, abertura_abs, inicio, fim = self._avaliador._regiao(bar, chegada)
+        k = len(self._itens)
+        self._itens.append((bar, chegada, abertura_abs, pen))
+        if abertura_abs is None:
+            self._constante += pen
+        else:
+            minuto, resto = divmod(chegada, _US_POR_MINUTO)
+            self._n_cedo += 1
+            self._soma_cedo += abertura_abs - minuto
+            insort(self._restos_cedo, resto)
+        insort(self._por_lo, (inicio * _US_POR_MINUTO - chegada, k))
+        insort(self._por_hi, (fim * _US_POR_MINUTO - chegada, k))
+
+    def penalidade(self, desloc):
+        minutos, resto = divmod(desloc, _US_POR_MINUTO)
+        n_cedo = self._n_cedo
+        viram_minuto = n_cedo - bisect_left(self._restos_cedo, _US_POR_MINUTO - resto)
+        total = self._constante + 2.0 * (
+            self._soma_cedo - n_cedo * minutos - viram_minuto
+        )
+
+        # chegadas que saem da própria faixa: limite superior <= D ou inferior > D
+        fora = []
+        for hi, k in self._por_hi:
+            if hi > desloc:
+                break
+            fora.append(k)
+        for idx in range(len(self._por_lo) - 1, -1, -1):
+            lo, k = self._por_lo[idx]
+            if lo <= desloc:
+                break
+            fora.append(k)
+
+        penalidade_em = self._avaliador._penalidade_em
+        for k in fora:
+            bar, chegada, abertura_abs, pen = self._itens[k]
+            nova = chegada + desloc
+            if abertura_abs is None:
+                estimada = pen
+            else:
+                estimada = 2.0 * (abertura_abs - nova // _US_POR_MINUTO)
+            total += penalidade_em(bar, nova) - estimada
+        return total
+
+
+class AvaliadorIncremental:
+    """Avaliação incremental do objetivo completo de avaliar_rota para uma rota corrente.
+
+    Mantém, para a rota atual:
+     - prefixos: horário de chegada (µs) e tempo acumulado em cada posição
+     - sufixos: soma das penalidades de horário a partir de cada posição e a
+       janela de deslocamento [lo, hi) em que essa soma não muda
+
+    Um movimento que reescreve as posições a..b e preserva o prefixo e o sufixo
+    é avaliado simulando só o trecho alterado; o sufixo é apenas deslocado no
+    tempo e, enquanto o deslocamento cair na janela do sufixo, sua penalidade é
+    reaproveitada em O(1). Fora da janela o sufixo é reavaliado (mesmo resultado,
+    custo linear); deltas_2opt evita esse caso varrendo todos os movimentos com
+    um _SufixoDeslocado.
+
+    Depois de aplicar um movimento, os prefixos são refeitos a partir da
+    primeira posição alterada e `custo` volta a ser exatamente o de
+    avaliar_rota_instancia, sem acumular erro de arredondamento.
+
+    Com `orientacao=True`, `custo` segue o modo orientação de avaliar_rota
+    (infinito se a última visita termina depois de hora_final). Os deltas não
+    embutem essa restrição: os métodos em lote aceitam `com_fim=True` e
+    devolvem também o relógio final de cada movimento, para quem busca
+    descartar os que estouram `limite`.
+    """
+
+    def __init__(
+        self,
+        instancia,
+        rota,
+        hora_inicial,
+        hora_final,
+        tempo_visita,
+        alpha=1.0,
+        beta=20.0,
+        orientacao=False,
+    ):
+        self.instancia = instancia
+        self.hora_inicial = hora_inicial
+        self.hora_final = hora_final
+        self.alpha = alpha
+        self.beta = beta
+        self.orientacao = orientacao
+
+        self._visita_min = _minutos_visita(tempo_visita)
+        self._visita_us = _para_us(self._visita_min)
+        self._relogio0, self._dia0 = _relogio_inicial(hora_inicial)
+        self.limite = _limite_us(hora_inicial, hora_final)
+        self.redefinir(rota)
+
+    def redefinir(self, rota):
+        """Troca a rota corrente (de qualquer tamanho) e refaz todas as estruturas."""
+        self.rota = Route(rota, self.instancia.n)
+        # cópia em lista para os laços escalares (indexar lista é mais barato)
+        self._bares = self.rota.tolist()
+        n = len(self.rota)
+        self._chegada = [0] * n
+        self._tempo_acum = [0.0] * n
+        self._nota_acum = [0.0] * n
+        self._penalidade = [0.0] * n
+        self._lo = [0] * n
+        self._hi = [0] * n
+        self._pen_sufixo = [0.0] * (n + 1)
+        self._lo_sufixo = [-_INF] * (n + 1)
+        self._hi_sufixo = [_INF] * (n + 1)
+        self._recalcular(1)
+
+    # ------------------------------------------------------------------
+    # penalidade de horário e janela de validade
+    # ------------------------------------------------------------------
+    def _penalidade_janela(self, bar, chegada):
+        """Penalidade ao chegar em `bar` no instante `chegada` (µs) e a janela
+        [lo, hi) de deslocamentos do horário de chegada que a mantêm igual."""
+        pen, abertura_abs, inicio, fim = self._regiao(bar, chegada)
+        if abertura_abs is not None:
+            # antes da abertura a espera muda a cada minuto: janela de um minuto
+            minuto = chegada // _US_POR_MINUTO
+            inicio, fim = minuto, minuto + 1
+        return pen, inicio * _US_POR_MINUTO - chegada, fim * _US_POR_MINUTO - chegada
+
+    def _penalidade_em(self, bar, chegada):
+        """Só a penalidade de _penalidade_janela, sem calcular a janela."""
+        minuto = chegada // _US_POR_MINUTO
+        dia = (self._dia0 + minuto // _MINUTOS_POR_DIA) % 7
+        hor_ab = self.instancia._abertura[bar][dia]
+        if hor_ab < 0:
+            return 0.0
+        desde_meia_noite = minuto % _MINUTOS_POR_DIA
+        if desde_meia_noite < hor_ab:
+            return (hor_ab - desde_meia_noite) * 2.0
+        if desde_meia_noite > self.instancia._fechamento[bar][dia]:
+            return 1000.0
+        return 0.0
+
+    def _regiao(self, bar, chegada):
+        """Faixa de minutos do dia em que `chegada` cai para `bar`.
+
+        Retorna (penalidade, abertura_absoluta, inicio, fim): dentro de
+        [inicio, fim) (minutos desde a meia-noite do primeiro dia) a penalidade é
+        constante, exceto antes da abertura, onde vale
+        2 * (abertura_absoluta - minuto); nesse caso abertura_absoluta não é None.
+        """
+        minuto = chegada // _US_POR_MINUTO
+        dias = minuto // _MINUTOS_POR_DIA
+        dia = (self._dia0 + dias) % 7
+        inicio_dia = dias * _MINUTOS_POR_DIA
+        desde_meia_noite = minuto - inicio_dia
+
+        hor_ab = self.instancia._abertura[bar][dia]
+        if hor_ab < 0:
+            return 0.0, None, inicio_dia, inicio_dia + _MINUTOS_POR_DIA
+        if desde_meia_noite < hor_ab:
+            pen = (hor_ab - desde_meia_noite) * 2.0
+            return pen, inicio_dia + hor_ab, inicio_dia, inicio_dia + hor_ab
+        hor_fc = self.instancia._fechamento[bar][dia]
+        if desde_meia_noite > hor_fc:
+            inicio = inicio_dia + max(hor_ab, hor_fc + 1)
+            return 1000.0, None, inicio, inicio_dia + _MINUTOS_POR_DIA
+        return 0.0, None, inicio_dia + hor_ab, inicio_dia + hor_fc + 1
+
+    def _recalcular(self, desde):
+        """Refaz os prefixos a partir da posição `desde` e todos os sufixos."""
+        self._bares = rota = self.rota.tolist()
+        n = len(rota)
+        if n == 0:
+            return
+        tempos = self.instancia._tempos
+        tempos_us = self.instancia._tempos_us
+        notas = self.instancia._notas
+        visita_min = self._visita_min
+        visita_us = self._visita_us
+
+        desde = max(desde, 1)
+        if desde == 1:
+            self._chegada[0] = self._relogio0
+        for pos in range(desde, n):
+            origem = rota[pos - 1]
+            destino = rota[pos]
+            # mesma ordem de somas de avaliar_rota_instancia
+            tempo = self._tempo_acum[pos - 1] + tempos[origem][destino]
+            self._tempo_acum[pos] = tempo + visita_min
+            self._nota_acum[pos] = self._nota_acum[pos - 1] + notas[destino]
+            chegada = self._chegada[pos - 1] + tempos_us[origem][destino] + visita_us
+            self._chegada[pos] = chegada
+            pen, lo, hi = self._penalidade_janela(destino, chegada)
+            self._penalidade[pos] = pen
+            self._lo[pos] = lo
+            self._hi[pos] = hi
+
+        pen_sufixo = 0.0
+        lo_sufixo = -_INF
+        hi_sufixo = _INF
+        for pos in range(n - 1, 0, -1):
+            pen_sufixo += self._penalidade[pos]
+            lo = self._lo[pos]
+            hi = self._hi[pos]
+            if lo > lo_sufixo:
+                lo_sufixo = lo
+            if hi < hi_sufixo:
+                hi_sufixo = hi
+            self._pen_sufixo[pos] = pen_sufixo
+            self._lo_sufixo[pos] = lo_sufixo
+            self._hi_sufixo[pos] = hi_sufixo
+        self._pen_sufixo[0] = pen_sufixo
+        self._lo_sufixo[0] = lo_sufixo
+        self._hi_sufixo[0] = hi_sufixo
+
+    # ------------------------------------------------------------------
+    # consultas
+    # ------------------------------------------------------------------
+    @property
+    def chegada_final(self):
+        """Relógio (µs desde a meia-noite do primeiro dia) ao fim da última visita."""
+        return self._chegada[-1] if self._chegada else self._relogio0
+
+    @property
+    def custo(self):
+        n = len(self.rota)
+        if n == 0:
+            return _INF
+        if self.orientacao and self.chegada_final > self.limite:
+            return _INF
+        return float(
+            self.alpha * self._tempo_acum[n - 1]
+            + self._pen_sufixo[1 if n > 1 else n]
+            - self.beta * self._nota_acum[n - 1]
+        )
+
+    def _penalidade_sufixo(self, pos, deslocamento):
+        """Penalidade das posições >= pos com as chegadas deslocadas em µs."""
+        if self._lo_sufixo[pos] <= deslocamento < self._hi_sufixo[pos]:
+            return self._pen_sufixo[pos]
+        rota = self._bares
+        chegada = self._chegada
+        total = 0.0
+        for p in range(pos, len(rota)):
+            pen, _, _ = self._penalidade_janela(rota[p], chegada[p] + deslocamento)
+            total += pen
+        return total
+
+    def delta_trecho(self, a, trecho):
+        """Variação do custo ao trocar as posições a..a+len(trecho)-1 por `trecho`.
+
+        `trecho` deve conter os mesmos bares das posições substituídas (a soma das
+        notas não muda) e a >= 1 (o bar inicial fica fixo).
+        """
+        rota = self._bares
+        n = len(rota)
+        b = a + len(trecho) - 1
+        tempos = self.instancia._tempos
+        tempos_us = self.instancia._tempos_us
+        visita_us = self._visita_us
+
+        anterior = rota[a - 1]
+        chegada = self._chegada[a - 1]
+        tempo_novo = 0.0
+        pen_nova = 0.0
+        for bar in trecho:
+            tempo_novo += tempos[anterior][bar]
+            chegada += tempos_us[anterior][bar] + visita_us
+            pen, _, _ = self._penalidade_janela(bar, chegada)
+            pen_nova += pen
+            anterior = bar
+
+        fim = b
+        if b + 1 < n:
+            proximo = rota[b + 1]
+            tempo_novo += tempos[anterior][proximo]
+            chegada += tempos_us[anterior][proximo] + visita_us
+            pen_nova += self._penalidade_sufixo(b + 1, chegada - self._chegada[b + 1])
+            fim = b + 1
+
+        tempo_antigo = self._tempo_acum[fim] - self._tempo_acum[a - 1]
+        tempo_novo += (fim - a + 1) * self._visita_min
+        return self.alpha * (tempo_novo - tempo_antigo) + pen_nova - self._pen_sufixo[a]
+
+    def delta_2opt(self, i, j):
+        """Variação do custo ao inverter o trecho rota[i+1..j] (0 <= i, i+2 <= j < n)."""
+        return self.delta_trecho(i + 1, self._bares[j : i : -1])
+
+    def deltas_2opt(self, movimentos=None):
+        """Gera (i, j, delta) para os movimentos 2-opt da rota corrente.
+
+        Sem `movimentos`, percorre a vizinhança inteira; com um iterável de pares
+        (i, j), avalia só esses (por exemplo, os de uma lista candidata).
+
+        Percorre j em ordem decrescente: o sufixo rota[j+1..] só ganha uma posição
+        por passo e fica num _SufixoDeslocado, que responde a penalidade do sufixo
+        deslocado em O(log n) amortizado. O trecho invertido é simulado (custo
+        proporcional ao tamanho do trecho).
+        """
+        rota = self._bares
+        n = len(rota)
+        tempos = self.instancia._tempos
+        tempos_us = self.instancia._tempos_us
+        visita_us = self._visita_us
+        visita_min = self._visita_min
+        chegada = self._chegada
+        tempo_acum = self._tempo_acum
+        pen_sufixo = self._pen_sufixo
+        penalidade = self._penalidade_em
+        abertura = self.instancia._abertura
+        fechamento = self.instancia._fechamento
+        dia0 = self._dia0
+        alpha = self.alpha
+
+        por_j = None
+        if movimentos is not None:
+            por_j = {}
+            for i, j in movimentos:
+                por_j.setdefault(j, []).append(i)
+
+        sufixo = _SufixoDeslocado(self)
+        for j in range(n - 1, 1, -1):
+            fim = j
+            if j + 1 < n:
+                sufixo.adicionar(rota[j + 1], chegada[j + 1])
+                fim = j + 1
+            if por_j is None:
+                lista_i = range(j - 2, -1, -1)
+            else:
+                lista_i = por_j.get(j)
+                if not lista_i:
+                    continue
+            bar_j = rota[j]
+            proximo = rota[j + 1] if j + 1 < n else None
+
+            for i in lista_i:
+                bar_i = rota[i]
+                relogio = chegada[i] + tempos_us[bar_i][bar_j] + visita_us
+                tempo_novo = tempos[bar_i][bar_j]
+                pen_nova = penalidade(bar_j, relogio)
+                anterior = bar_j
+                for p in range(j - 1, i, -1):
+                    bar = rota[p]
+                    tempo_novo += tempos[anterior][bar]
+                    relogio += tempos_us[anterior][bar] + visita_us
+                    # _penalidade_em em linha: é o laço mais quente da varredura
+                    minuto = relogio // _US_POR_MINUTO
+                    dia = (dia0 + minuto // _MINUTOS_POR_DIA) % 7
+                    hor_ab = abertura[bar][dia]
+                    if hor_ab >= 0:
+                        desde_meia_noite = minuto % _MINUTOS_POR_DIA
+                        if desde_meia_noite < hor_ab:
+                            pen_nova += (hor_ab - desde_meia_noite) * 2.0
+                        elif desde_meia_noite > fechamento[bar][dia]:
+                            pen_nova += 1000.0
+                    anterior = bar
+                if proximo is not None:
+                    tempo_novo += tempos[anterior][proximo]
+                    relogio += tempos_us[anterior][proximo] + visita_us
+                    pen_nova += sufixo.penalidade(relogio - chegada[j + 1])
+
+                tempo_novo += (fim - i) * visita_min
+                tempo_antigo = tempo_acum[fim] - tempo_acum[i]
+                yield (
+                    i,
+                    j,
+                    alpha * (tempo_novo - tempo_antigo) + pen_nova - pen_sufixo[i + 1],
+                )
+
+    def matriz_deltas_2opt(self, max_elementos=1_000_000, com_fim=False):
+        """Matriz (n, n) com o delta exato de cada movimento 2-opt (i, j).
+
+        Versão vetorizada de deltas_2opt: os tempos vêm da matriz permutada pela
+        rota (tp[a, b] = tempo de rota[a] a rota[b]) e os horários de chegada de
+        todas as posições sob todos os movimentos formam um tensor (i, j, posição),
+        processado em blocos de linhas i com até `max_elementos` elementos e
+        recortado ao triângulo que muda (posições depois de i).
+        Entradas fora de 0 <= i, i + 2 <= j < n valem +inf. Com `com_fim`,
+        devolve (deltas, relógio final de cada movimento).
+        """
+        n = len(self.rota)
+        deltas = np.full((n, n), np.inf)
+        if n < 3:
+            return (deltas, np.full((n, n), self.chegada_final)) if com_fim else deltas
+
+        rota = self.rota.bares.astype(np.intp)
+        tp = self.instancia.tempos[np.ix_(rota, rota)]
+        tp_us = self.instancia.tempos_us[np.ix_(rota, rota)]
+        chegada = np.asarray(self._chegada, dtype=np.int64)
+        tempo_acum = np.asarray(self._tempo_acum)
+        pen_sufixo = np.asarray(self._pen_sufixo[: n + 1])
+        visita_us = self._visita_us
+
+        pos = np.arange(n)
+        # tempos das arestas percorridas ao contrário: rota[p] -> rota[p-1]
+        inv = np.zeros(n)
+        inv[1:] = tp[pos[1:], pos[:-1]]
+        inv_us = np.zeros(n, dtype=np.int64)
+        inv_us[1:] = tp_us[pos[1:], pos[:-1]]
+        acum_inv = np.cumsum(inv)
+        acum_inv_us = np.cumsum(inv_us)
+
+        i = pos[:, np.newaxis]
+        j = pos[np.newaxis, :]
+        valido = j >= i + 2
+        i1 = np.minimum(i + 1, n - 1)
+        tem_prox = j + 1 < n
+        j1 = np.minimum(j + 1, n - 1)
+        fim = np.where(tem_prox, j1, j)
+
+        # parcela de tempo (mesma conta de deltas_2opt)
+        tempo_novo = tp[i, j] + (acum_inv[j] - acum_inv[i1])
+        tempo_novo = tempo_novo + np.where(tem_prox, tp[i1, j1], 0.0)
+        tempo_novo = tempo_novo + (fim - i) * self._visita_min
+        delta_tempo = tempo_novo - (tempo_acum[fim] - tempo_acum[i])
+
+        # chegada de rota[j] logo após rota[i], e o trecho invertido a partir dela
+        chegada_j = chegada[i] + tp_us[i, j] + visita_us
+        chegada_i1 = chegada_j + (acum_inv_us[j] - acum_inv_us[i1]) + (j - i - 1) * visita_us
+        desloc = chegada_i1 + tp_us[i1, j1] + visita_us - chegada[j1]
+
+        # penalidades: blocos de linhas i, recortados ao triângulo útil
+        # (j >= ini + 2 e posições p >= ini + 1; as anteriores não mudam)
+        pen_nova = np.zeros((n, n))
+        ini = 0
+        while ini < n - 2:
+            m = n - ini
+            bloco = max(1, min(max_elementos // (m * m), m // 8))
+            fim_bloco = min(n - 2, ini + bloco)
+            ii = pos[ini:fim_bloco, np.newaxis, np.newaxis]
+            jj = pos[np.newaxis, ini + 2 :, np.newaxis]
+            p = pos[np.newaxis, np.newaxis, ini + 1 :]
+            c_j = chegada_j[ini:fim_bloco, ini + 2 :, np.newaxis]
+            d = desloc[ini:fim_bloco, ini + 2 :, np.newaxis]
+            chegadas = np.where(
+                p <= jj,
+                c_j + (acum_inv_us[jj] - acum_inv_us[p]) + (jj - p) * visita_us,
+                chegada[p] + d,
+            )
+            pen = _penalidades_vetor(self.instancia, rota[p], chegadas, self._dia0)
+            pen[np.broadcast_to(p <= ii, pen.shape)] = 0.0
+            pen_nova[ini:fim_bloco, ini + 2 :] = pen.sum(axis=2)
+            ini = fim_bloco
+
+        total = self.alpha * delta_tempo + pen_nova - pen_sufixo[i1]
+        deltas[valido] = total[valido]
+        if com_fim:
+            return deltas, np.where(tem_prox, chegada[n - 1] + desloc, chegada_i1)
+        return deltas
+
+    def _penalidade_faixas(self, x, y, desloc, max_elementos=1_000_000):
+        """Para cada k, soma das penalidades das posições x[k]..y[k] da rota
+        corrente com as chegadas deslocadas em desloc[k] µs (faixa vazia se
+        x[k] > y[k])."""
+        rota = self.rota.bares.astype(np.intp)
+        chegada = np.asarray(self._chegada, dtype=np.int64)
+        n = len(rota)
+        total = np.zeros(len(x))
+        if len(x) == 0 or n == 0:
+            return total
+
+        comprimento = y - x + 1
+        if comprimento.max() <= 4:
+            # faixas curtas (trechos realocados, bares trocados): posição a posição
+            for k in range(int(comprimento.max())):
+                p = np.minimum(x + k, n - 1)
+                pen = _penalidades_vetor(
+                    self.instancia, rota[p], chegada[p] + desloc, self._dia0
+                )
+                total += np.where(k < comprimento, pen, 0.0)
+            return total
+
+        # consultas ordenadas pelo início, em lotes pequenos: cada lote só
+        # materializa as colunas que alguma de suas faixas cobre
+        ordem = np.argsort(x, kind="stable")
+        linhas = max(1, min(max_elementos // n, len(x) // 16 + 1))
+        for ini in range(0, len(x), linhas):
+            idx = ordem[ini:ini + linhas]
+            xs, ys = x[idx], y[idx]
+            col_ini = int(xs[0])
+            col_fim = min(n, int(ys.max()) + 1)
+            if col_fim <= col_ini:
+                continue
+            p = np.arange(col_ini, col_fim)[np.newaxis, :]
+            chegadas = chegada[p] + desloc[idx, np.newaxis]
+            pen = _penalidades_vetor(self.instancia, rota[p], chegadas, self._dia0)
+            dentro = (p >= xs[:, np.newaxis]) & (p <= ys[:, np.newaxis])
+            total[idx] = np.where(dentro, pen, 0.0).sum(axis=1)
+        return total
+
+    def deltas_blocos(self, a, b, blocos, com_fim=False):
+        """Deltas exatos, vetorizados, de movimentos que reordenam blocos da rota.
+
+        Cada movimento k reescreve as posições a[k]..b[k] (a[k] >= 1) como a
+        concatenação dos blocos contíguos da rota corrente `blocos` = [(x, y),
+        ...], na ordem dada e sem inversão: é o caso de swap, insert e or-opt.
+        Dentro de um bloco todas as chegadas andam juntas, então o tempo muda só
+        nas junções (fórmula O(1) por movimento) e a penalidade de cada bloco,
+        assim como a do sufixo depois de b[k], é a de uma faixa deslocada.
+        Com `com_fim`, devolve (deltas, relógio final de cada movimento).
+        """
+        rota = self.rota.bares.astype(np.intp)
+        n = len(rota)
+        tempos = self.instancia.tempos
+        tempos_us = self.instancia.tempos_us
+        chegada = np.asarray(self._chegada, dtype=np.int64)
+        pen_sufixo = np.asarray(self._pen_sufixo[: n + 1])
+        visita_us = self._visita_us
+
+        # tempo de deslocamento acumulado até cada posição (sem visitas)
+        viagem = np.zeros(n)
+        if n > 1:
+            viagem[1:] = np.cumsum(tempos[rota[:-1], rota[1:]])
+
+        anterior = rota[a - 1]
+        relogio = chegada[a - 1]
+        tempo_novo = np.zeros(len(a))
+        pen_nova = np.zeros(len(a))
+        for x, y in blocos:
+            primeiro = rota[x]
+            desloc = relogio + tempos_us[anterior, primeiro] + visita_us - chegada[x]
+            tempo_novo += tempos[anterior, primeiro] + (viagem[y] - viagem[x])
+            pen_nova += self._penalidade_faixas(x, y, desloc)
+            relogio = chegada[y] + desloc
+            anterior = rota[y]
+
+        tem_prox = b + 1 < n
+        prox_pos = np.minimum(b + 1, n - 1)
+        proximo = rota[prox_pos]
+        desloc = relogio + tempos_us[anterior, proximo] + visita_us - chegada[prox_pos]
+        tempo_novo += np.where(tem_prox, tempos[anterior, proximo], 0.0)
+        pen_nova += self._penalidade_faixas(
+            np.where(tem_prox, b + 1, n), np.full(len(a), n - 1), desloc
+        )
+
+        fim = np.where(tem_prox, b + 1, b)
+        tempo_antigo = viagem[fim] - viagem[a - 1]
+        deltas = self.alpha * (tempo_novo - tempo_antigo) + pen_nova - pen_sufixo[a]
+        if com_fim:
+            return deltas, np.where(tem_prox, chegada[n - 1] + desloc, relogio)
+        return deltas
+
+    def deltas_insercao(self, bares, q, com_fim=False):
+        """Deltas exatos de inserir bares[k] (fora da rota) logo depois da
+        posição q[k]; a rota ganha um bar, uma visita e a nota dele."""
+        rota = self.rota.bares.astype(np.intp)
+        n = len(rota)
+        bares = np.asarray(bares, dtype=np.intp)
+        tempos = self.instancia.tempos
+        tempos_us = self.instancia.tempos_us
+        chegada = np.asarray(self._chegada, dtype=np.int64)
+        pen_sufixo = np.asarray(self._pen_sufixo[: n + 1])
+        visita_us = self._visita_us
+
+        anterior = rota[q]
+        chegada_bar = chegada[q] + tempos_us[anterior, bares] + visita_us
+        pen_bar = _penalidades_vetor(self.instancia, bares, chegada_bar, self._dia0)
+
+        tem_prox = q + 1 < n
+        prox_pos = np.minimum(q + 1, n - 1)
+        proximo = rota[prox_pos]
+        desloc = chegada_bar + tempos_us[bares, proximo] + visita_us - chegada[prox_pos]
+        pen_sufixo_novo = self._penalidade_faixas(
+            np.where(tem_prox, q + 1, n), np.full(len(q), n - 1), desloc
+        )
+
+        delta_tempo = tempos[anterior, bares] + self._visita_min + np.where(
+            tem_prox, tempos[bares, proximo] - tempos[anterior, proximo], 0.0
+        )
+        delta_pen = pen_bar + pen_sufixo_novo - pen_sufixo[q + 1]
+        deltas = (
+            self.alpha * delta_tempo + delta_pen - self.beta * self.instancia.notas[bares]
+        )
+        if com_fim:
+            return deltas, np.where(tem_prox, chegada[n - 1] + desloc, chegada_bar)
+        return deltas
+
+    def deltas_remocao(self, p, com_fim=False):
+        """Deltas exatos de tirar da rota o bar da posição p[k] (p >= 1)."""
+        rota = self.rota.bares.astype(np.intp)
+        n = len(rota)
+        tempos = self.instancia.tempos
+        tempos_us = self.instancia.tempos_us
+        chegada = np.asarray(self._chegada, dtype=np.int64)
+        pen_sufixo = np.asarray(self._pen_sufixo[: n + 1])
+
+        anterior = rota[p - 1]
+        removido = rota[p]
+        tem_prox = p + 1 < n
+        prox_pos = np.minimum(p + 1, n - 1)
+        proximo = rota[prox_pos]
+        desloc = (
+            chegada[p - 1] + tempos_us[anterior, proximo] + self._visita_us
+            - chegada[prox_pos]
+        )
+        pen_sufixo_novo = self._penalidade_faixas(
+            np.where(tem_prox, p + 1, n), np.full(len(p), n - 1), desloc
+        )
+
+        delta_tempo = -self._visita_min - tempos[anterior, removido] + np.where(
+            tem_prox, tempos[anterior, proximo] - tempos[removido, proximo], 0.0
+        )
+        delta_pen = pen_sufixo_novo - pen_sufixo[p]
+        deltas = (
+            self.alpha * delta_tempo + delta_pen + self.beta * self.instancia.notas[removido]
+        )
+        if com_fim:
+            return deltas, np.where(tem_prox, chegada[n - 1] + desloc, chegada[p - 1])
+        return deltas
+
+    # ------------------------------------------------------------------
+    # atualização
+    # ------------------------------------------------------------------
+    def aplicar_trecho(self, a, trecho):
+        """Substitui as posições a.. pelo `trecho` e atualiza as estruturas."""
+        self.rota.substituir(a, trecho)
+        self._recalcular(a)
+
+    def aplicar_2opt(self, i, j):
+        """Inverte rota[i+1..j] no lugar e atualiza prefixos a partir de i+1."""
+        self.rota.inverter(i + 1, j)
+        self._recalcular(i + 1)
@@ -0,0 +1,152 @@
+import time
+from collections import namedtuple
+
+# retrato de uma busca "anytime" quando a melhor solução muda: a rota (cópia),
+# o custo dela, as iterações concluídas e o tempo desde o início da busca
+Progresso = namedtuple("Progresso", ["rota", "custo", "iteracao", "decorrido_ms"])
+
+
+class CriterioParada:
+    """Critérios de parada de uma busca "anytime", combinados.
+
+    A busca para no primeiro limite atingido:
+
+    - `max_iter`: número de iterações;
+    - `max_iter_sem_melhoria`: iterações seguidas sem melhorar a melhor
+      solução (estagnação);
+    - `tempo_limite_ms`: tempo de relógio desde a criação do critério, em
+      milissegundos;
+    - `max_avaliacoes`: avaliações do objetivo (cada rota ou delta de
+      movimento avaliado conta uma);
+    - `custo_alvo`: a melhor solução chegou a esse custo;
+    - `interromper`: função sem argumentos que devolve True para cancelar a
+      busca de fora (por exemplo, outro processo já achou a resposta).
+
+    Limites None ficam desligados. A busca informa o que fez com
+    `iniciar` (custo da solução inicial, se houver), `registrar_avaliacoes`,
+    `registrar_custo` (cada solução avaliada) e `registrar_iteracao` e consulta
+    `parar()`; quando ele devolve True, `motivo` diz qual limite foi atingido e
+    a busca devolve a melhor solução encontrada até ali.
+    """
+
+    def __init__(
+        self,
+        max_iter=None,
+        max_iter_sem_melhoria=None,
+        tempo_limite_ms=None,
+        max_avaliacoes=None,
+        custo_alvo=None,
+        interromper=None,
+    ):
+        self.max_iter = max_iter
+        self.max_iter_sem_melhoria = max_iter_sem_melhoria
+        self.tempo_limite_ms = tempo_limite_ms
+        self.max_avaliacoes = max_avaliacoes
+        self.custo_alvo = custo_alvo
+        self.interromper = interromper
+
+        self.inicio = time.perf_counter()
+        self.iteracoes = 0
+        self.iteracoes_sem_melhoria = 0
+        self.avaliacoes = 0
+        self.melhor_custo = float("inf")
+        # melhor custo ao fim da iteração anterior, referência da estagnação
+        self._custo_referencia = float("inf")
+        self.motivo = None
+
+    @property
+    def decorrido_ms(self):
+        return (time.perf_counter() - self.inicio) * 1000.0
+
+    def registrar_avaliacoes(self, quantidade=1):
+        self.avaliacoes += int(quantidade)
+
+    def iniciar(self, custo):
+        """Custo da solução inicial: as iterações precisam melhorá-lo."""
+        self.registrar_custo(custo)
+        self._custo_referencia = self.melhor_custo
+
+    def registrar_custo(self, custo):
+        """Custo de uma solução encontrada; guarda o melhor visto."""
+        if custo < self.melhor_custo:
+            self.melhor_custo = custo
+
+    def registrar_iteracao(self, melhor_custo):
+        """Fim de uma iteração cuja melhor solução tem custo `melhor_custo`."""
+        self.iteracoes += 1
+        self.registrar_custo(melhor_custo)
+        if self.melhor_custo < self._custo_referencia:
+            self.iteracoes_sem_melhoria = 0
+        else:
+            self.iteracoes_sem_melhoria += 1
+        self._custo_referencia = self.melhor_custo
+
+    def recursos_esgotados(self):
+        """Como parar(), mas só com os limites que não contam iterações
+        (interrupção, custo alvo, tempo e avaliações): diz se ainda há
+        orçamento para uma fase extra depois do laço principal."""
+        if self.interromper is not None and self.interromper():
+            self.motivo = "interrompida"
+        elif self.custo_alvo is not None and self.melhor_custo <= self.custo_alvo:
+            self.motivo = "custo_alvo"
+        elif self.tempo_limite_ms is not None and self.decorrido_ms >= self.tempo_limite_ms:
+            self.motivo = "tempo"
+        elif self.max_avaliacoes is not None and self.avaliacoes >= self.max_avaliacoes:
+            self.motivo = "avaliacoes"
+        else:
+            return False
+        return True
+
+    def parar(self):
+        """True se algum limite foi atingido (e guarda o motivo)."""
+        if self.recursos_esgotados():
+            return True
+        if self.max_iter is not None and self.iteracoes >= self.max_iter:
+            self.motivo = "max_iter"
+        elif (
+            self.max_iter_sem_melhoria is not None
+            and self.iteracoes_sem_melhoria >= self.max_iter_sem_melhoria
+        ):
+            self.motivo = "estagnacao"
+        else:
+            return False
+        return True
+
+    def progresso(self, rota, custo):
+        """Progresso da busca com a melhor solução `rota` de custo `custo`."""
+        return Progresso(rota, custo, self.iteracoes, self.decorrido_ms)
+
+    def derivar(self, max_iter=None, max_iter_sem_melhoria=None):
+        """Critério para uma busca interna (por exemplo, a busca local depois
+        de um religamento): herda o tempo e as avaliações que restam, o custo
+        alvo e a interrupção, com limites de iteração próprios."""
+        tempo_limite_ms = None
+        if self.tempo_limite_ms is not None:
+            tempo_limite_ms = max(0.0, self.tempo_limite_ms - self.decorrido_ms)
+        max_avaliacoes = None
+        if self.max_avaliacoes is not None:
+            max_avaliacoes = max(0, self.max_avaliacoes - self.avaliacoes)
+        return CriterioParada(
+            max_iter=max_iter,
+            max_iter_sem_melhoria=max_iter_sem_melhoria,
+            tempo_limite_ms=tempo_limite_ms,
+            max_avaliacoes=max_avaliacoes,
+            custo_alvo=self.custo_alvo,
+            interromper=self.interromper,
+        )
+
+    def descricao(self):
+        """Frase curta com o motivo da parada, para logs."""
+        if self.motivo == "interrompida":
+            return "Busca interrompida."
+        if self.motivo == "custo_alvo":
+            return f"Custo alvo {self.custo_alvo:.2f} atingido."
+        if self.motivo == "tempo":
+            return f"Tempo limite de {self.tempo_limite_ms:.0f} ms esgotado."
+        if self.motivo == "avaliacoes":
+            return f"Limite de {self.max_avaliacoes} avaliações atingido."
+        if self.motivo == "max_iter":
+            return f"Limite de {self.max_iter} iterações atingido."
+        if self.motivo == "estagnacao":
+            return f"Sem melhoria por {self.max_iter_sem_melhoria} iterações."
+        return "Busca em andamento."
@@ -0,0 +1,88 @@
+import numpy as np
+
+try:
+    from .rota import Route
+except Exception:
+    from rota import Route
+
+
+def distancia_arestas(rota_a, rota_b):
+    """Quantas arestas de rota_a (sem sentido) não aparecem em rota_b."""
+    a = np.asarray(rota_a)
+    b = np.asarray(rota_b)
+    arestas_b = set(zip(np.minimum(b[:-1], b[1:]).tolist(), np.maximum(b[:-1], b[1:]).tolist()))
+    arestas_a = zip(np.minimum(a[:-1], a[1:]).tolist(), np.maximum(a[:-1], a[1:]).tolist())
+    return sum(aresta not in arestas_b for aresta in arestas_a)
+
+
+class ConjuntoElite:
+    """Conjunto limitado de boas rotas, diversas entre si.
+
+    Rotas repetidas são descartadas pela chave canônica (Route.chave). Uma
+    rota nova precisa diferir em pelo menos `distancia_min` arestas
+    (distancia_arestas) de todas as do conjunto, a menos que seja melhor que
+    todas. Cheio, o conjunto só aceita rotas melhores que a pior; a que sai é a
+    mais parecida com a nova entre as piores que ela, o que preserva a
+    diversidade. Com `distancia_min=None`, vale um décimo do tamanho da rota.
+
+    As rotas ficam ordenadas por custo (`rotas[0]` é a melhor) e são cópias:
+    mudar a rota oferecida depois não altera o conjunto.
+    """
+
+    def __init__(self, capacidade=10, distancia_min=None):
+        self.capacidade = capacidade
+        self.distancia_min = distancia_min
+        self.rotas = []
+        self.custos = []
+        self._chaves = set()
+
+    def __len__(self):
+        return len(self.rotas)
+
+    def melhor(self):
+        """(rota, custo) da melhor rota do conjunto, ou (None, inf)."""
+        if not self.rotas:
+            return None, float("inf")
+        return self.rotas[0], self.custos[0]
+
+    def oferecer(self, rota, custo):
+        """Tenta incluir a rota; True se ela entrou."""
+        if not np.isfinite(custo):
+            return False
+        chave = rota.chave() if isinstance(rota, Route) else np.asarray(rota, dtype=np.int32).tobytes()
+        if chave in self._chaves:
+            return False
+        cheio = len(self.rotas) >= self.capacidade
+        if cheio and custo >= self.custos[-1]:
+            return False
+
+        distancias = [distancia_arestas(rota, outra) for outra in self.rotas]
+        distancia_min = self.distancia_min
+        if distancia_min is None:
+            distancia_min = max(1, len(rota) // 10)
+        melhor_de_todas = not self.custos or custo < self.custos[0]
+        if not melhor_de_todas and distancias and min(distancias) < distancia_min:
+            return False
+
+        if cheio:
+            piores = [k for k, c in enumerate(self.custos) if c > custo]
+            sai = min(piores, key=lambda k: distancias[k])
+            self._chaves.discard(self.rotas[sai].chave())
+            del self.rotas[sai]
+            del self.custos[sai]
+
+        nova = rota.copia() if isinstance(rota, Route) else Route(rota)
+        posicao = int(np.searchsorted(self.custos, custo, side="right"))
+        self.rotas.insert(posicao, nova)
+        self.custos.insert(posicao, custo)
+        self._chaves.add(chave)
+        return True
+
+    def pares(self):
+        """Pares (origem, guia) para o religamento de caminhos: cada par de
+        rotas do conjunto, partindo da melhor das duas."""
+        return [
+            (self.rotas[i], self.rotas[j])
+            for i in range(len(self.rotas))
+            for j in range(i + 1, len(self.rotas))
+        ]
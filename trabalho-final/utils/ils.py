@@ -0,0 +1,286 @@
+"""
+Busca local iterada (ILS) sobre a Busca Tabu.
+
+Em vez de parar quando a Busca Tabu estagna, o ILS perturba a melhor solução
+atual (double-bridge ou embaralhamento de trechos), roda de novo a busca
+local a partir da rota perturbada e decide se aceita o resultado. A busca
+local é a própria tabu_search, com deltas incrementais e a mesma instância
+compilada em todas as rodadas, então cada rodada custa uma fração de uma busca
+a partir do zero.
+"""
+
+import math
+
+import numpy as np
+
+try:
+    from .avalia_rota import ProblemInstance
+    from .avaliacao_incremental import AvaliadorIncremental
+    from .criterios_parada import CriterioParada
+    from .elite import ConjuntoElite
+    from .religamento import religar_caminho
+    from .rota import Route
+    from .tabu_search import tabu_search
+except Exception:
+    from avalia_rota import ProblemInstance
+    from avaliacao_incremental import AvaliadorIncremental
+    from criterios_parada import CriterioParada
+    from elite import ConjuntoElite
+    from religamento import religar_caminho
+    from rota import Route
+    from tabu_search import tabu_search
+
+
+PERTURBACOES = ("double_bridge", "embaralhar_trechos")
+ACEITACOES = ("melhor", "recozimento")
+
+
+def _cortes(n, primeiro, quantidade, rng):
+    """`quantidade` posições de corte distintas e ordenadas em primeiro+1..n-1."""
+    return np.sort(rng.choice(np.arange(primeiro + 1, n), quantidade, replace=False))
+
+
+def double_bridge(rota, rng, primeiro=0):
+    """A B C D -> A C B D, com três cortes aleatórios depois de `primeiro`.
+
+    Numa rota aberta é a versão do double-bridge sem volta ao início: troca a
+    ordem de dois trechos consecutivos sem invertê-los, um movimento que o
+    2-opt e o or-opt de trechos curtos não desfazem em poucos passos.
+    """
+    rota = list(rota)
+    if len(rota) - primeiro < 4:
+        return rota
+    a, b, c = _cortes(len(rota), primeiro, 3, rng).tolist()
+    return rota[:a] + rota[b:c] + rota[a:b] + rota[c:]
+
+
+def embaralhar_trechos(rota, rng, primeiro=0, trechos=4):
+    """Corta a rota depois de `primeiro` em `trechos` pedaços e embaralha a
+    ordem deles (cada pedaço mantém sua ordem interna)."""
+    rota = list(rota)
+    trechos = min(trechos, len(rota) - primeiro - 1)
+    if trechos < 2:
+        return rota
+    cortes = [primeiro + 1] + _cortes(len(rota), primeiro + 1, trechos - 1, rng).tolist()
+    pedacos = [rota[i:j] for i, j in zip(cortes, cortes[1:] + [len(rota)])]
+    ordem = rng.permutation(len(pedacos))
+    return rota[:primeiro + 1] + [bar for k in ordem for bar in pedacos[k]]
+
+
+def busca_local_iterada(
+    rota_inicial,
+    tempos,
+    bares,
+    hora_inicial,
+    hora_final,
+    tempo_visita,
+    alpha=1.0,
+    beta=20.0,
+    perturbacao="double_bridge",
+    aceitacao="melhor",
+    temperatura=None,
+    resfriamento=0.95,
+    max_perturbacoes=50,
+    max_perturbacoes_sem_melhoria=None,
+    tempo_limite_ms=None,
+    custo_alvo=None,
+    semente=None,
+    instancia=None,
+    indices_bares=None,
+    fixar_inicio=False,
+    orientacao=False,
+    elite=None,
+    religamento=False,
+    verbose=True,
+    **parametros_tabu,
+):
+    """ILS: descida inicial com tabu_search (solução inicial NN, via
+    construir_solucao_vizinho_mais_proximo) e depois, a cada rodada,
+    perturbação da solução atual + tabu_search a partir dela + aceitação.
+
+    `perturbacao` é "double_bridge" ou "embaralhar_trechos"; com `fixar_inicio`
+    o primeiro bar nunca sai do lugar. `aceitacao` é "melhor" (só aceita rotas
+    de custo menor que a atual) ou "recozimento" (aceita uma piora d com
+    probabilidade exp(-d / T), e T é multiplicada por `resfriamento` a cada
+    rodada; `temperatura` é o T inicial, por padrão 1% do custo inicial em
+    módulo).
+
+    Para quando chega a `max_perturbacoes` rodadas, `max_perturbacoes_sem_melhoria`
+    rodadas sem melhorar a melhor rota, `tempo_limite_ms` (prazo único,
+    incluindo as buscas locais) ou `custo_alvo`. Os demais argumentos nomeados
+    (tabu_tam, operadores, max_iter, max_iter_sem_melhoria...) configuram cada
+    busca local; por padrão ela para após 10 iterações sem melhoria.
+
+    `elite` e `religamento` valem para o ILS, não para as buscas locais (que
+    rodam sempre sem conjunto de elite nem religamento, senão cada rodada
+    faria o próprio religamento completo). Os ótimos locais de cada rodada vão
+    para o conjunto de elite (capacidade ou ConjuntoElite; 10 rotas se não for
+    dado) e, com `religamento=True`, cada ótimo local é religado a uma rota de
+    elite sorteada (religar_caminho), e a melhor rota intermediária passa por
+    uma busca local e disputa com ele o lugar de candidata da rodada.
+
+    Devolve (melhor_rota, melhor_custo, historico), com uma entrada por rodada
+    em historico["perturbacao"], ["custo_candidato"], ["custo_atual"] e
+    ["custo_melhor"].
+    """
+    if perturbacao not in PERTURBACOES:
+        raise ValueError(f"Perturbação desconhecida: {perturbacao}")
+    if aceitacao not in ACEITACOES:
+        raise ValueError(f"Regra de aceitação desconhecida: {aceitacao}")
+
+    parada = CriterioParada(
+        max_iter=max_perturbacoes,
+        max_iter_sem_melhoria=max_perturbacoes_sem_melhoria,
+        tempo_limite_ms=tempo_limite_ms,
+        custo_alvo=custo_alvo,
+    )
+
+    if instancia is None:
+        instancia = ProblemInstance(bares, tempos)
+
+    if indices_bares is not None:
+        indices_bares = np.asarray(indices_bares, dtype=np.intp)
+        locais = {bar: k for k, bar in enumerate(indices_bares.tolist())}
+        melhor, melhor_custo, historico = busca_local_iterada(
+            [locais[bar] for bar in rota_inicial if bar in locais],
+            None,
+            None,
+            hora_inicial,
+            hora_final,
+            tempo_visita,
+            alpha=alpha,
+            beta=beta,
+            perturbacao=perturbacao,
+            aceitacao=aceitacao,
+            temperatura=temperatura,
+            resfriamento=resfriamento,
+            max_perturbacoes=max_perturbacoes,
+            max_perturbacoes_sem_melhoria=max_perturbacoes_sem_melhoria,
+            tempo_limite_ms=tempo_limite_ms,
+            custo_alvo=custo_alvo,
+            semente=semente,
+            instancia=instancia.subinstancia(indices_bares),
+            fixar_inicio=fixar_inicio,
+            orientacao=orientacao,
+            elite=elite,
+            religamento=religamento,
+            verbose=verbose,
+            **parametros_tabu,
+        )
+        return Route(indices_bares[melhor.bares], instancia.n), melhor_custo, historico
+
+    rng = np.random.default_rng(semente)
+    parametros_tabu.setdefault("max_iter_sem_melhoria", 10)
+    primeiro = 0 if fixar_inicio else -1
+
+    conjunto_elite = elite
+    if isinstance(elite, int):
+        conjunto_elite = ConjuntoElite(elite) if elite > 0 else None
+    if religamento and conjunto_elite is None:
+        conjunto_elite = ConjuntoElite()
+
+    def busca_local(rota, inicial):
+        # cada busca local respeita o prazo e o custo alvo do ILS
+        restante = None
+        if tempo_limite_ms is not None:
+            restante = max(0.0, tempo_limite_ms - parada.decorrido_ms)
+        rota, custo, _ = tabu_search(
+            rota,
+            instancia.tempos,
+            None,
+            hora_inicial,
+            hora_final,
+            tempo_visita,
+            alpha=alpha,
+            beta=beta,
+            usar_solucao_inicial_inteligente=inicial,
+            verbose=False,
+            instancia=instancia,
+            fixar_inicio=fixar_inicio,
+            orientacao=orientacao,
+            tempo_limite_ms=restante,
+            custo_alvo=custo_alvo,
+            rng=rng,
+            elite=None,
+            religamento=False,
+            **parametros_tabu,
+        )
+        return rota, custo
+
+    def religar(rota, custo):
+        # caminho do ótimo local da rodada até uma rota de elite sorteada
+        outras = [k for k, guia in enumerate(conjunto_elite.rotas) if guia != rota]
+        if not outras:
+            return rota, custo
+        guia = conjunto_elite.rotas[outras[int(rng.integers(len(outras)))]]
+        intermediaria, _ = religar_caminho(
+            AvaliadorIncremental(
+                instancia, rota, hora_inicial, hora_final, tempo_visita,
+                alpha, beta, orientacao,
+            ),
+            guia,
+            parada,
+        )
+        if intermediaria is None or parada.recursos_esgotados():
+            return rota, custo
+        religada, custo_religada = busca_local(intermediaria, False)
+        if custo_religada < custo:
+            return religada, custo_religada
+        return rota, custo
+
+    atual, custo_atual = busca_local(rota_inicial, True)
+    melhor, melhor_custo = atual.copia(), custo_atual
+    if conjunto_elite is not None:
+        conjunto_elite.oferecer(atual, custo_atual)
+    parada.iniciar(melhor_custo)
+    if verbose:
+        print(f"Solução inicial (NN + busca local): {melhor_custo:.2f}")
+
+    if temperatura is None:
+        temperatura = 0.01 * abs(custo_atual) or 1.0
+
+    historico = {
+        "perturbacao": [],
+        "custo_candidato": [],
+        "custo_atual": [],
+        "custo_melhor": [],
+    }
+
+    while not parada.parar():
+        if perturbacao == "double_bridge":
+            perturbada = double_bridge(atual, rng, primeiro)
+        else:
+            perturbada = embaralhar_trechos(atual, rng, primeiro)
+        candidata, custo_candidata = busca_local(perturbada, False)
+        if religamento:
+            candidata, custo_candidata = religar(candidata, custo_candidata)
+        if conjunto_elite is not None:
+            conjunto_elite.oferecer(candidata, custo_candidata)
+
+        diferenca = custo_candidata - custo_atual
+        if diferenca < 0:
+            aceita = True
+        elif aceitacao == "recozimento" and math.isfinite(diferenca):
+            aceita = rng.random() < math.exp(-diferenca / temperatura)
+        else:
+            aceita = False
+        if aceita:
+            atual, custo_atual = candidata, custo_candidata
+        temperatura *= resfriamento
+
+        if custo_atual < melhor_custo:
+            melhor, melhor_custo = atual.copia(), custo_atual
+            if verbose:
+                print(f"Perturbação {parada.iteracoes}: Nova melhor = {melhor_custo:.2f}")
+
+        historico["perturbacao"].append(parada.iteracoes)
+        historico["custo_candidato"].append(custo_candidata)
+        historico["custo_atual"].append(custo_atual)
+        historico["custo_melhor"].append(melhor_custo)
+        parada.registrar_iteracao(melhor_custo)
+
+    if verbose:
+        print(f"{parada.descricao()} Parando após {parada.iteracoes} perturbações.")
+        print(f"✅ ILS concluído! Melhor custo: {melhor_custo:.2f}")
+
+    return melhor, melhor_custo, historico
@@ -0,0 +1,195 @@
+"""
+Busca de profundidade variável no estilo Lin–Kernighan (LK com movimentos
+2-opt sequenciais, como em Johnson e McGeoch).
+
+Uma cadeia parte de um bar t1 e de um vizinho t2 dele na rota. Cada passo
+desfaz a aresta (t1, t2), cria (t2, t3) com t3 na lista candidata de t2 e
+fecha a rota com (t1, t4), onde t4 é o vizinho de t3 que torna o passo um
+2-opt. O passo seguinte recomeça de (t1, t4). A cadeia continua enquanto o
+ganho acumulado, somado ao peso da aresta de fechamento, for positivo (o
+critério de ganho do LK), e é aceita no primeiro ponto em que a rota
+completa fica mais barata; senão os passos são desfeitos. Uma aresta criada
+na cadeia não é desfeita nela, e vice-versa.
+
+O motor só precisa de um avaliador com `rota` (Route), `custo`,
+`deltas_2opt(movimentos)` e `aplicar_2opt(i, j)`: o AvaliadorIncremental
+(objetivo completo da Busca Tabu, rota aberta) ou o AvaliadorCircuito abaixo
+(distância do circuito fechado, usada pelo ACO). O primeiro bar da rota nunca
+sai do lugar.
+"""
+
+from collections import deque
+
+import numpy as np
+
+try:
+    from .rota import Route
+except Exception:
+    from rota import Route
+
+
+class AvaliadorCircuito:
+    """Custo de um circuito fechado (soma das arestas, com a volta ao início)
+    sobre uma matriz simétrica, com a interface de 2-opt do
+    AvaliadorIncremental. A posição n equivale à posição 0. `matriz` pode ser
+    um array ou uma lista de listas (mais barata de indexar; quem cria muitos
+    avaliadores converte uma vez só)."""
+
+    def __init__(self, matriz, rota):
+        if isinstance(matriz, np.ndarray):
+            matriz = matriz.tolist()
+        self._matriz = matriz
+        self.rota = Route(rota, len(matriz))
+        # cópia em lista para os laços escalares, como no AvaliadorIncremental
+        self._bares = self.rota.tolist()
+        bares = self._bares
+        self.custo = float(sum(matriz[a][b] for a, b in zip(bares, bares[1:] + bares[:1])))
+
+    def _delta(self, i, j):
+        bares = self._bares
+        a, b, c = bares[i], bares[i + 1], bares[j]
+        e = bares[j + 1] if j + 1 < len(bares) else bares[0]
+        if e == a:
+            return 0.0
+        d = self._matriz
+        return d[a][c] + d[b][e] - d[a][b] - d[c][e]
+
+    def deltas_2opt(self, movimentos):
+        for i, j in movimentos:
+            yield i, j, self._delta(i, j)
+
+    def aplicar_2opt(self, i, j):
+        self.custo += self._delta(i, j)
+        self.rota.inverter(i + 1, j)
+        self._bares[i + 1 : j + 1] = self._bares[j:i:-1]
+
+
+def _passos(bares, posicao, t1, t2, candidatos, criadas, desfeitas):
+    """Passos LK a partir de (t1, t2): lista de (i, j, t3, t4) do 2-opt (i, j)
+    que desfaz (t1, t2) e (t3, t4), cria (t2, t3) e deixa t4 ao lado de t1.
+    O passo que leva t2 para o fim da rota tem t3 None."""
+    n = len(bares)
+    p = posicao[t1]
+    sucessor = posicao[t2] == p + 1
+    passos = []
+    for t3 in candidatos[t2]:
+        k = posicao.get(t3, -1)
+        if k < 0 or t3 == t1 or (t2, t3) in desfeitas:
+            continue
+        if sucessor:
+            if k >= p + 3:
+                i, j, pos_t4 = p, k - 1, k - 1
+            elif 1 <= k <= p - 1:
+                i, j, pos_t4 = k - 1, p, k - 1
+            else:
+                continue
+        else:
+            if p + 1 <= k < n - 1:
+                i, j, pos_t4 = p - 1, k, k + 1
+            elif k <= p - 3:
+                i, j, pos_t4 = k, p - 1, k + 1
+            else:
+                continue
+        t4 = bares[pos_t4]
+        if (t3, t4) in criadas:
+            continue
+        passos.append((i, j, t3, t4))
+    if sucessor and p + 2 < n - 1:
+        passos.append((p, n - 1, None, bares[n - 1]))
+    return passos
+
+
+def lin_kernighan(
+    avaliador,
+    candidatos,
+    pesos,
+    escala=1.0,
+    profundidade_max=10,
+    largura=(3, 2),
+    bares=None,
+    parada=None,
+):
+    """Aplica cadeias LK na rota do avaliador (in-place) até nenhuma melhorar.
+
+    `candidatos[bar]` é a lista candidata de cada bar (vizinhos_mais_proximos)
+    e `pesos[a][b] * escala` é o peso de uma aresta no critério de ganho (a
+    matriz de tempos e alpha, para o objetivo da Busca Tabu). Em cada nível da
+    cadeia são tentados os `largura[nivel]` melhores passos (um só além dos
+    níveis listados); a cadeia tem no máximo `profundidade_max` passos.
+
+    Bares sem cadeia que melhore ficam com o bit "don't look" ligado até uma
+    cadeia aceita mexer neles. `bares` restringe os pontos de partida (padrão:
+    a rota toda). `parada` (CriterioParada) conta as avaliações e interrompe
+    quando o tempo ou as avaliações acabam.
+
+    Devolve a redução total de custo.
+    """
+    pesos = pesos.tolist() if isinstance(pesos, np.ndarray) else pesos
+    custo_inicial = avaliador.custo
+    # espelho em lista da rota e das posições, atualizado a cada inversão
+    ordem = avaliador.rota.tolist()
+    posicao = {bar: p for p, bar in enumerate(ordem)}
+    fila = deque(ordem if bares is None else bares)
+    na_fila = set(fila)
+
+    def inverter(i, j):
+        avaliador.aplicar_2opt(i, j)
+        ordem[i + 1 : j + 1] = ordem[j:i:-1]
+        for p in range(i + 1, j + 1):
+            posicao[ordem[p]] = p
+
+    def cadeia(t1, t2, nivel, custo_origem, criadas, desfeitas, tocados):
+        passos = _passos(ordem, posicao, t1, t2, candidatos, criadas, desfeitas)
+        if not passos:
+            return False
+        por_movimento = {(i, j): (t3, t4) for i, j, t3, t4 in passos}
+        avaliados = sorted(
+            (delta, i, j) for i, j, delta in avaliador.deltas_2opt(list(por_movimento))
+        )
+        if parada is not None:
+            parada.registrar_avaliacoes(len(avaliados))
+        tentativas = largura[nivel] if nivel < len(largura) else 1
+
+        for delta, i, j in avaliados[:tentativas]:
+            t3, t4 = por_movimento[(i, j)]
+            # critério de ganho: o que já se ganhou mais a aresta (t1, t4),
+            # que o próximo passo desfaz, precisa ser positivo
+            ganho = custo_origem - (avaliador.custo + delta)
+            if not ganho + escala * pesos[t1][t4] > 0:
+                break
+            inverter(i, j)
+            if avaliador.custo < custo_origem - 1e-9:
+                tocados.update((t2, t4) if t3 is None else (t2, t3, t4))
+                return True
+            if nivel + 1 < profundidade_max:
+                novas = {(t2, t3), (t3, t2)} if t3 is not None else set()
+                velhas = {(t1, t2), (t2, t1)}
+                if t3 is not None:
+                    velhas |= {(t3, t4), (t4, t3)}
+                if cadeia(t1, t4, nivel + 1, custo_origem, criadas | novas, desfeitas | velhas, tocados):
+                    tocados.update((t2, t4) if t3 is None else (t2, t3, t4))
+                    return True
+            # a mesma inversão desfaz o passo
+            inverter(i, j)
+        return False
+
+    while fila:
+        if parada is not None and parada.recursos_esgotados():
+            break
+        t1 = fila.popleft()
+        na_fila.discard(t1)
+        p = posicao.get(t1, -1)
+        if p < 0:
+            continue
+        vizinhos = [ordem[q] for q in (p + 1, p - 1) if 0 <= q < len(ordem)]
+        for t2 in vizinhos:
+            tocados = {t1}
+            custo_origem = avaliador.custo
+            if cadeia(t1, t2, 0, custo_origem, set(), set(), tocados):
+                for bar in tocados:
+                    if bar not in na_fila:
+                        fila.append(bar)
+                        na_fila.add(bar)
+                break
+
+    return custo_inicial - avaliador.custo
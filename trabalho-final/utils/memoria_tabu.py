@@ -0,0 +1,149 @@
+import numpy as np
+
+
+class MemoriaTabu:
+    """Memória tabu por atributo (arestas entre bares).
+
+    `ate[a, b]` é a última iteração em que a aresta {a, b} continua proibida.
+    Ao aplicar um movimento, as arestas que ele desfaz ficam proibidas por
+    `duracao` iterações; um movimento é tabu se recria alguma delas. Consultar é
+    uma leitura no array (ou uma máscara NumPy para um lote de movimentos), e o
+    custo não depende da duração nem do tamanho da rota.
+
+    O índice `n` (uma linha/coluna extra) representa "nenhum bar", usado como
+    ponta das arestas que saem do fim de uma rota aberta; ele nunca é proibido.
+    """
+
+    def __init__(self, n, duracao):
+        self.n = n
+        self.duracao = duracao
+        self.ate = np.full((n + 1, n + 1), -1, dtype=np.int64)
+
+    def proibir(self, arestas, iteracao):
+        """Proíbe recriar `arestas` [(a, b), ...] até iteracao + duracao."""
+        ate = iteracao + self.duracao
+        for a, b in arestas:
+            if a != b and a != self.n and b != self.n:
+                self.ate[a, b] = ate
+                self.ate[b, a] = ate
+
+    def eh_tabu(self, arestas, iteracao):
+        """True se alguma das arestas [(a, b), ...] ainda está proibida."""
+        return any(self.ate[a, b] >= iteracao for a, b in arestas)
+
+    def mascara(self, arestas, iteracao):
+        """Versão em lote de eh_tabu: `arestas` é uma lista de pares de arrays
+        (a, b) com uma entrada por movimento."""
+        tabu = None
+        for a, b in arestas:
+            proibida = self.ate[a, b] >= iteracao
+            tabu = proibida if tabu is None else tabu | proibida
+        return tabu
+
+
+class MemoriaTabuReativa(MemoriaTabu):
+    """MemoriaTabu com duração reativa (Battiti e Tecchiolli).
+
+    A cada iteração a busca informa a chave da rota corrente
+    (`registrar_rota`). Rever uma rota indica ciclo: a duração cresce por
+    `aumento`. Se a busca passa mais que o ciclo médio observado sem repetir
+    rotas, ela decresce por `reducao`. A duração fica entre `duracao_min` e
+    `duracao_max` (padrões: n // 10 e n // 2), então não precisa ser ajustada
+    para cada tamanho de instância.
+
+    Quando mais de `max_caoticas` rotas já foram vistas `max_repeticoes` vezes,
+    a busca está presa numa região; `registrar_rota` devolve True para que ela
+    diversifique, e as contagens recomeçam.
+    """
+
+    def __init__(
+        self,
+        n,
+        duracao,
+        duracao_min=None,
+        duracao_max=None,
+        aumento=1.2,
+        reducao=0.95,
+        max_repeticoes=3,
+        max_caoticas=3,
+    ):
+        super().__init__(n, duracao)
+        self.duracao_min = duracao_min if duracao_min is not None else max(1, n // 10)
+        self.duracao_max = duracao_max if duracao_max is not None else max(self.duracao_min, n // 2)
+        self.aumento = aumento
+        self.reducao = reducao
+        self.max_repeticoes = max_repeticoes
+        self.max_caoticas = max_caoticas
+
+        self._duracao = float(duracao)
+        self._visitas = {}  # chave da rota -> [última iteração, vezes vista]
+        self._ultima_mudanca = 0
+        self._ciclo_medio = 1.0
+        self._caoticas = 0
+
+    def _ajustar(self, fator, iteracao):
+        self._duracao = min(max(self._duracao * fator, self.duracao_min), self.duracao_max)
+        # arredonda para cima para que um aumento sempre mude a duração
+        self.duracao = int(-(-self._duracao // 1))
+        self._ultima_mudanca = iteracao
+
+    def registrar_rota(self, chave, iteracao):
+        """Registra a rota corrente; True se a busca deve diversificar."""
+        visita = self._visitas.get(chave)
+        if visita is None:
+            self._visitas[chave] = [iteracao, 1]
+            if iteracao - self._ultima_mudanca > self._ciclo_medio:
+                self._ajustar(self.reducao, iteracao)
+            return False
+
+        ciclo = iteracao - visita[0]
+        visita[0] = iteracao
+        visita[1] += 1
+        if visita[1] > self.max_repeticoes:
+            self._caoticas += 1
+            if self._caoticas > self.max_caoticas:
+                self._caoticas = 0
+                self._visitas.clear()
+                return True
+        if ciclo < 2 * (self.n - 1):
+            self._ciclo_medio = 0.1 * ciclo + 0.9 * self._ciclo_medio
+            self._ajustar(self.aumento, iteracao)
+        return False
+
+
+class MemoriaFrequencia:
+    """Memória de longo prazo: quantas vezes cada aresta {a, b} entrou na rota.
+
+    `penalidade` devolve, para um movimento, a soma das frequências relativas
+    (vezes / iterações) das arestas que ele cria; nas fases de diversificação
+    a busca soma isso ao custo dos movimentos que não melhoram, afastando-se
+    das arestas mais usadas. Como em MemoriaTabu, o índice `n` é o fim da
+    rota aberta e não é contado.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.vezes = np.zeros((n + 1, n + 1), dtype=np.int64)
+        self.iteracoes = 0
+
+    def registrar(self, arestas):
+        """Conta as arestas [(a, b), ...] que um movimento aplicado criou."""
+        self.iteracoes += 1
+        for a, b in arestas:
+            if a != self.n and b != self.n:
+                self.vezes[a, b] += 1
+                self.vezes[b, a] += 1
+
+    def penalidade(self, arestas):
+        """Frequência relativa somada das arestas [(a, b), ...]."""
+        if not self.iteracoes:
+            return 0.0
+        return sum(int(self.vezes[a, b]) for a, b in arestas) / self.iteracoes
+
+    def penalidades(self, arestas):
+        """Versão em lote de penalidade: `arestas` é uma lista de pares de
+        arrays (a, b) com uma entrada por movimento."""
+        total = 0
+        for a, b in arestas:
+            total = total + self.vezes[a, b]
+        return np.asarray(total, dtype=np.float64) / max(self.iteracoes, 1)
@@ -0,0 +1,239 @@
+"""
+Busca Tabu com vários pontos de partida independentes rodando em paralelo
+num pool de processos.
+
+A instância compilada (matrizes de tempos, notas e horários) vai para cada
+processo uma única vez, pelo inicializador do pool: com o método "fork" os
+filhos herdam a memória do pai sem serializar nada, e nos demais métodos ela
+é serializada uma vez por processo, não por tarefa. Cada partida recebe o
+próprio numpy.random.Generator, derivado de uma SeedSequence, que embaralha
+a rota dos reinícios aleatórios e segue para a busca; o resultado depende só
+da `semente`, não da ordem em que os processos terminam.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from .avalia_rota import ProblemInstance
+    from .criterios_parada import CriterioParada
+    from .rota import Route
+    from .tabu_search import construir_solucao_vizinho_mais_proximo, tabu_search
+except Exception:
+    from avalia_rota import ProblemInstance
+    from criterios_parada import CriterioParada
+    from rota import Route
+    from tabu_search import construir_solucao_vizinho_mais_proximo, tabu_search
+
+
+# estado do processo trabalhador, preenchido uma vez por _iniciar_trabalhador
+_estado = None
+
+
+def _iniciar_trabalhador(estado):
+    global _estado
+    _estado = estado
+
+
+def _contexto_processos():
+    # fork compartilha as matrizes com os filhos sem cópia nem serialização
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def _executar_partida(indice, rota, tipo, semente, prazo):
+    """Uma Busca Tabu completa a partir de `rota`, no processo trabalhador.
+
+    Nos reinícios aleatórios (`tipo` "aleatoria"), a própria partida embaralha
+    `rota` com o seu Generator (mantendo o primeiro bar se ele é fixo).
+    """
+    estado = _estado
+    parametros = dict(estado["parametros"])
+    fixar_inicio = estado["fixar_inicio"]
+    rng = np.random.default_rng(semente)
+    if tipo == "aleatoria":
+        primeiro = 1 if fixar_inicio else 0
+        rota = list(rota[:primeiro]) + rng.permutation(rota[primeiro:]).tolist()
+    tempo_limite_ms = None
+    if prazo is not None:
+        tempo_limite_ms = max(0.0, (prazo - time.time()) * 1000.0)
+    parada = CriterioParada(
+        max_iter=parametros.pop("max_iter", 100),
+        max_iter_sem_melhoria=parametros.pop("max_iter_sem_melhoria", 30),
+        tempo_limite_ms=tempo_limite_ms,
+        max_avaliacoes=parametros.pop("max_avaliacoes", None),
+        custo_alvo=parametros.pop("custo_alvo", None),
+    )
+
+    inicio = time.perf_counter()
+    melhor, custo, historico = tabu_search(
+        rota,
+        estado["instancia"].tempos,
+        None,
+        estado["hora_inicial"],
+        estado["hora_final"],
+        estado["tempo_visita"],
+        usar_solucao_inicial_inteligente=False,
+        verbose=False,
+        instancia=estado["instancia"],
+        fixar_inicio=fixar_inicio,
+        parada=parada,
+        rng=rng,
+        **parametros,
+    )
+    return {
+        "inicio": indice,
+        "tipo": tipo,
+        "rota": melhor.tolist(),
+        "custo": custo,
+        "iteracoes": len(historico["iteracao"]),
+        "avaliacoes": parada.avaliacoes,
+        "tempo_s": time.perf_counter() - inicio,
+        "motivo_parada": parada.motivo,
+    }
+
+
+def _rotas_iniciais(instancia, rota_inicial, n_starts, fixar_inicio, rng):
+    """Metade das partidas (arredondando para cima) são rotas NN de pontos de
+    partida distintos; as demais, e as que faltarem quando o primeiro bar é
+    fixo, são reinícios aleatórios, que saem daqui com a rota base (o primeiro
+    bar e depois os outros em ordem) e são embaralhados por _executar_partida."""
+    n = instancia.n
+    if fixar_inicio:
+        primeiro = rota_inicial[0]
+        pontos_nn = [primeiro]
+        base = [primeiro] + [bar for bar in range(n) if bar != primeiro]
+    else:
+        pontos_nn = rng.permutation(n)[: (n_starts + 1) // 2].tolist()
+        base = list(range(n))
+
+    rotas = []
+    for ponto in pontos_nn[:n_starts]:
+        rotas.append(
+            (construir_solucao_vizinho_mais_proximo(instancia._tempos, ponto), "nn")
+        )
+    while len(rotas) < n_starts:
+        rotas.append((list(base), "aleatoria"))
+    return rotas
+
+
+def tabu_search_multistart(
+    rota_inicial,
+    tempos,
+    bares,
+    hora_inicial,
+    hora_final,
+    tempo_visita,
+    n_starts=8,
+    workers=None,
+    semente=None,
+    instancia=None,
+    indices_bares=None,
+    fixar_inicio=False,
+    tempo_limite_ms=None,
+    verbose=True,
+    **parametros_tabu,
+):
+    """Roda `n_starts` Buscas Tabu independentes em até `workers` processos
+    (padrão: os.cpu_count()) e devolve a melhor.
+
+    As partidas começam de rotas vizinho mais próximo com pontos de partida
+    distintos e de reinícios aleatórios (com `fixar_inicio`, todas mantêm
+    rota_inicial[0] na frente). `semente` alimenta uma numpy.random.SeedSequence
+    cujos filhos (SeedSequence.spawn) sorteiam os pontos de partida NN e dão
+    o Generator de cada partida, que embaralha os reinícios aleatórios e
+    segue para tabu_search: a mesma semente dá o mesmo resultado com qualquer
+    número de processos.
+
+    `tempo_limite_ms` é um prazo único para todas as partidas, contado desde a
+    chamada; os demais critérios (`max_iter`, `max_iter_sem_melhoria`,
+    `max_avaliacoes`, `custo_alvo`) valem para cada partida. Os outros
+    argumentos nomeados (alpha, beta, tabu_tam, operadores, orientacao,
+    vizinhos_candidatos...) seguem para tabu_search. Com `indices_bares`, todas
+    as partidas rodam na mesma subinstância e a rota volta com ids originais.
+
+    Devolve (melhor_rota, melhor_custo, estatisticas), em que `estatisticas`
+    tem um dicionário por partida, na ordem das partidas: tipo ("nn" ou
+    "aleatoria"), rota, custo, iteracoes, avaliacoes, tempo_s e
+    motivo_parada.
+    """
+    prazo = None
+    if tempo_limite_ms is not None:
+        prazo = time.time() + tempo_limite_ms / 1000.0
+
+    if instancia is None:
+        instancia = ProblemInstance(bares, tempos)
+
+    if indices_bares is not None:
+        indices_bares = np.asarray(indices_bares, dtype=np.intp)
+        locais = {bar: k for k, bar in enumerate(indices_bares.tolist())}
+        rota_inicial = [locais[bar] for bar in rota_inicial if bar in locais]
+        instancia_busca = instancia.subinstancia(indices_bares)
+    else:
+        instancia_busca = instancia
+
+    raiz = np.random.SeedSequence(semente)
+    semente_partidas, *sementes = raiz.spawn(n_starts + 1)
+    partidas = _rotas_iniciais(
+        instancia_busca,
+        rota_inicial,
+        n_starts,
+        fixar_inicio,
+        np.random.default_rng(semente_partidas),
+    )
+
+    estado = {
+        "instancia": instancia_busca,
+        "hora_inicial": hora_inicial,
+        "hora_final": hora_final,
+        "tempo_visita": tempo_visita,
+        "fixar_inicio": fixar_inicio,
+        "parametros": parametros_tabu,
+    }
+    tarefas = [
+        (indice, rota, tipo, semente_partida, prazo)
+        for indice, ((rota, tipo), semente_partida) in enumerate(zip(partidas, sementes))
+    ]
+
+    workers = min(workers or os.cpu_count() or 1, n_starts)
+    if verbose:
+        print(f"Multistart: {n_starts} partidas em {workers} processo(s)")
+
+    if workers == 1:
+        _iniciar_trabalhador(estado)
+        estatisticas = [_executar_partida(*tarefa) for tarefa in tarefas]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=_contexto_processos(),
+            initializer=_iniciar_trabalhador,
+            initargs=(estado,),
+        ) as pool:
+            futuros = [pool.submit(_executar_partida, *tarefa) for tarefa in tarefas]
+            estatisticas = [futuro.result() for futuro in futuros]
+
+    # empate: vence a partida de menor índice, independente da ordem de término
+    melhor_estatistica = min(estatisticas, key=lambda e: (e["custo"], e["inicio"]))
+    melhor_rota = Route(melhor_estatistica["rota"], instancia_busca.n)
+    if indices_bares is not None:
+        melhor_rota = Route(indices_bares[melhor_rota.bares], instancia.n)
+        for estatistica in estatisticas:
+            estatistica["rota"] = indices_bares[estatistica["rota"]].tolist()
+
+    if verbose:
+        for e in estatisticas:
+            print(
+                f"   Partida {e['inicio']} ({e['tipo']}): custo {e['custo']:.2f}, "
+                f"{e['iteracoes']} iterações, {e['tempo_s']:.2f}s"
+            )
+        print(
+            f"✅ Multistart concluído! Melhor custo: {melhor_estatistica['custo']:.2f} "
+            f"(partida {melhor_estatistica['inicio']})"
+        )
+
+    return melhor_rota, melhor_estatistica["custo"], estatisticas
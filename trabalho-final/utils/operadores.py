@@ -0,0 +1,270 @@
+"""
+Operadores de vizinhança da Busca Tabu sobre rotas abertas com o primeiro bar
+fixo. Cada movimento é descrito por uma tupla de três inteiros:
+
+    "2opt"   (i, j, 0)  inverte rota[i+1..j]
+    "swap"   (i, j, 0)  troca rota[i] e rota[j], 1 <= i < j
+    "insert" (p, 1, q)  move rota[p] para logo depois de rota[q]
+    "oropt"  (p, L, q)  move o trecho rota[p..p+L-1] (L = 1..3) para logo
+                        depois de rota[q]
+
+No modo orientação a rota é um subconjunto dos bares e há mais dois:
+
+    "adicionar" (bar, q, 0)  insere um bar de fora logo depois de rota[q]
+    "remover"   (p, 0, 0)    tira rota[p] da rota
+
+Swap, insert e or-opt só reordenam blocos contíguos sem invertê-los, então
+seus deltas saem de AvaliadorIncremental.deltas_blocos; o 2-opt usa a matriz
+de deltas do próprio avaliador, e adicionar/remover usam deltas_insercao e
+deltas_remocao.
+"""
+
+import numpy as np
+
+
+OPERADORES = ("2opt", "oropt", "swap", "insert")
+
+# só no modo orientação, em que a rota é um subconjunto dos bares
+OPERADORES_ORIENTACAO = ("adicionar", "remover")
+
+COMPRIMENTOS_OROPT = (1, 2, 3)
+
+
+def _pares(n, inicio, distancia_min):
+    """Pares de posições (i, j) com inicio <= i e i + distancia_min <= j < n."""
+    i, j = np.triu_indices(n, k=distancia_min)
+    manter = i >= inicio
+    return i[manter], j[manter]
+
+
+def _deltas_2opt(avaliador):
+    deltas, fins = avaliador.matriz_deltas_2opt(com_fim=True)
+    i, j = np.nonzero(np.isfinite(deltas))
+    return [(i, j, np.zeros_like(i), deltas[i, j], fins[i, j])]
+
+
+def _deltas_swap(avaliador):
+    n = len(avaliador.rota)
+    partes = []
+
+    i = np.arange(1, n - 1)
+    j = i + 1
+    if len(i):
+        d, f = avaliador.deltas_blocos(i, j, [(j, j), (i, i)], com_fim=True)
+        partes.append((i, j, np.zeros_like(i), d, f))
+
+    i, j = _pares(n, 1, 2)
+    if len(i):
+        d, f = avaliador.deltas_blocos(i, j, [(j, j), (i + 1, j - 1), (i, i)], com_fim=True)
+        partes.append((i, j, np.zeros_like(i), d, f))
+
+    return partes
+
+
+def deltas_trocas(avaliador, i, j):
+    """Deltas exatos e relógio final de trocas escolhidas: rota[i] <-> rota[j],
+    com 1 <= i < j (arrays do mesmo tamanho)."""
+    i = np.asarray(i, dtype=np.intp)
+    j = np.asarray(j, dtype=np.intp)
+    deltas = np.empty(len(i))
+    fins = np.empty(len(i), dtype=np.int64)
+    vizinhas = j == i + 1
+    for mascara, blocos in (
+        (vizinhas, lambda a, b: [(b, b), (a, a)]),
+        (~vizinhas, lambda a, b: [(b, b), (a + 1, b - 1), (a, a)]),
+    ):
+        if mascara.any():
+            a, b = i[mascara], j[mascara]
+            deltas[mascara], fins[mascara] = avaliador.deltas_blocos(
+                a, b, blocos(a, b), com_fim=True
+            )
+    return deltas, fins
+
+
+def _deltas_realocacao(avaliador, comprimentos):
+    n = len(avaliador.rota)
+    partes = []
+    for L in comprimentos:
+        # trecho para frente: rota[p..p+L-1] vai para depois de rota[q], q >= p+L
+        p, q = _pares(n, 1, L)
+        if len(p):
+            d, f = avaliador.deltas_blocos(
+                p, q, [(p + L, q), (p, p + L - 1)], com_fim=True
+            )
+            partes.append((p, np.full_like(p, L), q, d, f))
+
+        # trecho para trás: vai para depois de rota[q], q <= p-2
+        q, p = _pares(n - L + 1, 0, 2)
+        if len(p):
+            d, f = avaliador.deltas_blocos(
+                q + 1, p + L - 1, [(p, p + L - 1), (q + 1, p - 1)], com_fim=True
+            )
+            partes.append((p, np.full_like(p, L), q, d, f))
+
+    return partes
+
+
+def _deltas_adicao(avaliador):
+    n = len(avaliador.rota)
+    fora = avaliador.rota.ausentes()
+    if n == 0 or not len(fora):
+        return []
+    bares = np.repeat(fora, n)
+    q = np.tile(np.arange(n), len(fora))
+    d, f = avaliador.deltas_insercao(bares, q, com_fim=True)
+    return [(bares, q, np.zeros_like(q), d, f)]
+
+
+def _deltas_remocao(avaliador):
+    p = np.arange(1, len(avaliador.rota))
+    if not len(p):
+        return []
+    d, f = avaliador.deltas_remocao(p, com_fim=True)
+    return [(p, np.zeros_like(p), np.zeros_like(p), d, f)]
+
+
+def deltas_operador(avaliador, operador, com_fim=False):
+    """Todos os movimentos do operador sobre a rota do avaliador e seus deltas
+    exatos de custo: (movimentos (m, 3), deltas (m,)). Com `com_fim`, também o
+    relógio ao fim da última visita depois de cada movimento (m,)."""
+    if operador == "2opt":
+        partes = _deltas_2opt(avaliador)
+    elif operador == "swap":
+        partes = _deltas_swap(avaliador)
+    elif operador == "insert":
+        partes = _deltas_realocacao(avaliador, (1,))
+    elif operador == "oropt":
+        partes = _deltas_realocacao(avaliador, COMPRIMENTOS_OROPT)
+    elif operador == "adicionar":
+        partes = _deltas_adicao(avaliador)
+    elif operador == "remover":
+        partes = _deltas_remocao(avaliador)
+    else:
+        raise ValueError(f"Operador desconhecido: {operador}")
+
+    if partes:
+        movimentos = np.concatenate([np.stack(parte[:3], axis=1) for parte in partes])
+        deltas = np.concatenate([parte[3] for parte in partes])
+        fins = np.concatenate([parte[4] for parte in partes])
+    else:
+        movimentos = np.empty((0, 3), dtype=np.intp)
+        deltas = np.empty(0)
+        fins = np.empty(0, dtype=np.int64)
+    if com_fim:
+        return movimentos, deltas, fins
+    return movimentos, deltas
+
+
+def trecho_movimento(rota, operador, movimento):
+    """(a, trecho): o movimento aplicado reescreve rota[a:a+len(trecho)]."""
+    rota = np.asarray(rota)
+    u, v, w = (int(x) for x in movimento)
+    if operador == "2opt":
+        return u + 1, rota[u + 1:v + 1][::-1]
+    if operador == "swap":
+        return u, np.concatenate((rota[v:v + 1], rota[u + 1:v], rota[u:u + 1]))
+    if operador in ("insert", "oropt"):
+        p, L, q = u, v, w
+        segmento = rota[p:p + L]
+        if q >= p + L:
+            return p, np.concatenate((rota[p + L:q + 1], segmento))
+        return q + 1, np.concatenate((segmento, rota[q + 1:p]))
+    raise ValueError(f"Operador desconhecido: {operador}")
+
+
+def nova_rota(rota, operador, movimento):
+    """Lista com a rota depois de um movimento que muda o número de bares."""
+    rota = list(rota)
+    u, v, _ = (int(x) for x in movimento)
+    if operador == "adicionar":
+        return rota[:v + 1] + [u] + rota[v + 1:]
+    if operador == "remover":
+        return rota[:u] + rota[u + 1:]
+    raise ValueError(f"Operador desconhecido: {operador}")
+
+
+def aplicar_movimento(avaliador, operador, movimento):
+    """Aplica o movimento na rota do avaliador (in-place)."""
+    if operador in OPERADORES_ORIENTACAO:
+        avaliador.redefinir(nova_rota(avaliador.rota, operador, movimento))
+    elif operador == "2opt":
+        avaliador.aplicar_2opt(int(movimento[0]), int(movimento[1]))
+    else:
+        avaliador.aplicar_trecho(*trecho_movimento(avaliador.rota, operador, movimento))
+
+
+def extremos_movimento(rota, operador, movimento):
+    """Bares nas pontas das arestas criadas ou desfeitas pelo movimento."""
+    u, v, w = (int(x) for x in movimento)
+    if operador == "adicionar":
+        return [u] + [rota[p] for p in (v, v + 1) if p < len(rota)]
+    if operador == "remover":
+        posicoes = (u - 1, u, u + 1)
+    elif operador == "2opt":
+        posicoes = (u, u + 1, v, v + 1)
+    elif operador == "swap":
+        posicoes = (u - 1, u, u + 1, v - 1, v, v + 1)
+    else:
+        p, L, q = u, v, w
+        posicoes = (p - 1, p, p + L - 1, p + L, q, q + 1)
+    return [rota[p] for p in sorted(set(posicoes)) if 0 <= p < len(rota)]
+
+
+def posicoes_arestas(operador, u, v, w):
+    """Pares de posições (adicionadas, removidas) das arestas que o movimento
+    cria e desfaz, em relação à rota antes do movimento. Funciona com inteiros
+    ou com arrays de descritores; posições além do fim ficam a cargo de quem
+    chama (fim de rota aberta ou volta ao início no circuito fechado)."""
+    if operador == "2opt":
+        return [(u, v), (u + 1, v + 1)], [(u, u + 1), (v, v + 1)]
+    if operador == "swap":
+        adicionadas = [(u - 1, v), (v, u + 1), (v - 1, u), (u, v + 1)]
+        removidas = [(u - 1, u), (u, u + 1), (v - 1, v), (v, v + 1)]
+        return adicionadas, removidas
+    if operador in ("insert", "oropt"):
+        p, L, q = u, v, w
+        adicionadas = [(p - 1, p + L), (q, p), (p + L - 1, q + 1)]
+        removidas = [(p - 1, p), (p + L - 1, p + L), (q, q + 1)]
+        return adicionadas, removidas
+    raise ValueError(f"Operador desconhecido: {operador}")
+
+
+def arestas_movimentos(rota, operador, movimentos, fim):
+    """Arestas (adicionadas, removidas) de um lote de movimentos, como listas de
+    pares de arrays de bares. `fim` é o bar fictício que fecha a rota aberta."""
+    rota_fim = np.append(np.asarray(rota, dtype=np.intp), fim)
+    u, v, w = np.asarray(movimentos).T
+    if operador == "adicionar":
+        antes, depois = rota_fim[v], rota_fim[v + 1]
+        return [(antes, u), (u, depois)], [(antes, depois)]
+    if operador == "remover":
+        antes, bar, depois = rota_fim[u - 1], rota_fim[u], rota_fim[u + 1]
+        return [(antes, depois)], [(antes, bar), (bar, depois)]
+    adicionadas, removidas = posicoes_arestas(operador, u, v, w)
+    adicionadas = [(rota_fim[a], rota_fim[b]) for a, b in adicionadas]
+    removidas = [(rota_fim[a], rota_fim[b]) for a, b in removidas]
+    return adicionadas, removidas
+
+
+def arestas_movimento(rota, operador, movimento, fim):
+    """Arestas (adicionadas, removidas) de um único movimento, como listas de
+    pares de bares."""
+    n = len(rota)
+    u, v, w = (int(x) for x in movimento)
+
+    def bar(p):
+        return rota[p] if p < n else fim
+
+    if operador == "adicionar":
+        return [(bar(v), u), (u, bar(v + 1))], [(bar(v), bar(v + 1))]
+    if operador == "remover":
+        return (
+            [(bar(u - 1), bar(u + 1))],
+            [(bar(u - 1), bar(u)), (bar(u), bar(u + 1))],
+        )
+    adicionadas, removidas = posicoes_arestas(operador, u, v, w)
+
+    return (
+        [(bar(a), bar(b)) for a, b in adicionadas],
+        [(bar(a), bar(b)) for a, b in removidas],
+    )
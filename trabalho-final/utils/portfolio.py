@@ -0,0 +1,372 @@
+"""
+Portfólio de algoritmos: Busca Tabu, ACO e Busca Tabu clássica correm em
+paralelo, cada uma num processo, sobre a mesma instância e com o mesmo prazo.
+
+Qual motor vence depende do tamanho da instância e dos filtros, então em vez
+de escolher um a priori o portfólio roda os três pelo tempo de um. A Busca
+Tabu e o ACO (aco_itinerario) otimizam o objetivo completo; a Tabu clássica
+otimiza a distância do circuito fechado, e a rota dela é reavaliada com o
+objetivo completo (avaliar_rota_instancia), pelo qual os motores são
+comparados.
+
+Cada motor publica cada nova melhor rota, assim que a encontra (pelo callback
+`ao_melhorar` de cada busca), num "quadro" compartilhado (valores em memória
+compartilhada, protegidos por um lock). Quando o prazo acaba ou um motor
+publica uma rota com custo <= `custo_alvo`, um Event avisa os motores ainda
+em execução: o CriterioParada deles tem esse Event como `interromper`, e cada
+um devolve a melhor solução que tem naquele momento.
+"""
+
+import contextlib
+import io
+import multiprocessing
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+try:
+    from .aco_itinerario import aco_itinerario
+    from .avalia_rota import (
+        ProblemInstance,
+        avaliar_rota_instancia,
+        prefixo_no_orcamento,
+    )
+    from .criterios_parada import CriterioParada
+    from .rota import Route
+    from .tabu_search import tabu_search
+    from .tabu_search_classico import tabu_search_classico
+except Exception:
+    from aco_itinerario import aco_itinerario
+    from avalia_rota import (
+        ProblemInstance,
+        avaliar_rota_instancia,
+        prefixo_no_orcamento,
+    )
+    from criterios_parada import CriterioParada
+    from rota import Route
+    from tabu_search import tabu_search
+    from tabu_search_classico import tabu_search_classico
+
+
+MOTORES = ("tabu", "aco", "tabu_classico")
+
+# estado do processo trabalhador, preenchido uma vez por _iniciar_trabalhador
+_estado = None
+
+
+class QuadroMelhor:
+    """Melhor solução já publicada pelos motores, em memória compartilhada.
+
+    `publicar` só troca o conteúdo se o custo for menor que o atual; a leitura
+    do custo é uma única palavra e dispensa o lock.
+    """
+
+    def __init__(self, n, contexto):
+        self._lock = contexto.Lock()
+        self._custo = contexto.Value("d", float("inf"), lock=False)
+        self._tamanho = contexto.Value("i", 0, lock=False)
+        self._motor = contexto.Value("i", -1, lock=False)
+        self._rota = contexto.Array("i", max(n, 1), lock=False)
+        self.cancelar = contexto.Event()
+
+    @property
+    def custo(self):
+        return self._custo.value
+
+    def publicar(self, custo, rota, motor):
+        with self._lock:
+            if custo < self._custo.value:
+                self._custo.value = custo
+                self._tamanho.value = len(rota)
+                self._motor.value = MOTORES.index(motor)
+                self._rota[: len(rota)] = list(rota)
+                return True
+        return False
+
+    def ler(self):
+        """(custo, rota, motor) publicados, ou (inf, None, None)."""
+        with self._lock:
+            if self._motor.value < 0:
+                return float("inf"), None, None
+            rota = self._rota[: self._tamanho.value]
+            return self._custo.value, rota, MOTORES[self._motor.value]
+
+
+def _iniciar_trabalhador(estado, quadro):
+    global _estado
+    _estado = dict(estado, quadro=quadro)
+
+
+def _contexto_processos():
+    # fork compartilha a instância com os filhos sem serializá-la
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def _executar_motor(motor, semente, prazo):
+    """Roda um motor no processo trabalhador, publicando no quadro cada nova
+    melhor rota assim que ela aparece."""
+    estado = _estado
+    instancia = estado["instancia"]
+    quadro = estado["quadro"]
+    parametros = estado["parametros"]
+    custo_alvo = estado["custo_alvo"]
+    rng = np.random.default_rng(semente)
+    # a Tabu clássica sorteia com o módulo random
+    random.seed(int(rng.integers(2**63)))
+
+    tempo_limite_ms = max(0.0, (prazo - time.time()) * 1000.0)
+    parada = CriterioParada(
+        tempo_limite_ms=tempo_limite_ms,
+        interromper=quadro.cancelar.is_set,
+    )
+    inicio_bar = estado["bar_inicial"]
+    if inicio_bar is None:
+        inicio_bar = int(rng.integers(instancia.n))
+
+    def avaliar(rota):
+        return avaliar_rota_instancia(
+            rota,
+            instancia,
+            estado["hora_inicial"],
+            estado["hora_final"],
+            estado["tempo_visita"],
+            parametros.get("alpha", 1.0),
+            parametros.get("beta", 20.0),
+            estado["orientacao"],
+        )
+
+    def publicar(rota, custo):
+        # quem chega ao custo alvo cancela os demais motores na hora, sem
+        # esperar o fim da própria busca
+        quadro.publicar(custo, rota, motor)
+        if custo_alvo is not None and custo <= custo_alvo:
+            quadro.cancelar.set()
+
+    def rota_classica(circuito):
+        # o circuito começa no bar inicial; no modo orientação vale o maior
+        # prefixo que cabe no período
+        rota = list(circuito)
+        if estado["orientacao"]:
+            rota = prefixo_no_orcamento(
+                rota,
+                instancia,
+                estado["hora_inicial"],
+                estado["hora_final"],
+                estado["tempo_visita"],
+            )
+        return rota
+
+    def publicar_circuito(circuito, _distancia):
+        rota = rota_classica(circuito)
+        publicar(rota, avaliar(rota))
+
+    inicio = time.perf_counter()
+    if motor == "tabu":
+        parada.max_iter = parametros.get("max_iter", 100)
+        parada.max_iter_sem_melhoria = parametros.get("max_iter_sem_melhoria", 30)
+        parada.custo_alvo = custo_alvo
+        argumentos = {
+            chave: valor
+            for chave, valor in parametros.items()
+            if chave not in ("max_iter", "max_iter_sem_melhoria")
+        }
+        rota, _, historico = tabu_search(
+            [inicio_bar] + [bar for bar in range(instancia.n) if bar != inicio_bar],
+            instancia.tempos,
+            None,
+            estado["hora_inicial"],
+            estado["hora_final"],
+            estado["tempo_visita"],
+            verbose=False,
+            instancia=instancia,
+            fixar_inicio=estado["bar_inicial"] is not None,
+            orientacao=estado["orientacao"],
+            parada=parada,
+            rng=rng,
+            ao_melhorar=lambda rota, custo: publicar(list(rota), custo),
+            **argumentos,
+        )
+        iteracoes = len(historico["iteracao"])
+    elif motor == "aco":
+        parada.max_iter = estado["aco_iteracoes"]
+        parada.custo_alvo = custo_alvo
+        rota, _, historico = aco_itinerario(
+            [inicio_bar],
+            instancia.tempos,
+            None,
+            estado["hora_inicial"],
+            estado["hora_final"],
+            estado["tempo_visita"],
+            alpha=parametros.get("alpha", 1.0),
+            beta=parametros.get("beta", 20.0),
+            formigas=estado["aco_formigas"],
+            parada=parada,
+            rng=rng,
+            verbose=False,
+            instancia=instancia,
+            fixar_inicio=estado["bar_inicial"] is not None,
+            orientacao=estado["orientacao"],
+            ao_melhorar=lambda rota, custo: publicar(list(rota), custo),
+        )
+        iteracoes = len(historico["iteracao"])
+    else:
+        # a Tabu clássica imprime o progresso; no portfólio isso é ruído
+        with contextlib.redirect_stdout(io.StringIO()):
+            parada.max_iter = estado["tabu_classico_iteracoes"]
+            rota, _, historico = tabu_search_classico(
+                instancia.tempos,
+                instancia.n,
+                cidade_inicial=inicio_bar,
+                vizinhos_candidatos=10,
+                parada=parada,
+                ao_melhorar=publicar_circuito,
+            )
+        iteracoes = parada.iteracoes
+        rota = rota_classica(rota)
+
+    rota = list(rota)
+    custo = avaliar(rota)
+    publicar(rota, custo)
+    return {
+        "motor": motor,
+        "rota": rota,
+        "custo": custo,
+        "iteracoes": iteracoes,
+        "tempo_s": time.perf_counter() - inicio,
+        "motivo_parada": parada.motivo,
+    }
+
+
+def portfolio(
+    rota_inicial,
+    tempos,
+    bares,
+    hora_inicial,
+    hora_final,
+    tempo_visita,
+    tempo_limite_ms=2000,
+    custo_alvo=None,
+    motores=MOTORES,
+    semente=None,
+    instancia=None,
+    indices_bares=None,
+    fixar_inicio=False,
+    orientacao=False,
+    aco_formigas=20,
+    aco_iteracoes=200,
+    tabu_classico_iteracoes=1000,
+    verbose=True,
+    **parametros_tabu,
+):
+    """Corre os `motores` em paralelo até o prazo `tempo_limite_ms` (contado
+    desde a chamada) ou até algum publicar uma rota com custo <= `custo_alvo`,
+    e devolve a melhor.
+
+    Os argumentos nomeados restantes (alpha, beta, tabu_tam, operadores,
+    max_iter...) seguem para tabu_search; alpha e beta também são os pesos do
+    objetivo do ACO e aquele em que a Tabu clássica é comparada. Com `indices_bares`,
+    todos os motores rodam na mesma subinstância; com `fixar_inicio`, todos
+    partem de rota_inicial[0]. `semente` alimenta uma SeedSequence com um
+    filho por motor.
+
+    Devolve (melhor_rota, melhor_custo, estatisticas), com um dicionário por
+    motor: motor, rota, custo, iteracoes, tempo_s e motivo_parada. Se nenhum
+    motor achar rota de custo finito, a melhor é a do primeiro motor, com
+    custo infinito.
+    """
+    prazo = time.time() + tempo_limite_ms / 1000.0
+    if not motores:
+        raise ValueError("O portfólio precisa de pelo menos um motor")
+    for motor in motores:
+        if motor not in MOTORES:
+            raise ValueError(f"Motor desconhecido: {motor}")
+
+    if instancia is None:
+        instancia = ProblemInstance(bares, tempos)
+
+    if indices_bares is not None:
+        indices_bares = np.asarray(indices_bares, dtype=np.intp)
+        locais = {bar: k for k, bar in enumerate(indices_bares.tolist())}
+        rota_inicial = [locais[bar] for bar in rota_inicial if bar in locais]
+        instancia_busca = instancia.subinstancia(indices_bares)
+    else:
+        instancia_busca = instancia
+
+    estado = {
+        "instancia": instancia_busca,
+        "hora_inicial": hora_inicial,
+        "hora_final": hora_final,
+        "tempo_visita": tempo_visita,
+        "orientacao": orientacao,
+        "custo_alvo": custo_alvo,
+        "bar_inicial": rota_inicial[0] if fixar_inicio else None,
+        "aco_formigas": aco_formigas,
+        "aco_iteracoes": aco_iteracoes,
+        "tabu_classico_iteracoes": tabu_classico_iteracoes,
+        "parametros": parametros_tabu,
+    }
+    contexto = _contexto_processos()
+    quadro = QuadroMelhor(instancia_busca.n, contexto)
+    sementes = np.random.SeedSequence(semente).spawn(len(motores))
+
+    if verbose:
+        print(f"Portfólio: {', '.join(motores)} por até {tempo_limite_ms:.0f} ms")
+
+    with ProcessPoolExecutor(
+        max_workers=len(motores),
+        mp_context=contexto,
+        initializer=_iniciar_trabalhador,
+        initargs=(estado, quadro),
+    ) as pool:
+        futuros = [
+            pool.submit(_executar_motor, motor, semente_motor, prazo)
+            for motor, semente_motor in zip(motores, sementes)
+        ]
+        pendentes = set(futuros)
+        while pendentes:
+            if quadro.cancelar.is_set():
+                # os motores cancelados param na próxima verificação
+                wait(pendentes)
+                break
+            _, pendentes = wait(
+                pendentes,
+                timeout=max(prazo - time.time(), 0.0),
+                return_when=FIRST_COMPLETED,
+            )
+            if custo_alvo is not None and quadro.custo <= custo_alvo:
+                if verbose and pendentes:
+                    print(f"   Custo alvo atingido ({quadro.custo:.2f}): cancelando os demais")
+                quadro.cancelar.set()
+            elif pendentes and time.time() >= prazo:
+                if verbose:
+                    print("   Prazo esgotado: cancelando os motores restantes")
+                quadro.cancelar.set()
+        estatisticas = [futuro.result() for futuro in futuros]
+
+    melhor_custo, melhor_rota, vencedor = quadro.ler()
+    if melhor_rota is None:
+        # nenhum motor achou rota de custo finito (no modo orientação, quando
+        # nem o bar inicial cabe no período): fica a do motor de menor custo
+        escolhida = min(estatisticas, key=lambda e: e["custo"])
+        melhor_custo, melhor_rota, vencedor = (
+            escolhida["custo"], escolhida["rota"], escolhida["motor"],
+        )
+    melhor_rota = Route(melhor_rota, instancia_busca.n)
+    if indices_bares is not None:
+        melhor_rota = Route(indices_bares[melhor_rota.bares], instancia.n)
+        for estatistica in estatisticas:
+            estatistica["rota"] = indices_bares[estatistica["rota"]].tolist()
+
+    if verbose:
+        for e in estatisticas:
+            print(
+                f"   {e['motor']}: custo {e['custo']:.2f}, {e['iteracoes']} iterações, "
+                f"{e['tempo_s']:.2f}s ({e['motivo_parada']})"
+            )
+        print(f"✅ Portfólio concluído! Vencedor: {vencedor}, custo {melhor_custo:.2f}")
+
+    return melhor_rota, melhor_custo, estatisticas
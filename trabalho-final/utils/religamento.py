@@ -0,0 +1,106 @@
+"""
+Religamento de caminhos (path relinking) entre duas rotas de elite.
+
+Partindo da rota do avaliador (origem), cada passo aproxima a rota da guia:
+uma troca (swap) que põe na posição p o bar que a guia tem ali, a remoção de
+um bar que a guia não visita ou a inserção de um bar da guia que falta, logo
+depois do bar que o precede na guia. Entre os passos possíveis vence o de
+menor custo, avaliado em lote com os deltas exatos do AvaliadorIncremental,
+e a melhor rota intermediária do caminho é devolvida. O primeiro bar nunca
+muda de lugar, como nos operadores da Busca Tabu.
+"""
+
+import numpy as np
+
+try:
+    from .operadores import aplicar_movimento, deltas_trocas
+except Exception:
+    from operadores import aplicar_movimento, deltas_trocas
+
+
+def _passos(avaliador, guia, posicao_guia):
+    """Passos candidatos como lista de (operador, movimentos (m, 3), deltas, fins)."""
+    rota = avaliador.rota
+    n = len(rota)
+    passos = []
+
+    # trocas: o bar que a guia tem na posição p está na rota em outra posição
+    p = np.arange(1, min(n, len(guia)))
+    if len(p):
+        q = np.array([rota.position_of(guia[k]) for k in p.tolist()], dtype=np.intp)
+        manter = (q >= 1) & (q != p)
+        i = np.minimum(p, q)[manter]
+        j = np.maximum(p, q)[manter]
+        if len(i):
+            deltas, fins = deltas_trocas(avaliador, i, j)
+            passos.append(("swap", np.stack((i, j, np.zeros_like(i)), axis=1), deltas, fins))
+
+    # remoções: bares da rota que a guia não visita
+    p = np.array(
+        [k for k in range(1, n) if rota[k] not in posicao_guia], dtype=np.intp
+    )
+    if len(p):
+        deltas, fins = avaliador.deltas_remocao(p, com_fim=True)
+        passos.append(("remover", np.stack((p, np.zeros_like(p), np.zeros_like(p)), axis=1), deltas, fins))
+
+    # inserções: bares da guia fora da rota, depois do antecessor deles na guia
+    # (ou no fim, se o antecessor também está fora)
+    bares, q = [], []
+    for k, bar in enumerate(guia):
+        if k and bar not in rota:
+            anterior = rota.position_of(guia[k - 1])
+            bares.append(bar)
+            q.append(anterior if anterior >= 0 else n - 1)
+    if bares:
+        bares = np.array(bares, dtype=np.intp)
+        q = np.array(q, dtype=np.intp)
+        deltas, fins = avaliador.deltas_insercao(bares, q, com_fim=True)
+        passos.append(("adicionar", np.stack((bares, q, np.zeros_like(q)), axis=1), deltas, fins))
+
+    return passos
+
+
+def religar_caminho(avaliador, guia, parada=None):
+    """Caminha da rota do avaliador até `guia`, aplicando os passos no próprio
+    avaliador, e devolve (melhor_rota, custo) entre as rotas intermediárias
+    (sem as duas pontas), ou (None, inf) se o caminho não tem nenhuma.
+
+    No modo orientação do avaliador, passos que estouram o orçamento só são
+    dados quando não há outro; as rotas intermediárias inviáveis têm custo
+    infinito e nunca são devolvidas. `parada` (CriterioParada), se dado,
+    conta as avaliações e interrompe o caminho quando o tempo ou as
+    avaliações acabam.
+    """
+    guia = [int(bar) for bar in guia]
+    posicao_guia = {bar: k for k, bar in enumerate(guia)}
+    melhor, melhor_custo = None, float("inf")
+
+    # cada troca acerta uma posição de vez; inserções e remoções podem
+    # deslocar as demais, então o número de passos é limitado
+    for _ in range(2 * (len(avaliador.rota) + len(guia))):
+        if avaliador.rota == guia:
+            break
+        if parada is not None and parada.recursos_esgotados():
+            break
+        passos = _passos(avaliador, guia, posicao_guia)
+        if not passos:
+            break
+
+        movimentos = [(operador, movimento) for operador, m, _, _ in passos for movimento in m]
+        deltas = np.concatenate([d for _, _, d, _ in passos])
+        fins = np.concatenate([f for _, _, _, f in passos])
+        if parada is not None:
+            parada.registrar_avaliacoes(len(deltas))
+
+        pontuacao = deltas.copy()
+        if avaliador.orientacao:
+            pontuacao[fins > avaliador.limite] = np.inf
+            if not np.isfinite(pontuacao).any():
+                pontuacao = deltas
+        aplicar_movimento(avaliador, *movimentos[int(np.argmin(pontuacao))])
+
+        custo = avaliador.custo
+        if custo < melhor_custo and avaliador.rota != guia:
+            melhor, melhor_custo = avaliador.rota.copia(), custo
+
+    return melhor, melhor_custo
@@ -0,0 +1,90 @@
+import numpy as np
+
+
+class Route:
+    """Rota como buffer int32 de bares mais o índice inverso de posições.
+
+    `bares[p]` é o bar na posição p e `position_of(bar)` devolve a posição do
+    bar em O(1) (-1 se ele não está na rota). Inversões e substituições de
+    trechos acontecem no lugar e só atualizam as posições do trecho; `copia()`
+    tira um retrato da rota copiando os dois arrays.
+
+    `n_bares` é o total de bares da instância (tamanho do índice inverso); por
+    padrão, o maior bar da rota mais um.
+    """
+
+    __slots__ = ("bares", "_posicao")
+
+    def __init__(self, bares, n_bares=None):
+        self.bares = np.array(bares, dtype=np.int32).reshape(-1)
+        if n_bares is None:
+            n_bares = int(self.bares.max()) + 1 if len(self.bares) else 0
+        self._posicao = np.full(n_bares, -1, dtype=np.int32)
+        self._posicao[self.bares] = np.arange(len(self.bares), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.bares)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return self.bares[indice]
+        return int(self.bares[indice])
+
+    def __iter__(self):
+        return iter(self.bares.tolist())
+
+    def __contains__(self, bar):
+        return self.position_of(bar) >= 0
+
+    def __eq__(self, outra):
+        return np.array_equal(self.bares, np.asarray(outra))
+
+    __hash__ = None
+
+    def __array__(self, dtype=None, copy=None):
+        return self.bares if dtype is None else self.bares.astype(dtype)
+
+    def __repr__(self):
+        return f"Route({self.tolist()})"
+
+    def tolist(self):
+        return self.bares.tolist()
+
+    def position_of(self, bar):
+        """Posição do bar na rota, ou -1 se ele não está nela."""
+        if 0 <= bar < len(self._posicao):
+            return int(self._posicao[bar])
+        return -1
+
+    def ausentes(self):
+        """Bares da instância que não estão na rota."""
+        return np.flatnonzero(self._posicao < 0)
+
+    def chave(self):
+        """Chave canônica e hashável da rota: os bytes da sequência de bares.
+        Numa rota aberta o sentido importa, então duas rotas têm a mesma
+        chave só se visitam os mesmos bares na mesma ordem."""
+        return self.bares.tobytes()
+
+    def arestas(self):
+        """(origens, destinos) das arestas percorridas, em ordem."""
+        return self.bares[:-1], self.bares[1:]
+
+    def inverter(self, i, j):
+        """Inverte o trecho das posições i..j (inclusive) no lugar."""
+        trecho = self.bares[i : j + 1]
+        trecho[:] = trecho[::-1].copy()
+        self._posicao[trecho] = np.arange(i, j + 1, dtype=np.int32)
+
+    def substituir(self, a, trecho):
+        """Troca as posições a..a+len(trecho)-1 por `trecho` (mesmos bares)."""
+        b = a + len(trecho)
+        self.bares[a:b] = trecho
+        self._posicao[self.bares[a:b]] = np.arange(a, b, dtype=np.int32)
+
+    def copia(self):
+        """Retrato independente da rota."""
+        nova = Route.__new__(Route)
+        nova.bares = self.bares.copy()
+        nova._posicao = self._posicao.copy()
+        return nova
@@ -1,10 +1,67 @@
 import random
-from copy import deepcopy
+
+import numpy as np
 
 try:
-    from .avalia_rota import avaliar_rota
+    from .avalia_rota import (
+        ProblemInstance,
+        avaliar_rota_instancia,
+        avaliar_rotas_lote,
+        prefixo_no_orcamento,
+    )
+    from .avaliacao_incremental import AvaliadorIncremental
+    from .criterios_parada import CriterioParada
+    from .elite import ConjuntoElite
+    from .lin_kernighan import lin_kernighan
+    from .memoria_tabu import MemoriaFrequencia, MemoriaTabu, MemoriaTabuReativa
+    from .operadores import (
+        OPERADORES,
+        OPERADORES_ORIENTACAO,
+        aplicar_movimento,
+        arestas_movimento,
+        arestas_movimentos,
+        deltas_operador,
+        extremos_movimento,
+    )
+    from .religamento import religar_caminho
+    from .rota import Route
+    from .vizinhanca import (
+        extremos_2opt,
+        movimentos_2opt_candidatos,
+        vizinhos_mais_proximos,
+    )
 except Exception:
-    from avalia_rota import avaliar_rota
+    from avalia_rota import (
+        ProblemInstance,
+        avaliar_rota_instancia,
+        avaliar_rotas_lote,
+        prefixo_no_orcamento,
+    )
+    from avaliacao_incremental import AvaliadorIncremental
+    from criterios_parada import CriterioParada
+    from elite import ConjuntoElite
+    from lin_kernighan import lin_kernighan
+    from memoria_tabu import MemoriaFrequencia, MemoriaTabu, MemoriaTabuReativa
+    from operadores import (
+        OPERADORES,
+        OPERADORES_ORIENTACAO,
+        aplicar_movimento,
+        arestas_movimento,
+        arestas_movimentos,
+        deltas_operador,
+        extremos_movimento,
+    )
+    from religamento import religar_caminho
+    from rota import Route
+    from vizinhanca import (
+        extremos_2opt,
+        movimentos_2opt_candidatos,
+        vizinhos_mais_proximos,
+    )
+
+
+# iterações seguidas sem melhoria que abrem uma fase de diversificação
+ITERACOES_ATE_DIVERSIFICAR = 10
 
 
 def construir_solucao_vizinho_mais_proximo(distancias, inicio=0):
@@ -30,34 +87,20 @@ def construir_solucao_vizinho_mais_proximo(distancias, inicio=0):
     return rota
 
 
-def gerar_vizinhos_2opt(rota):
-    vizinhos = []
-    n = len(rota)
-    for i in range(n - 1):
-        for j in range(i + 2, n):
-            nova_rota = rota[: i + 1] + rota[i + 1 : j + 1][::-1] + rota[j + 1 :]
-            vizinhos.append((nova_rota, i, j))
-    return vizinhos
-
-
-def avaliar_movimento_parcial(rota, i, j, distancias):
-    n = len(rota)
-    custo_removido = 0
-    if i >= 0:
-        custo_removido += distancias[rota[i]][rota[i + 1]]
-    if j < n - 1:
-        custo_removido += distancias[rota[j]][rota[j + 1]]
-
-    custo_adicionado = 0
-    if i >= 0:
-        custo_adicionado += distancias[rota[i]][rota[j]]
-    if j < n - 1:
-        custo_adicionado += distancias[rota[i + 1]][rota[j + 1]]
-
-    return custo_adicionado - custo_removido
+def _na_instancia(iterador, indices_bares, n):
+    """Repassa o progresso de uma busca numa subinstância com as rotas
+    traduzidas para os ids de `indices_bares` e devolve o resultado dela
+    traduzido da mesma forma."""
+    while True:
+        try:
+            progresso = next(iterador)
+        except StopIteration as fim:
+            melhor, melhor_custo, historico = fim.value
+            return Route(indices_bares[melhor.bares], n), melhor_custo, historico
+        yield progresso._replace(rota=Route(indices_bares[progresso.rota.bares], n))
 
 
-def tabu_search(
+def tabu_search_iter(
     rota_inicial,
     tempos,
     bares,
@@ -71,43 +114,202 @@ def tabu_search(
     max_iter_sem_melhoria=30,
     usar_solucao_inicial_inteligente=True,
     verbose=True,
+    instancia=None,
+    vizinhos_candidatos=None,
+    operadores=("2opt",),
+    indices_bares=None,
+    fixar_inicio=False,
+    orientacao=False,
+    tempo_limite_ms=None,
+    max_avaliacoes=None,
+    custo_alvo=None,
+    parada=None,
+    rng=None,
+    tabu_reativo=False,
+    peso_frequencia=0.0,
+    elite=None,
+    religamento=False,
+    busca_lk=False,
 ):
-    """Melhorada: 2-opt correto, lista tabu de movimentos, solução inicial NN, avaliação incremental."""
+    """Melhorada: 2-opt correto, memória tabu por arestas, solução inicial NN, avaliação incremental.
+
+    Gerador: a cada nova melhor rota (a solução inicial, as melhorias do laço
+    principal e as do religamento) produz um Progresso (criterios_parada.py)
+    com a rota, o custo, as iterações concluídas e o tempo decorrido em ms.
+    Quem consome pode parar a qualquer momento com a melhor rota em mãos; ao
+    fim, o retorno do gerador (StopIteration.value) é o mesmo de tabu_search.
+
+    Os vizinhos são ranqueados pela variação exata do objetivo de avaliar_rota
+    (AvaliadorIncremental), incluindo penalidades de horário e notas. A
+    vizinhança 2-opt completa é avaliada de uma vez como matriz de deltas
+    (AvaliadorIncremental.matriz_deltas_2opt), sem montar cópias das rotas
+    vizinhas.
+
+    `instancia` é uma ProblemInstance já compilada para (bares, tempos); quando
+    omitida, é montada aqui uma única vez. Todas as avaliações completas usam
+    avaliar_rota_instancia, que devolve os mesmos custos de avaliar_rota.
+
+    Com `vizinhos_candidatos=k`, cada iteração só tenta os movimentos que criam
+    uma aresta entre um bar e um dos seus k bares mais próximos (O(n·k)
+    movimentos em vez de O(n²)), e bares cujos movimentos não melhoraram a rota
+    ficam com o bit "don't look" ligado até uma troca tocá-los. As listas
+    candidatas valem só para o 2-opt.
+
+    `operadores` escolhe a vizinhança entre "2opt", "oropt" (realocação de
+    trechos de 1 a 3 bares), "swap" e "insert" (realocação de um bar); a cada
+    iteração vence o melhor movimento admissível de todos eles. Os deltas de
+    cada operador são calculados em lote (utils/operadores.py).
+
+    A memória tabu (MemoriaTabu) guarda, para cada aresta desfeita, até que
+    iteração ela não pode voltar; `tabu_tam` é essa duração. Com
+    `tabu_reativo=True` (MemoriaTabuReativa), `tabu_tam` é só a duração
+    inicial: ela cresce quando a busca revê uma rota (Route.chave) e diminui
+    enquanto não há repetições.
+
+    Com `peso_frequencia > 0`, uma memória de longo prazo (MemoriaFrequencia)
+    conta quantas vezes cada aresta entrou na rota. Nas fases de
+    diversificação, abertas a cada ITERACOES_ATE_DIVERSIFICAR iterações sem
+    melhoria ou quando a memória reativa detecta que a busca está presa, os
+    movimentos que não melhoram pagam `peso_frequencia` × tempo médio entre
+    bares × frequência relativa das arestas que criam; a fase dura o tamanho
+    atual da lista tabu.
+
+    `elite` (capacidade ou um ConjuntoElite já criado) guarda os ótimos
+    locais por que a busca passa (rotas sem vizinho admissível melhor), sem
+    repetições e diversos entre si, além da melhor rota. Com
+    `religamento=True` (conjunto de 10 rotas se `elite` não for dado), depois
+    do laço principal e enquanto houver tempo e avaliações, a busca religa
+    cada par de rotas de elite (religar_caminho), partindo da melhor, e roda
+    uma busca local curta a partir da melhor rota intermediária; o resultado
+    volta ao conjunto e pode virar a nova melhor rota. Com `indices_bares`, as
+    rotas do conjunto ficam com os ids da subinstância.
+
+    Com `busca_lk=True`, a busca de profundidade variável (lin_kernighan, com
+    listas candidatas de `vizinhos_candidatos` ou 8 bares) melhora a solução
+    inicial e cada nova melhor rota, partindo dos bares que o último movimento
+    tocou. As cadeias usam os deltas exatos do AvaliadorIncremental.
+
+    Com `indices_bares` (ids dos bares candidatos), a busca roda numa
+    subinstância só com esses bares (ProblemInstance.subinstancia): a rota
+    inicial é traduzida para ela, bares fora do conjunto são descartados e a
+    rota final volta com os ids originais. O custo da busca passa a depender
+    do número de candidatos, não do catálogo. `fixar_inicio=True` mantém
+    rota_inicial[0] como primeiro bar (a solução NN parte dele).
+
+    Com `orientacao=True` (modo orientação), a busca também escolhe quais
+    bares entram na rota: os operadores "adicionar" e "remover" se juntam aos
+    de `operadores`, e só são admissíveis movimentos cuja última visita termina
+    até hora_final. A solução inicial é o maior prefixo viável da rota NN (ou
+    de rota_inicial). Nesse modo as listas candidatas não são usadas: as rotas
+    têm só os bares que cabem no período.
+
+    Critérios de parada (CriterioParada): além de `max_iter` e
+    `max_iter_sem_melhoria` (None desliga cada um), a busca aceita um tempo
+    limite em milissegundos (`tempo_limite_ms`, contado desde a chamada e
+    incluindo a solução inicial), um número máximo de avaliações do objetivo
+    (`max_avaliacoes`, cada delta de movimento conta uma) e um `custo_alvo`.
+    Vale o primeiro limite atingido, e a melhor rota encontrada até ali é
+    sempre devolvida. `parada` recebe um CriterioParada pronto no lugar desses
+    argumentos.
+
+    `rng` (numpy.random.Generator) sorteia os pontos de partida da solução
+    inicial no lugar do módulo `random`, para execuções reproduzíveis.
+
+    A melhor rota é devolvida como Route (utils/rota.py).
+    """
+
+    for operador in operadores:
+        if operador not in OPERADORES:
+            raise ValueError(f"Operador desconhecido: {operador}")
+
+    if parada is None:
+        parada = CriterioParada(
+            max_iter=max_iter,
+            max_iter_sem_melhoria=max_iter_sem_melhoria,
+            tempo_limite_ms=tempo_limite_ms,
+            max_avaliacoes=max_avaliacoes,
+            custo_alvo=custo_alvo,
+        )
+
+    if instancia is None:
+        instancia = ProblemInstance(bares, tempos)
+
+    if indices_bares is not None:
+        indices_bares = np.asarray(indices_bares, dtype=np.intp)
+        sub = instancia.subinstancia(indices_bares)
+        locais = {bar: k for k, bar in enumerate(indices_bares.tolist())}
+        busca = tabu_search_iter(
+            [locais[bar] for bar in rota_inicial if bar in locais],
+            sub.tempos,
+            bares,
+            hora_inicial,
+            hora_final,
+            tempo_visita,
+            alpha=alpha,
+            beta=beta,
+            tabu_tam=tabu_tam,
+            usar_solucao_inicial_inteligente=usar_solucao_inicial_inteligente,
+            verbose=verbose,
+            instancia=sub,
+            vizinhos_candidatos=vizinhos_candidatos,
+            operadores=operadores,
+            fixar_inicio=fixar_inicio,
+            orientacao=orientacao,
+            parada=parada,
+            rng=rng,
+            tabu_reativo=tabu_reativo,
+            peso_frequencia=peso_frequencia,
+            elite=elite,
+            religamento=religamento,
+            busca_lk=busca_lk,
+        )
+        return (yield from _na_instancia(busca, indices_bares, instancia.n))
+
+    def avaliar(rota):
+        parada.registrar_avaliacoes()
+        return avaliar_rota_instancia(
+            rota, instancia, hora_inicial, hora_final, tempo_visita, alpha, beta,
+            orientacao,
+        )
+
+    def no_orcamento(rota):
+        if not orientacao:
+            return rota
+        return prefixo_no_orcamento(
+            rota, instancia, hora_inicial, hora_final, tempo_visita
+        )
 
     # Se solicitado, construir solução inicial inteligente
     if usar_solucao_inicial_inteligente:
         melhor_inicial = None
         melhor_dist_inicial = float("inf")
-        pontos = random.sample(range(len(bares)), min(3, len(bares)))
-        for inicio in pontos:
-            rota_teste = construir_solucao_vizinho_mais_proximo(tempos, inicio)
-            dist_teste = avaliar_rota(
-                rota_teste,
-                tempos,
-                bares,
-                hora_inicial,
-                hora_final,
-                tempo_visita,
-                alpha,
-                beta,
-            )
+        if fixar_inicio:
+            pontos = [rota_inicial[0]]
+        elif rng is not None:
+            pontos = rng.choice(instancia.n, min(3, instancia.n), replace=False).tolist()
+        else:
+            pontos = random.sample(range(instancia.n), min(3, instancia.n))
+        rotas_teste = [
+            no_orcamento(construir_solucao_vizinho_mais_proximo(instancia._tempos, inicio))
+            for inicio in pontos
+        ]
+        if orientacao:
+            # prefixos de tamanhos diferentes: avaliados um a um
+            custos_teste = [avaliar(rota_teste) for rota_teste in rotas_teste]
+        else:
+            custos_teste = avaliar_rotas_lote(
+                rotas_teste, instancia, hora_inicial, hora_final, tempo_visita, alpha, beta
+            ).tolist()
+            parada.registrar_avaliacoes(len(rotas_teste))
+        for rota_teste, dist_teste in zip(rotas_teste, custos_teste):
             if dist_teste < melhor_dist_inicial:
                 melhor_inicial = rota_teste
                 melhor_dist_inicial = dist_teste
 
         # Fallback: se nenhuma rota NN foi válida, usar rota_inicial
         if melhor_inicial is None:
-            melhor_inicial = rota_inicial
-            melhor_dist_inicial = avaliar_rota(
-                melhor_inicial,
-                tempos,
-                bares,
-                hora_inicial,
-                hora_final,
-                tempo_visita,
-                alpha,
-                beta,
-            )
+            melhor_inicial = no_orcamento(rota_inicial)
+            melhor_dist_inicial = avaliar(melhor_inicial)
             if verbose:
                 print(
                     f"Solução inicial (fallback para rota_inicial): {melhor_dist_inicial:.2f}"
@@ -116,62 +318,164 @@ def tabu_search(
             if verbose:
                 print(f"Solução inicial (NN): {melhor_dist_inicial:.2f}")
 
-        atual = deepcopy(melhor_inicial)
+        atual = melhor_inicial
     else:
-        atual = deepcopy(rota_inicial)
-        melhor_dist_inicial = avaliar_rota(
-            atual, tempos, bares, hora_inicial, hora_final, tempo_visita, alpha, beta
-        )
+        atual = no_orcamento(rota_inicial)
+        melhor_dist_inicial = avaliar(atual)
         if verbose:
             print(f"Solução inicial: {melhor_dist_inicial:.2f}")
 
-    melhor = deepcopy(atual)
-    melhor_custo = avaliar_rota(
-        melhor, tempos, bares, hora_inicial, hora_final, tempo_visita, alpha, beta
-    )
+    melhor = Route(atual, instancia.n)
+    melhor_custo = avaliar(melhor)
+    parada.iniciar(melhor_custo)
 
-    tabu_movimentos = []
+    # atributo tabu: arestas desfeitas ficam proibidas de voltar por tabu_tam iterações
+    if tabu_reativo:
+        memoria = MemoriaTabuReativa(instancia.n, tabu_tam)
+    else:
+        memoria = MemoriaTabu(instancia.n, tabu_tam)
+    frequencias = None
+    diversificar_ate = -1
+    conjunto_elite = elite
+    if isinstance(elite, int):
+        conjunto_elite = ConjuntoElite(elite) if elite > 0 else None
+    if religamento and conjunto_elite is None:
+        conjunto_elite = ConjuntoElite()
+    if peso_frequencia:
+        frequencias = MemoriaFrequencia(instancia.n)
+        escala_frequencia = peso_frequencia * float(instancia.tempos.mean())
     historico = {"iteracao": [], "distancia_atual": [], "distancia_melhor": []}
-    iteracoes_sem_melhoria = 0
 
-    distancia_atual = avaliar_rota(
-        atual, tempos, bares, hora_inicial, hora_final, tempo_visita, alpha, beta
+    # deltas exatos do objetivo completo (tempo, penalidades de horário e notas).
+    # A rota corrente é a Route do avaliador: os movimentos são descritores
+    # gerados sob demanda e só o escolhido é aplicado, no lugar.
+    avaliador = AvaliadorIncremental(
+        instancia, atual, hora_inicial, hora_final, tempo_visita, alpha, beta,
+        orientacao,
     )
+    atual = avaliador.rota
+    distancia_atual = avaliador.custo
+
+    candidatos_lk = None
+    if busca_lk:
+        candidatos_lk = vizinhos_mais_proximos(instancia.tempos, vizinhos_candidatos or 8)
+        lin_kernighan(avaliador, candidatos_lk, instancia._tempos, alpha, parada=parada)
+        distancia_atual = avaliador.custo
+        if distancia_atual < melhor_custo:
+            melhor, melhor_custo = atual.copia(), distancia_atual
+            parada.iniciar(melhor_custo)
+            if verbose:
+                print(f"Solução inicial + LK: {melhor_custo:.2f}")
+    yield parada.progresso(melhor, melhor_custo)
+
+    vizinhanca = tuple(operadores)
+    if orientacao:
+        vizinhanca += OPERADORES_ORIENTACAO
+
+    candidatos = None
+    if vizinhos_candidatos and not orientacao:
+        candidatos = vizinhos_mais_proximos(instancia.tempos, vizinhos_candidatos)
+        ativos = [True] * instancia.n
 
-    for iteracao in range(max_iter):
-        vizinhos = gerar_vizinhos_2opt(atual)
-        melhor_vizinho = None
+    iteracao = 0
+    while not parada.parar():
+        # na diversificação, melhor_dist_vizinho inclui a penalidade de frequência
         melhor_dist_vizinho = float("inf")
         melhor_movimento = None
-
-        for nova_rota, i, j in vizinhos:
-            movimento = (i, j)
-            delta = avaliar_movimento_parcial(atual, i, j, tempos)
-            dist = distancia_atual + delta
-            movimento_tabu = movimento in tabu_movimentos
-            criterio_aspiracao = dist < melhor_custo
-            if not movimento_tabu or criterio_aspiracao:
-                if dist < melhor_dist_vizinho:
-                    melhor_vizinho = nova_rota
-                    melhor_dist_vizinho = dist
-                    melhor_movimento = movimento
-
-        if melhor_vizinho is None:
+        diversificando = frequencias is not None and iteracao <= diversificar_ate
+
+        for operador in vizinhanca:
+            if operador == "2opt" and candidatos is not None:
+                movimentos = movimentos_2opt_candidatos(atual, candidatos, ativos)
+                if not movimentos:
+                    # todos os bares com "don't look": reabre a vizinhança candidata
+                    ativos = [True] * instancia.n
+                    movimentos = movimentos_2opt_candidatos(atual, candidatos, ativos)
+                olhados = {bar for bar in atual if ativos[bar]}
+                parada.registrar_avaliacoes(len(movimentos))
+                com_melhoria = set()
+
+                for i, j, delta in avaliador.deltas_2opt(movimentos):
+                    movimento = (operador, (i, j, 0))
+                    dist = distancia_atual + delta
+                    if delta < 0:
+                        com_melhoria.update(extremos_2opt(atual, i, j))
+                    adicionadas, _ = arestas_movimento(atual, *movimento, instancia.n)
+                    movimento_tabu = memoria.eh_tabu(adicionadas, iteracao)
+                    criterio_aspiracao = dist < melhor_custo
+                    if not movimento_tabu or criterio_aspiracao:
+                        if diversificando and delta >= 0:
+                            dist += escala_frequencia * frequencias.penalidade(adicionadas)
+                        if dist < melhor_dist_vizinho:
+                            melhor_dist_vizinho = dist
+                            melhor_movimento = movimento
+
+                for bar in olhados - com_melhoria:
+                    ativos[bar] = False
+                continue
+
+            # vizinhança completa do operador em lote; memória tabu e aspiração
+            # viram máscaras booleanas e a escolha é um argmin
+            movimentos, deltas, fins = deltas_operador(avaliador, operador, com_fim=True)
+            parada.registrar_avaliacoes(len(deltas))
+            if not len(deltas):
+                continue
+            dists = distancia_atual + deltas
+            if orientacao:
+                # restrição do orçamento: a última visita termina até hora_final
+                dists[fins > avaliador.limite] = np.inf
+            adicionadas, _ = arestas_movimentos(atual, operador, movimentos, instancia.n)
+            tabu = memoria.mascara(adicionadas, iteracao)
+            dists[tabu & (dists >= melhor_custo)] = np.inf
+            if diversificando:
+                penalidades = escala_frequencia * frequencias.penalidades(adicionadas)
+                dists += np.where(deltas >= 0, penalidades, 0.0)
+            indice = int(np.argmin(dists))
+            if dists[indice] < melhor_dist_vizinho:
+                melhor_dist_vizinho = dists[indice]
+                melhor_movimento = (operador, tuple(movimentos[indice].tolist()))
+
+        if melhor_movimento is None:
             if verbose:
                 print(f"Iteração {iteracao}: Sem vizinhos válidos. Parando.")
             break
 
-        atual = melhor_vizinho
-        distancia_atual = melhor_dist_vizinho
+        if conjunto_elite is not None and melhor_dist_vizinho >= distancia_atual:
+            # nenhum vizinho admissível melhora: a rota atual é um ótimo local
+            conjunto_elite.oferecer(atual, distancia_atual)
+
+        extremos = extremos_movimento(atual, *melhor_movimento)
+        if candidatos is not None:
+            for bar in extremos:
+                ativos[bar] = True
+
+        adicionadas, removidas = arestas_movimento(atual, *melhor_movimento, instancia.n)
+        aplicar_movimento(avaliador, *melhor_movimento)
+        atual = avaliador.rota
+        memoria.proibir(removidas, iteracao)
+        if frequencias is not None:
+            frequencias.registrar(adicionadas)
+        if tabu_reativo and memoria.registrar_rota(atual.chave(), iteracao):
+            diversificar_ate = iteracao + memoria.duracao
+        # custo exato da nova rota: o delta não se acumula com erro
+        distancia_atual = avaliador.custo
+
+        if candidatos_lk is not None and distancia_atual < melhor_custo:
+            # intensificação: cadeias LK a partir das pontas do movimento
+            lin_kernighan(
+                avaliador, candidatos_lk, instancia._tempos, alpha,
+                bares=extremos, parada=parada,
+            )
+            distancia_atual = avaliador.custo
 
         historico["iteracao"].append(iteracao)
-        historico["distancia_atual"].append(melhor_dist_vizinho)
+        historico["distancia_atual"].append(distancia_atual)
         historico["distancia_melhor"].append(melhor_custo)
 
-        if melhor_dist_vizinho < melhor_custo:
-            melhor = deepcopy(atual)
-            melhor_custo = melhor_dist_vizinho
-            iteracoes_sem_melhoria = 0
+        melhorou = distancia_atual < melhor_custo
+        if melhorou:
+            melhor = atual.copia()
+            melhor_custo = distancia_atual
             if verbose:
                 melhoria = (
                     (melhor_dist_inicial - melhor_custo) / melhor_dist_inicial * 100
@@ -179,20 +483,62 @@ def tabu_search(
                 print(
                     f"Iteração {iteracao}: Nova melhor = {melhor_custo:.2f} (melhoria {melhoria:.1f}%)"
                 )
-        else:
-            iteracoes_sem_melhoria += 1
 
-        if melhor_movimento:
-            tabu_movimentos.append(melhor_movimento)
-            if len(tabu_movimentos) > tabu_tam:
-                tabu_movimentos.pop(0)
-
-        if iteracoes_sem_melhoria >= max_iter_sem_melhoria:
-            if verbose:
-                print(
-                    f"Iteração {iteracao}: Sem melhoria por {max_iter_sem_melhoria} iterações. Parando."
-                )
-            break
+        parada.registrar_iteracao(melhor_custo)
+        if melhorou:
+            yield parada.progresso(melhor, melhor_custo)
+        sem_melhoria = parada.iteracoes_sem_melhoria
+        if sem_melhoria and sem_melhoria % ITERACOES_ATE_DIVERSIFICAR == 0:
+            diversificar_ate = iteracao + memoria.duracao
+        iteracao += 1
+
+    if verbose and parada.motivo is not None:
+        print(f"{parada.descricao()} Parando após {iteracao} iterações.")
+
+    if conjunto_elite is not None:
+        conjunto_elite.oferecer(melhor, melhor_custo)
+
+    if religamento and len(conjunto_elite) > 1:
+        for origem, guia in conjunto_elite.pares():
+            if parada.recursos_esgotados():
+                break
+            intermediaria, _ = religar_caminho(
+                AvaliadorIncremental(
+                    instancia, origem, hora_inicial, hora_final, tempo_visita,
+                    alpha, beta, orientacao,
+                ),
+                guia,
+                parada,
+            )
+            if intermediaria is None:
+                continue
+            busca_local = parada.derivar(max_iter_sem_melhoria=10)
+            rota_religada, custo_religada, _ = tabu_search(
+                intermediaria,
+                instancia.tempos,
+                None,
+                hora_inicial,
+                hora_final,
+                tempo_visita,
+                alpha=alpha,
+                beta=beta,
+                tabu_tam=tabu_tam,
+                usar_solucao_inicial_inteligente=False,
+                verbose=False,
+                instancia=instancia,
+                operadores=operadores,
+                fixar_inicio=fixar_inicio,
+                orientacao=orientacao,
+                parada=busca_local,
+            )
+            parada.registrar_avaliacoes(busca_local.avaliacoes)
+            parada.registrar_custo(custo_religada)
+            conjunto_elite.oferecer(rota_religada, custo_religada)
+            if custo_religada < melhor_custo:
+                melhor, melhor_custo = rota_religada, custo_religada
+                if verbose:
+                    print(f"Religamento: Nova melhor = {melhor_custo:.2f}")
+                yield parada.progresso(melhor, melhor_custo)
 
     if verbose:
         melhoria_final = (
@@ -208,6 +554,21 @@ def tabu_search(
     return melhor, melhor_custo, historico
 
 
+def tabu_search(*args, ao_melhorar=None, **kwargs):
+    """Roda tabu_search_iter até o fim e devolve (melhor_rota, melhor_custo,
+    historico). Os argumentos são os de tabu_search_iter; `ao_melhorar`, se
+    dado, é chamada com (rota, custo) de cada Progresso, assim que ele
+    aparece."""
+    busca = tabu_search_iter(*args, **kwargs)
+    while True:
+        try:
+            progresso = next(busca)
+        except StopIteration as fim:
+            return fim.value
+        if ao_melhorar is not None:
+            ao_melhorar(progresso.rota.copia(), progresso.custo)
+
+
 if __name__ == "__main__":
     import pickle
     from datetime import datetime, timedelta
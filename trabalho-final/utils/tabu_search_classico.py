@@ -3,6 +3,19 @@ import pickle
 import pandas as pd
 from copy import deepcopy
 
+try:
+    from .criterios_parada import CriterioParada
+    from .lin_kernighan import AvaliadorCircuito, lin_kernighan
+    from .memoria_tabu import MemoriaTabu
+    from .operadores import posicoes_arestas
+    from .vizinhanca import movimentos_2opt_candidatos, vizinhos_mais_proximos
+except Exception:
+    from criterios_parada import CriterioParada
+    from lin_kernighan import AvaliadorCircuito, lin_kernighan
+    from memoria_tabu import MemoriaTabu
+    from operadores import posicoes_arestas
+    from vizinhanca import movimentos_2opt_candidatos, vizinhos_mais_proximos
+
 def carregar_dados():
     try:
         bares_df = pd.read_csv("data/bares.csv")
@@ -26,19 +39,35 @@ def calcular_custo_rota(rota, matriz_distancias):
     
     return custo_total
 
+def arestas_movimento_circuito(rota, movimento):
+    """Arestas (adicionadas, removidas) do movimento no circuito fechado.
+
+    `movimento` é (operador, (u, v, w)) como em utils/operadores.py; as posições
+    dão a volta no fim da rota.
+    """
+    n = len(rota)
+    adicionadas, removidas = posicoes_arestas(movimento[0], *movimento[1])
+    return (
+        [(rota[a % n], rota[b % n]) for a, b in adicionadas],
+        [(rota[a % n], rota[b % n]) for a, b in removidas],
+    )
+
 def gerar_vizinhos_2opt(rota):
     vizinhos = []
+    movimentos = []
     n = len(rota)
     
     for i in range(n - 1):
         for j in range(i + 2, n):
             novo_vizinho = rota[:i+1] + rota[i+1:j+1][::-1] + rota[j+1:]
             vizinhos.append(novo_vizinho)
+            movimentos.append(("2opt", (i, j, 0)))
     
-    return vizinhos
+    return vizinhos, movimentos
 
 def gerar_vizinhos_swap(rota):
     vizinhos = []
+    movimentos = []
     n = len(rota)
     
     for i in range(n):
@@ -46,11 +75,13 @@ def gerar_vizinhos_swap(rota):
             novo_vizinho = rota[:]
             novo_vizinho[i], novo_vizinho[j] = novo_vizinho[j], novo_vizinho[i]
             vizinhos.append(novo_vizinho)
+            movimentos.append(("swap", (i, j, 0)))
     
-    return vizinhos
+    return vizinhos, movimentos
 
 def gerar_vizinhos_insert(rota):
     vizinhos = []
+    movimentos = []
     n = len(rota)
     
     for i in range(n):
@@ -60,77 +91,192 @@ def gerar_vizinhos_insert(rota):
                 elemento = novo_vizinho.pop(i)
                 novo_vizinho.insert(j, elemento)
                 vizinhos.append(novo_vizinho)
+                # rota[i] passa a vir logo depois de rota[j] (ou de rota[j-1])
+                movimentos.append(("insert", (i, 1, j if j > i else j - 1)))
     
-    return vizinhos
+    return vizinhos, movimentos
+
+def gerar_vizinhos_candidatos(rota, candidatos, ativos, usar_todos_movimentos=True):
+    """Vizinhos que criam uma aresta entre um bar ativo e um dos seus candidatos.
+
+    Retorna (vizinhos, movimentos), onde movimentos[k] descreve o vizinho k
+    como em utils/operadores.py (as arestas trocadas religam os bits "don't
+    look" e alimentam a memória tabu).
+    """
+    vizinhos = []
+    movimentos = []
+    for i, j in movimentos_2opt_candidatos(rota, candidatos, ativos):
+        vizinhos.append(rota[:i+1] + rota[i+1:j+1][::-1] + rota[j+1:])
+        movimentos.append(("2opt", (i, j, 0)))
+
+    if usar_todos_movimentos:
+        n = len(rota)
+        posicao = {bar: p for p, bar in enumerate(rota)}
+        for pa, a in enumerate(rota):
+            if not ativos[a]:
+                continue
+            for b in candidatos[a]:
+                pb = posicao[b]
+                if pb == pa + 1:
+                    continue
+                # swap: b troca de lugar com o sucessor de a
+                if pa + 1 < n:
+                    novo_vizinho = rota[:]
+                    novo_vizinho[pa+1], novo_vizinho[pb] = novo_vizinho[pb], novo_vizinho[pa+1]
+                    vizinhos.append(novo_vizinho)
+                    movimentos.append(("swap", (min(pa + 1, pb), max(pa + 1, pb), 0)))
+                # insert: b é reinserido logo depois de a
+                novo_vizinho = rota[:]
+                novo_vizinho.pop(pb)
+                novo_vizinho.insert(pa + 1 if pb > pa else pa, b)
+                vizinhos.append(novo_vizinho)
+                movimentos.append(("insert", (pb, 1, pa)))
+
+    return vizinhos, movimentos
 
 def tabu_search_classico(matriz_distancias, num_cidades, 
                         max_iteracoes=1000, tamanho_lista_tabu=50, 
-                        cidade_inicial=0, usar_todos_movimentos=True):
+                        cidade_inicial=0, usar_todos_movimentos=True,
+                        vizinhos_candidatos=None, parada=None, busca_lk=False,
+                        ao_melhorar=None):
+    """Tabu Search clássico sobre a distância do circuito fechado.
+
+    Com `vizinhos_candidatos=k`, só gera os vizinhos que criam uma aresta entre
+    um bar e um dos seus k mais próximos, pulando bares com o bit "don't look"
+    ligado (nenhum dos seus vizinhos melhorou a solução atual).
+
+    A lista tabu é uma MemoriaTabu sobre arestas: as arestas desfeitas por um
+    movimento não podem voltar por `tamanho_lista_tabu` iterações.
+
+    `parada` (CriterioParada) troca o limite de `max_iteracoes` por critérios
+    combinados (tempo, avaliações, custo alvo, interrupção externa); a melhor
+    solução encontrada até a parada é devolvida.
+
+    Com `busca_lk=True`, a solução inicial e cada nova melhor solução passam
+    por lin_kernighan (listas candidatas de `vizinhos_candidatos` ou 8 bares).
+
+    `ao_melhorar`, se dado, é chamada com (solucao, custo) para a solução
+    inicial e para cada nova melhor solução, assim que encontrada.
+    """
+    if parada is None:
+        parada = CriterioParada(max_iter=max_iteracoes)
 
     cidades_restantes = [i for i in range(num_cidades) if i != cidade_inicial]
     random.shuffle(cidades_restantes)
     solucao_atual = [cidade_inicial] + cidades_restantes
+
+    if busca_lk:
+        matriz_lista = [list(linha) for linha in matriz_distancias]
+        candidatos_lk = vizinhos_mais_proximos(matriz_distancias, vizinhos_candidatos or 8)
+
+        def intensificar(solucao):
+            avaliador = AvaliadorCircuito(matriz_lista, solucao)
+            lin_kernighan(avaliador, candidatos_lk, matriz_lista, parada=parada)
+            return avaliador.rota.tolist()
+
+        solucao_atual = intensificar(solucao_atual)
     
     melhor_solucao = solucao_atual[:]
     custo_atual = calcular_custo_rota(solucao_atual, matriz_distancias)
     melhor_custo = custo_atual
+    parada.iniciar(custo_atual)
+    if ao_melhorar is not None:
+        ao_melhorar(melhor_solucao[:], melhor_custo)
     
-    lista_tabu = []
+    memoria = MemoriaTabu(num_cidades, tamanho_lista_tabu)
     historico_custos = [custo_atual]
     
     print(f"Solução inicial: custo = {custo_atual:.2f}")
+
+    candidatos = None
+    if vizinhos_candidatos:
+        candidatos = vizinhos_mais_proximos(matriz_distancias, vizinhos_candidatos)
+        ativos = [True] * num_cidades
     
-    for iteracao in range(max_iteracoes):
-        if usar_todos_movimentos:
-            vizinhos = []
-            vizinhos.extend(gerar_vizinhos_2opt(solucao_atual))
-            vizinhos.extend(gerar_vizinhos_swap(solucao_atual))
-            vizinhos.extend(gerar_vizinhos_insert(solucao_atual))
+    iteracao = 0
+    while not parada.parar():
+        if candidatos is not None:
+            vizinhos, movimentos = gerar_vizinhos_candidatos(
+                solucao_atual, candidatos, ativos, usar_todos_movimentos)
+            if not vizinhos:
+                ativos = [True] * num_cidades
+                vizinhos, movimentos = gerar_vizinhos_candidatos(
+                    solucao_atual, candidatos, ativos, usar_todos_movimentos)
+            olhados = {bar for bar in solucao_atual if ativos[bar]}
+            com_melhoria = set()
+            varredura_completa = True
+        elif usar_todos_movimentos:
+            vizinhos, movimentos = gerar_vizinhos_2opt(solucao_atual)
+            for gerar in (gerar_vizinhos_swap, gerar_vizinhos_insert):
+                novos, novos_movimentos = gerar(solucao_atual)
+                vizinhos.extend(novos)
+                movimentos.extend(novos_movimentos)
         else:
-            vizinhos = gerar_vizinhos_2opt(solucao_atual)
+            vizinhos, movimentos = gerar_vizinhos_2opt(solucao_atual)
         
         melhor_vizinho = None
         melhor_custo_vizinho = float('inf')
-        melhor_movimento = None
+        melhor_indice = None
         
-        for vizinho in vizinhos:
+        for indice, vizinho in enumerate(vizinhos):
             custo_vizinho = calcular_custo_rota(vizinho, matriz_distancias)
-            movimento = tuple(sorted([tuple(solucao_atual), tuple(vizinho)]))
+            parada.registrar_avaliacoes()
+            adicionadas, removidas = arestas_movimento_circuito(
+                solucao_atual, movimentos[indice])
+            if candidatos is not None and custo_vizinho < custo_atual:
+                for aresta in adicionadas + removidas:
+                    com_melhoria.update(aresta)
             
             if custo_vizinho < melhor_custo:
                 melhor_vizinho = vizinho
                 melhor_custo_vizinho = custo_vizinho
-                melhor_movimento = movimento
+                melhor_indice = indice
+                varredura_completa = False
                 break
             
-            if movimento not in lista_tabu:
+            if not memoria.eh_tabu(adicionadas, iteracao):
                 if custo_vizinho < melhor_custo_vizinho:
                     melhor_vizinho = vizinho
                     melhor_custo_vizinho = custo_vizinho
-                    melhor_movimento = movimento
+                    melhor_indice = indice
         
 
+
         if melhor_vizinho is None:
             print(f"Não há mais movimentos válidos na iteração {iteracao}")
             break
         
+        adicionadas, removidas = arestas_movimento_circuito(
+            solucao_atual, movimentos[melhor_indice])
+        if candidatos is not None:
+            if varredura_completa:
+                for bar in olhados - com_melhoria:
+                    ativos[bar] = False
+            for aresta in adicionadas + removidas:
+                for bar in aresta:
+                    ativos[bar] = True
+
+        memoria.proibir(removidas, iteracao)
         solucao_atual = melhor_vizinho
         custo_atual = melhor_custo_vizinho
         
         if custo_atual < melhor_custo:
+            if busca_lk:
+                solucao_atual = intensificar(solucao_atual)
+                custo_atual = calcular_custo_rota(solucao_atual, matriz_distancias)
             melhor_solucao = solucao_atual[:]
             melhor_custo = custo_atual
             print(f"Iteração {iteracao}: Nova melhor solução encontrada! Custo = {melhor_custo:.2f}")
-        
-        if melhor_movimento:
-            lista_tabu.append(melhor_movimento)
-            if len(lista_tabu) > tamanho_lista_tabu:
-                lista_tabu.pop(0)
+            if ao_melhorar is not None:
+                ao_melhorar(melhor_solucao[:], melhor_custo)
         
         historico_custos.append(custo_atual)
         
         if iteracao % 100 == 0 and iteracao > 0:
             print(f"Iteração {iteracao}: Custo atual = {custo_atual:.2f}, Melhor = {melhor_custo:.2f}")
+
+        parada.registrar_iteracao(melhor_custo)
+        iteracao += 1
     
     return melhor_solucao, melhor_custo, historico_custos
 
@@ -0,0 +1,58 @@
+import numpy as np
+
+
+def vizinhos_mais_proximos(tempos, k):
+    """Lista candidata de cada bar: os k bares mais próximos na matriz `tempos`,
+    do mais próximo para o mais distante (o próprio bar é excluído)."""
+    matriz = np.array(tempos, dtype=np.float64)
+    n = len(matriz)
+    k = max(0, min(k, n - 1))
+    if k == 0:
+        return [[] for _ in range(n)]
+    np.fill_diagonal(matriz, np.inf)
+    indices = np.argpartition(matriz, k - 1, axis=1)[:, :k]
+    ordem = np.argsort(np.take_along_axis(matriz, indices, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(indices, ordem, axis=1).tolist()
+
+
+def movimentos_2opt_candidatos(rota, candidatos, ativos):
+    """Movimentos 2-opt (i, j) que criam uma aresta entre um bar ativo e um dos
+    seus vizinhos candidatos.
+
+    Inverter rota[i+1..j] cria as arestas (rota[i], rota[j]) e
+    (rota[i+1], rota[j+1]); para um par (a, b) nas posições lo < hi isso dá os
+    movimentos (lo, hi) e (lo - 1, hi - 1). `ativos[bar]` é False para bares com
+    o bit "don't look" ligado. `rota` pode ser uma Route (posições pelo índice
+    inverso) ou uma lista.
+    """
+    if hasattr(rota, "position_of"):
+        posicao = rota.position_of
+    else:
+        posicoes = {bar: p for p, bar in enumerate(rota)}
+
+        def posicao(bar):
+            return posicoes.get(bar, -1)
+
+    movimentos = set()
+    for pa, a in enumerate(rota):
+        if not ativos[a]:
+            continue
+        for b in candidatos[a]:
+            pb = posicao(b)
+            if pb < 0:
+                continue
+            lo, hi = (pa, pb) if pa < pb else (pb, pa)
+            if hi - lo < 2:
+                continue
+            movimentos.add((lo, hi))
+            if lo >= 1:
+                movimentos.add((lo - 1, hi - 1))
+    return movimentos
+
+
+def extremos_2opt(rota, i, j):
+    """Bares nas pontas das arestas trocadas pelo movimento 2-opt (i, j)."""
+    extremos = [rota[i], rota[i + 1], rota[j]]
+    if j + 1 < len(rota):
+        extremos.append(rota[j + 1])
+    return extremos